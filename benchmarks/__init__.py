@@ -0,0 +1,6 @@
+"""
+benchmarks
+----------
+
+Benchmarks of the package. Each module can be run with python -m.
+"""
@@ -0,0 +1,110 @@
+"""
+benchmarks.compact_objects
+--------------------------
+
+Compares the memory and throughput of the regular and the compact products.
+
+Usage:
+    python -m benchmarks.compact_objects [number of products]
+"""
+
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Any, Dict, List
+
+from cornershop_scraper.core.objects import Product
+from cornershop_scraper.core.objects.compact import CompactProduct
+from cornershop_scraper.core.objects.store import Store
+from cornershop_scraper.utils.writer.base import Writer
+
+
+def make_info(index: int) -> Dict[str, Any]:
+    """ Returns the data of a synthetic product, as retrieved from the API.
+
+    Arguments:
+        index : The product index.
+
+    Returns:
+        A dictionary with the product data.
+    """
+
+    return dict(
+        id=index,
+        brand={'id': index % 500, 'name': f'Brand {index % 500}'},
+        buy_unit='UN',
+        currency='BRL',
+        default_buy_unit='UN',
+        description=f'Description of the product {index}',
+        img_url=f'https://cornershopapp.com/img/{index}.jpg',
+        nutritional_info=None,
+        regulatory_fees=[],
+        related_to=None,
+        unit_conversion_rate=1,
+        kind='PRODUCT',
+        name=f'Product {index}',
+        label='',
+        package='1 un',
+        original_price=None,
+        price=round(1 + index % 1000 / 10, 2),
+        price_per_unit=None,
+        purchasable=True,
+        variable_weight=False,
+        availability_status='AVAILABLE'
+    )
+
+
+def measure(product_class: type,
+            infos: List[Dict[str, Any]]) -> Dict[str, float]:
+    """ Measures the construction, memory and header projection of a product class.
+
+    Arguments:
+        product_class : The product class.
+        infos : The products data.
+
+    Returns:
+        A dictionary with the measures.
+    """
+
+    tracemalloc.start()
+    start = perf_counter()
+    products = [product_class(info=info, aisle='Aisle', department='Department') for info in infos]
+    construction = perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    keys = list(Store.DEFAULT_HEADERS.keys())
+    start = perf_counter()
+    Writer.apply_headers(items=products, keys=keys)
+    projection = perf_counter() - start
+
+    return dict(
+        construction=len(infos) / construction,
+        projection=len(infos) / projection,
+        memory=memory / len(infos)
+    )
+
+
+def main(size: int = 100000) -> None:
+    """ Prints the comparison table.
+
+    Arguments:
+        size : The number of products.
+
+    Returns:
+        None
+    """
+
+    infos = [make_info(index) for index in range(size)]
+    print(f'{size} products')
+    print(f'{"class":<16}{"build/s":>14}{"project/s":>14}{"bytes/item":>14}')
+    for product_class in (Product, CompactProduct):
+        result = measure(product_class=product_class, infos=infos)
+        print(
+            f'{product_class.__name__:<16}{result["construction"]:>14,.0f}'
+            f'{result["projection"]:>14,.0f}{result["memory"]:>14,.0f}'
+        )
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
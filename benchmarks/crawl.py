@@ -0,0 +1,278 @@
+"""
+benchmarks.crawl
+----------------
+
+Measures the whole crawl pipeline, Cornershop -> create_store -> save the
+products, against the local mock server with a realistic latency.
+
+Each mode runs on its own process, so its peak RSS is not mixed with the
+others, and reports the wall-clock, the time to the first written row, the
+requests per second and the products per second. The run fails when the
+products per second of a mode drop below its stored threshold.
+
+Usage:
+    python -m benchmarks.crawl [--modes serial,concurrent] [--latency 0.02] [--save]
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+from contextlib import contextmanager
+from os import makedirs, path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Dict, Iterator, List
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from cornershop_scraper.mock import MockServer, SyntheticCatalog
+
+THRESHOLDS_PATH = path.join(path.dirname(__file__), 'baselines', 'crawl.json')
+MODES = ('serial', 'streaming', 'concurrent', 'extract_all')
+DEFAULT_LATENCY = 0.02
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 1000
+DEFAULT_MARGIN = 0.5
+EXTENSION = 'csv'
+
+
+@contextmanager
+def first_row_probe(started_at: float) -> Iterator[List[float]]:
+    """ Records the time of the first rows written by the benchmark writer.
+
+    Arguments:
+        started_at : The start of the crawl, from perf_counter.
+
+    Returns:
+        A list that receives the seconds until the first row.
+    """
+
+    from cornershop_scraper.utils.writer import ALLOWED_WRITERS
+
+    writer_class = ALLOWED_WRITERS[EXTENSION]
+    write_rows = writer_class.write_rows
+    first_row = []
+
+    def probe(self, rows):
+        if rows and not first_row:
+            first_row.append(perf_counter() - started_at)
+
+        return write_rows(self, rows)
+
+    writer_class.write_rows = probe
+    try:
+        yield first_row
+
+    finally:
+        writer_class.write_rows = write_rows
+
+
+def run_mode(mode: str,
+             base_url: str,
+             output_path: str,
+             concurrency: int = DEFAULT_CONCURRENCY,
+             rate: float = DEFAULT_RATE) -> Dict[str, Any]:
+    """ Crawls the mock stores with one of the modes.
+
+    Arguments:
+        mode : One of serial, streaming, concurrent and extract_all.
+        base_url : The mock server URL.
+        output_path : The directory of the saved files.
+        concurrency : The aisle requests in flight of the concurrent mode and the workers of extract_all.
+        rate : The requests per second allowed by the rate limiter.
+
+    Returns:
+        A dictionary with the wall-clock, the time to the first row, the products and the peak RSS.
+    """
+
+    from cornershop_scraper import Cornershop
+    from cornershop_scraper.utils.limiter import RateLimiter
+
+    started_at = perf_counter()
+    products = 0
+    with first_row_probe(started_at=started_at) as first_row:
+        cornershop = Cornershop(
+            address='Benchmark',
+            file_path=output_path,
+            base_url=base_url,
+            rate_limiter=RateLimiter(rate=rate, burst=max(1, concurrency))
+        )
+        if mode == 'extract_all':
+            results = cornershop.extract_all(workers=concurrency, extension=EXTENSION)
+            products = sum(result['products'] for result in results)
+
+        for store in cornershop.stores if mode != 'extract_all' else []:
+            store_obj = cornershop.create_store(store['business_id'])
+            file_name = cornershop.get_store_file_name(store=store)
+            if mode == 'serial':
+                products += len(store_obj.all_products(save=True, file_name=file_name, extension=EXTENSION))
+
+            elif mode == 'streaming':
+                products += store_obj.save_all_products(file_name=file_name, extension=EXTENSION)
+
+            elif mode == 'concurrent':
+                coroutine = store_obj.aall_products(
+                    concurrency=concurrency,
+                    save=True,
+                    file_name=file_name,
+                    extension=EXTENSION
+                )
+                products += len(asyncio.get_event_loop().run_until_complete(coroutine))
+
+    peak_rss = None
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss *= 1 if sys.platform == 'darwin' else 1024
+
+    return dict(
+        wall=perf_counter() - started_at,
+        first_row=first_row[0] if first_row else None,
+        products=products,
+        peak_rss=peak_rss
+    )
+
+
+def measure(server: MockServer,
+            mode: str,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            rate: float = DEFAULT_RATE) -> Dict[str, Any]:
+    """ Runs a mode on a new process and adds the server requests to its result.
+
+    Arguments:
+        server : The running mock server.
+        mode : The mode.
+        concurrency : The concurrency of the mode.
+        rate : The requests per second allowed by the rate limiter.
+
+    Returns:
+        A dictionary with the mode measures.
+    """
+
+    requests = server.stats()['requests']
+    with TemporaryDirectory() as output_path:
+        command = [
+            sys.executable, '-m', 'benchmarks.crawl', '--run', mode, '--base-url', server.url,
+            '--output', output_path, '--concurrency', str(concurrency), '--rate', str(rate)
+        ]
+        output = subprocess.run(command, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+    result = json.loads(output.strip().splitlines()[-1])
+    result['requests'] = server.stats()['requests'] - requests
+    result['requests_per_second'] = result['requests'] / result['wall']
+    result['products_per_second'] = result['products'] / result['wall']
+    return result
+
+
+def report(results: Dict[str, Dict[str, Any]],
+           thresholds: Dict[str, float]) -> List[str]:
+    """ Prints the results next to the thresholds and returns the modes below them.
+
+    Arguments:
+        results : The measures of each mode.
+        thresholds : The minimum products per second of each mode.
+
+    Returns:
+        A list with the failed modes.
+    """
+
+    failures = []
+    print(f'{"mode":<14}{"wall s":>9}{"1st row s":>11}{"req/s":>9}{"prod/s":>10}{"min":>9}{"RSS MB":>9}')
+    for mode, result in results.items():
+        threshold = thresholds.get(mode)
+        first_row = f'{result["first_row"]:.2f}' if result['first_row'] is not None else '-'
+        rss = f'{result["peak_rss"] / 2 ** 20:.0f}' if result['peak_rss'] else '-'
+        status = ''
+        if threshold and result['products_per_second'] < threshold:
+            failures.append(mode)
+            status = ' FAIL'
+
+        print(
+            f'{mode:<14}{result["wall"]:>9.2f}{first_row:>11}{result["requests_per_second"]:>9.0f}'
+            f'{result["products_per_second"]:>10.0f}{threshold or 0:>9.0f}{rss:>9}{status}'
+        )
+
+    return failures
+
+
+def main() -> None:
+    """ Parses the arguments, serves the mock catalog and runs the modes.
+
+    Returns:
+        None
+    """
+
+    args = argparse.ArgumentParser(description='Runs the end-to-end crawl benchmark.')
+    args.add_argument('--modes', default=','.join(MODES), help=f'any of {", ".join(MODES)}')
+    args.add_argument('--stores', type=int, default=2)
+    args.add_argument('--departments', type=int, default=10)
+    args.add_argument('--aisles', type=int, default=8)
+    args.add_argument('--products', type=int, default=50, help='products of each aisle')
+    args.add_argument('--latency', type=float, default=DEFAULT_LATENCY)
+    args.add_argument('--jitter', type=float, default=DEFAULT_LATENCY / 2)
+    args.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    args.add_argument('--rate', type=float, default=DEFAULT_RATE)
+    args.add_argument('--thresholds', default=THRESHOLDS_PATH)
+    args.add_argument('--save', action='store_true', help='saves a fraction of the results as the thresholds')
+    args.add_argument('--margin', type=float, default=DEFAULT_MARGIN, help='the saved fraction of the results')
+    args.add_argument('--run', help=argparse.SUPPRESS)
+    args.add_argument('--base-url', help=argparse.SUPPRESS)
+    args.add_argument('--output', help=argparse.SUPPRESS)
+    args = args.parse_args()
+
+    if args.run:
+        result = run_mode(
+            mode=args.run,
+            base_url=args.base_url,
+            output_path=args.output,
+            concurrency=args.concurrency,
+            rate=args.rate
+        )
+        print(json.dumps(result))
+        return
+
+    modes = [mode for mode in args.modes.split(',') if mode]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        raise Warning(f'The modes {", ".join(sorted(unknown))} do not exist.')
+
+    catalog = SyntheticCatalog(
+        stores=args.stores,
+        departments=args.departments,
+        aisles=args.aisles,
+        products=args.products
+    )
+    with MockServer(catalog=catalog, latency=args.latency, jitter=args.jitter, seed=0) as server:
+        print(f'{catalog.stores} stores of {catalog.products_per_store} products, {args.latency * 1000:.0f}ms latency')
+        results = {
+            mode: measure(server=server, mode=mode, concurrency=args.concurrency, rate=args.rate)
+            for mode in modes
+        }
+
+    thresholds = {}
+    if path.isfile(args.thresholds):
+        with open(args.thresholds) as thresholds_file:
+            thresholds = json.load(thresholds_file)
+
+    failures = report(results=results, thresholds=thresholds)
+    if args.save:
+        for mode, result in results.items():
+            thresholds[mode] = round(result['products_per_second'] * args.margin)
+
+        makedirs(path.dirname(args.thresholds), exist_ok=True)
+        with open(args.thresholds, 'w') as thresholds_file:
+            json.dump(thresholds, thresholds_file, indent=2, sort_keys=True)
+
+        print(f'Thresholds saved at {args.thresholds}')
+
+    elif failures:
+        print(f'Below the products per second threshold: {", ".join(failures)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
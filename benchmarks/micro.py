@@ -0,0 +1,282 @@
+"""
+benchmarks.micro
+----------------
+
+Measures the hot paths of the objects and writers on synthetic catalogs:
+the product construction, the header projection, the XLSX column widths,
+the XML elements and the serialization of every registered writer.
+
+Each case reports the items per second, the best of some runs, and the peak
+memory allocated by one run. The results can be saved as a baseline and the
+next runs are compared with it, failing when a case gets slower than the
+tolerance.
+
+The default sizes go up to a million products, which takes a while: the
+writers that save a file per item only run up to FILE_PER_ITEM_LIMIT items,
+and --repeat 1 or a shorter --sizes list gives a quicker check.
+
+Usage:
+    python -m benchmarks.micro [--sizes 1000,10000,100000,1000000] [--cases product,writer_csv] [--repeat 3]
+                               [--save] [--tolerance 0.2]
+"""
+
+import argparse
+import json
+import sys
+import tracemalloc
+import warnings
+from os import makedirs, path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from xlsxwriter import Workbook
+
+from benchmarks.compact_objects import make_info
+from cornershop_scraper.core.objects import Product
+from cornershop_scraper.core.objects.compact import CompactProduct
+from cornershop_scraper.core.objects.store import Store
+from cornershop_scraper.utils.limiter import RateLimiter
+from cornershop_scraper.utils.writer import ALLOWED_WRITERS
+from cornershop_scraper.utils.writer.base import Writer
+from cornershop_scraper.utils.writer.xlsx import XlsxWriter
+from cornershop_scraper.utils.writer.xml import XmlWriter
+
+BASELINE_PATH = path.join(path.dirname(__file__), 'baselines', 'micro.json')
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.2
+FILE_PER_ITEM_LIMIT = 5000
+DOWNLOADS = ('img', 'img_archive')
+KEYS = list(Store.DEFAULT_HEADERS.keys())
+_servers = []
+
+
+def case_product(infos: List[Dict[str, Any]], tmp_path: str) -> Callable[[], Any]:
+    return lambda: [Product(info=info, aisle='Aisle', department='Department') for info in infos]
+
+
+def case_compact_product(infos: List[Dict[str, Any]], tmp_path: str) -> Callable[[], Any]:
+    return lambda: [CompactProduct(info=info, aisle='Aisle', department='Department') for info in infos]
+
+
+def case_apply_headers(infos: List[Dict[str, Any]], tmp_path: str) -> Callable[[], Any]:
+    products = case_product(infos, tmp_path)()
+    return lambda: Writer.apply_headers(items=products, keys=KEYS)
+
+
+def case_column_width(infos: List[Dict[str, Any]], tmp_path: str) -> Callable[[], Any]:
+    rows = Writer.apply_headers(items=case_product(infos, tmp_path)(), keys=KEYS)
+    writer = XlsxWriter(tmp_path)
+    workbook = Workbook(path.join(tmp_path, 'column_width.xlsx'), {'in_memory': True})
+    worksheet = workbook.add_worksheet()
+    return lambda: writer.set_required_column_width(items=rows, worksheet=worksheet, keys=KEYS)
+
+
+def case_xml_elements(infos: List[Dict[str, Any]], tmp_path: str) -> Callable[[], Any]:
+    products = case_product(infos, tmp_path)()
+    writer = XmlWriter(tmp_path)
+    return lambda: writer.get_elements(items=products, headers=Store.DEFAULT_HEADERS)
+
+
+def make_writer_case(extension: str) -> Callable[[List[Dict[str, Any]], str], Optional[Callable[[], Any]]]:
+    """ Returns the case that saves the products with a registered writer.
+
+    Arguments:
+        extension : The writer extension.
+
+    Returns:
+        A case function.
+    """
+
+    def case(infos: List[Dict[str, Any]], tmp_path: str) -> Optional[Callable[[], Any]]:
+        writer_class = ALLOWED_WRITERS[extension]
+        if (writer_class.MULTIPLE_FILES or extension in DOWNLOADS) and len(infos) > FILE_PER_ITEM_LIMIT:
+            return None
+
+        products = case_product(infos, tmp_path)()
+        if extension in DOWNLOADS:
+            return _image_case(products=products, tmp_path=tmp_path, extension=extension)
+
+        try:
+            writer = writer_class(tmp_path)
+
+        except ImportError:
+            return None
+
+        return lambda: writer.save_items(items=products, file_name='products', headers=Store.DEFAULT_HEADERS)
+
+    return case
+
+
+def _image_case(products: List[Product], tmp_path: str, extension: str = 'img') -> Callable[[], Any]:
+    """ Returns an image case, downloading from a local mock server shared by the runs.
+
+    Arguments:
+        products : The products.
+        tmp_path : The output directory.
+        extension : The image writer extension.
+
+    Returns:
+        The case callable.
+    """
+
+    from cornershop_scraper.mock import MockServer
+
+    if not _servers:
+        _servers.append(MockServer().start())
+
+    server = _servers[0]
+    for product in products:
+        product.img_url = f'{server.url}/img/{product.id}.jpg'
+
+    writer = ALLOWED_WRITERS[extension](tmp_path, rate_limiter=RateLimiter(rate=1e6, burst=1000))
+    return lambda: writer.save_items(items=products, file_name='products', force_new_file=True)
+
+
+CASES = {
+    'product': case_product,
+    'compact_product': case_compact_product,
+    'apply_headers': case_apply_headers,
+    'column_width': case_column_width,
+    'xml_elements': case_xml_elements,
+    **{f'writer_{extension}': make_writer_case(extension) for extension in sorted(ALLOWED_WRITERS)},
+}
+
+
+def measure(run: Callable[[], Any],
+            size: int,
+            repeat: int = DEFAULT_REPEAT) -> Dict[str, float]:
+    """ Measures the throughput and the peak memory of a case.
+
+    Arguments:
+        run : The case callable.
+        size : The number of items processed by each run.
+        repeat : The number of timed runs, the best one is kept.
+
+    Returns:
+        A dictionary with the items per second and the peak memory in bytes.
+    """
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        run()
+        best = min(best, perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return dict(rate=size / best, peak=peak)
+
+
+def run_cases(sizes: List[int],
+              names: List[str],
+              repeat: int = DEFAULT_REPEAT) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """ Runs the cases on each catalog size.
+
+    Arguments:
+        sizes : The numbers of products.
+        names : The case names.
+        repeat : The number of timed runs of each case.
+
+    Returns:
+        A dictionary mapping each case and size to its measures.
+    """
+
+    results = {}
+    for size in sizes:
+        infos = [make_info(index) for index in range(size)]
+        for name in names:
+            with TemporaryDirectory() as tmp_path:
+                run = CASES[name](infos, tmp_path)
+                if run is None:
+                    continue
+
+                results.setdefault(name, {})[str(size)] = measure(run=run, size=size, repeat=repeat)
+
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Dict[str, float]]],
+            baseline: Dict[str, Dict[str, Dict[str, float]]],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """ Prints the results next to the baseline and returns the regressions.
+
+    Arguments:
+        results : The current measures.
+        baseline : The saved measures.
+        tolerance : The accepted slowdown fraction.
+
+    Returns:
+        A list with the name and size of the cases slower than the tolerance.
+    """
+
+    regressions = []
+    print(f'{"case":<20}{"size":>10}{"items/s":>14}{"peak MB":>10}{"vs base":>10}')
+    for name, sizes in results.items():
+        for size, result in sizes.items():
+            base = baseline.get(name, {}).get(size)
+            change = ''
+            if base:
+                ratio = result['rate'] / base['rate']
+                change = f'{ratio - 1:+.0%}'
+                if ratio < 1 - tolerance:
+                    regressions.append(f'{name}[{size}]')
+                    change += ' !'
+
+            print(f'{name:<20}{size:>10}{result["rate"]:>14,.0f}{result["peak"] / 2 ** 20:>10.1f}{change:>10}')
+
+    return regressions
+
+
+def main() -> None:
+    """ Parses the arguments, runs the cases and compares or saves the baseline.
+
+    Returns:
+        None
+    """
+
+    args = argparse.ArgumentParser(description='Runs the micro benchmarks.')
+    args.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES))
+    args.add_argument('--cases', default=','.join(CASES), help=f'any of {", ".join(CASES)}')
+    args.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    args.add_argument('--baseline', default=BASELINE_PATH)
+    args.add_argument('--save', action='store_true', help='saves the results as the baseline')
+    args.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = args.parse_args()
+
+    warnings.filterwarnings('ignore', message='Ignoring URL', module='xlsxwriter')
+    sizes = [int(size) for size in args.sizes.split(',')]
+    names = [name for name in args.cases.split(',') if name]
+    unknown = set(names) - set(CASES)
+    if unknown:
+        raise Warning(f'The cases {", ".join(sorted(unknown))} do not exist.')
+
+    results = run_cases(sizes=sizes, names=names, repeat=args.repeat)
+
+    baseline = {}
+    if path.isfile(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    regressions = compare(results=results, baseline=baseline, tolerance=args.tolerance)
+    if args.save:
+        for name, sizes in results.items():
+            baseline.setdefault(name, {}).update(sizes)
+
+        makedirs(path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+
+        print(f'Baseline saved at {args.baseline}')
+
+    elif regressions:
+        print(f'Regressions over {args.tolerance:.0%}: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,11 @@
 """
 cornershop_scraper.core
 -----------------------
+
+The API base URL can be overridden with the CORNERSHOP_URL environment
+variable, as to use a local mock server.
 """
 
-CornershopURL = 'https://cornershopapp.com'
+from os import environ
+
+CornershopURL = environ.get('CORNERSHOP_URL', 'https://cornershopapp.com').rstrip('/')
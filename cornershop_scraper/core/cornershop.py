@@ -6,11 +6,22 @@ This module implements a interface to use the Cornershop class to search
 for stores and products on a region.
 """
 
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
 
 from cornershop_scraper.core import CornershopURL
 from cornershop_scraper.core.objects.store import Store
-from cornershop_scraper.utils.token import get_local_session
+from cornershop_scraper.utils.checkpoint import CheckpointJournal
+from cornershop_scraper.utils.executor import RequestExecutor
+from cornershop_scraper.utils.image_store import ImageStore
+from cornershop_scraper.utils.limiter import RateLimiter
+from cornershop_scraper.utils.metrics import Metrics
+from cornershop_scraper.utils.response_cache import ResponseCache
+from cornershop_scraper.utils.session_cache import SessionCache
+from cornershop_scraper.utils.token import get_local_session, CloudScraper, SessionPool
+from cornershop_scraper.utils.writer import parser
+from cornershop_scraper.utils.writer.img import ImageWriter
 
 
 class Cornershop:
@@ -19,29 +30,74 @@ class Cornershop:
     def __init__(self, address: str,
                  country: str = 'BR',
                  language: str = 'pt-br',
-                 file_path: str = ''):
+                 file_path: str = '',
+                 rate_limiter: RateLimiter = None,
+                 session_cache: SessionCache = None,
+                 response_cache: ResponseCache = None,
+                 base_url: str = None,
+                 metrics: Metrics = None,
+                 executor: RequestExecutor = None,
+                 image_workers: int = 1,
+                 image_store: ImageStore = None,
+                 image_rate_limiter: RateLimiter = None):
         """ Initialize a Cornershop instance.
 
         Arguments:
             address : The local address.
             country : The country.
             language: The language.
+            file_path : The file path.
+            rate_limiter : The rate limiter shared with the created stores.
+            session_cache : The cache used to reuse the local sessions.
+            response_cache : The cache of the API responses shared with the created stores.
+            base_url : The API base URL shared with the created stores, defaults to CornershopURL.
+            metrics : The collector of the requests and crawl phases metrics, shared with the created stores.
+            executor : The executor of the API requests shared with the created stores, so they share its circuit
+                breakers and concurrency limits. When given its rate limiter, response cache and metrics are used
+                by default.
+            image_workers : The images downloaded at once by the created stores.
+            image_store : The content-addressed store of the images shared with the created stores.
+            image_rate_limiter : The rate limiter of the image downloads shared with the created stores, defaults
+                to one whose rate grows with the image workers, see ImageWriter.make_rate_limiter.
 
         Returns:
             None
         """
 
+        if executor:
+            rate_limiter = rate_limiter or executor.rate_limiter
+            response_cache = response_cache or executor.response_cache
+            metrics = metrics or executor.metrics
+
         self.file_path = file_path
+        self.base_url = (base_url or CornershopURL).rstrip('/')
         self._address = address
         self._country = country
         self._language = language
-        self._session = get_local_session(
-            address=self._address,
-            country=self._country,
-            language=self._language
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.session_cache = session_cache
+        self.response_cache = response_cache
+        self.metrics = metrics or Metrics()
+        self.image_workers = image_workers
+        self.image_store = image_store
+        self.image_rate_limiter = image_rate_limiter or ImageWriter.make_rate_limiter(workers=image_workers)
+        self.executor = executor or RequestExecutor(
+            rate_limiter=self.rate_limiter,
+            response_cache=self.response_cache,
+            metrics=self.metrics
         )
+        with self.metrics.span('handshake', address=address):
+            self._session = get_local_session(
+                address=self._address,
+                country=self._country,
+                language=self._language,
+                rate_limiter=self.rate_limiter,
+                cache=self.session_cache,
+                base_url=self.base_url
+            )
 
-        self._stores = self._get_stores()
+        with self.metrics.span('branch_groups', address=address):
+            self._stores = self._get_stores()
 
     @property
     def stores(self) -> List[dict]:
@@ -54,17 +110,19 @@ class Cornershop:
             A dictionary containing all the information about the countries that Cornershop are available.
         """
 
-        url = CornershopURL + '/api/v1/countries'
-        req = self._session.get(url=url)
+        url = self.base_url + '/api/v1/countries'
+        req = self._get(url=url)
         return req.json()
 
     def create_store(self, business_id: int,
-                     file_path: str = '') -> Store:
+                     file_path: str = '',
+                     session: CloudScraper = None) -> Store:
         """ Returns a Store object given the business ID and the location.
 
         Arguments:
             business_id : The business ID.
             file_path : The file path.
+            session : The session used by the store, defaults to the Cornershop session.
 
         Return:
             A store instance.
@@ -73,25 +131,183 @@ class Cornershop:
         if not file_path:
             file_path = self.file_path
 
+        if not session:
+            session = self._session
+
         return Store(
             business_id=business_id,
             address=self._address,
             country=self._country,
             language=self._language,
             file_path=file_path,
-            session=self._session
+            session=session,
+            rate_limiter=self.rate_limiter,
+            response_cache=self.response_cache,
+            base_url=self.base_url,
+            metrics=self.metrics,
+            executor=self.executor,
+            image_workers=self.image_workers,
+            image_store=self.image_store,
+            image_rate_limiter=self.image_rate_limiter
         )
 
-    def extract_all(self) -> None:
-        """ Saves all products from all the stores.
+    def extract_all(self, workers: int = 1,
+                    headers: dict = None,
+                    extension: str = 'xlsx',
+                    save_img: bool = False,
+                    img_path: str = '',
+                    session_pool: SessionPool = None,
+                    checkpoint: CheckpointJournal = None) -> List[Dict[str, Any]]:
+        """ Saves all products from all the stores, each store on its own file.
+
+        With more than one worker the stores are extracted on a thread pool and every
+        worker creates its own local session, or borrows one from the session pool, so
+        the locality takes about the time of its slowest store. A failing store does not
+        stop the others.
+
+        With a checkpoint journal the stores and aisles completed on a previous call are
+        skipped, so calling it again resumes a failed extraction. Once every store is saved
+        the journal entries of the stores are removed, so the next extraction starts over.
+
+        Arguments:
+            workers : The number of stores extracted at the same time.
+            headers : The headers that will be used to change the name of the fields and which of them will be saved.
+            extension : The writer extension.
+            save_img : If true saves all the products images.
+            img_path : The image path.
+            session_pool : The pool that lends the sessions to the workers.
+            checkpoint : The journal of the completed stores and aisles, it requires an appendable writer.
 
         Returns:
-            None
+            A list with the result of each store, containing its file name, number of products and error.
+        """
+
+        if checkpoint and not parser(extension, Store.DEFAULT_WRITER).APPENDABLE:
+            raise Warning(f'The {extension} writer can not resume an extraction, use an appendable writer.')
+
+        kwargs = dict(
+            headers=headers,
+            extension=extension,
+            save_img=save_img,
+            img_path=img_path,
+            session_pool=session_pool,
+            checkpoint=checkpoint
+        )
+
+        if workers <= 1:
+            results = [self._extract_store(store=store, new_session=False, **kwargs) for store in self.stores]
+
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(self._extract_store, store=store, new_session=True, **kwargs)
+                    for store in self.stores
+                ]
+                results = [future.result() for future in futures]
+
+        if checkpoint and not any(result['error'] for result in results):
+            for result in results:
+                checkpoint.clear(store=result['business_id'], file_name=result['file_name'])
+
+        return results
+
+    def _extract_store(self, store: dict,
+                       new_session: bool = False,
+                       session_pool: SessionPool = None,
+                       checkpoint: CheckpointJournal = None,
+                       **kwargs) -> Dict[str, Any]:
+        """ Saves all products of a store and reports the result.
+
+        Arguments:
+            store : The store data.
+            new_session : If true creates a local session for the store.
+            session_pool : The pool that lends the session of the store.
+            checkpoint : The journal of the completed stores and aisles.
+            kwargs : Extra arguments for Store.all_products.
+
+        Returns:
+            A dictionary with the store result.
+        """
+
+        file_name = self.get_store_file_name(store=store)
+        result = dict(business_id=store['business_id'], name=store['name'], file_name=file_name, products=0, error=None)
+        if checkpoint and checkpoint.is_store_completed(store=store['business_id'], file_name=file_name):
+            result['products'] = checkpoint.products(store=store['business_id'], file_name=file_name)
+            return result
+
+        try:
+            with self._store_session(new_session=new_session, session_pool=session_pool) as session:
+                store_obj = self.create_store(store['business_id'], session=session)
+                products = store_obj.all_products(save=True, file_name=file_name, checkpoint=checkpoint, **kwargs)
+                result['products'] = len(products)
+                if checkpoint:
+                    result['products'] = checkpoint.products(store=store['business_id'], file_name=file_name)
+
+        except Exception as error:
+            result['error'] = repr(error)
+
+        return result
+
+    @contextmanager
+    def _store_session(self, new_session: bool = False,
+                       session_pool: SessionPool = None) -> Iterator[CloudScraper]:
+        """ Provides the session used to extract a store.
+
+        Arguments:
+            new_session : If true creates a local session.
+            session_pool : The pool that lends the session.
+
+        Returns:
+            A cloudscraper session.
+        """
+
+        if session_pool:
+            with session_pool.session(address=self._address, country=self._country, language=self._language) as sess:
+                yield sess
+
+        elif new_session:
+            with self.metrics.span('handshake', address=self._address):
+                session = get_local_session(
+                    address=self._address,
+                    country=self._country,
+                    language=self._language,
+                    rate_limiter=self.rate_limiter,
+                    cache=self.session_cache,
+                    base_url=self.base_url
+                )
+
+            yield session
+
+        else:
+            yield self._session
+
+    @staticmethod
+    def get_store_file_name(store: dict) -> str:
+        """ Returns the output file name of a store.
+
+        Arguments:
+            store : The store data.
+
+        Returns:
+            The file name.
+        """
+
+        name = ''.join(char if char.isalnum() else '_' for char in store['name'])
+        return f'{store["business_id"]}_{name}'
+
+    def _get(self, url: str, **kwargs) -> Any:
+        """ Makes a GET request through the request executor.
+
+        Arguments:
+            url : The request URL.
+            kwargs : Extra arguments for the session request.
+
+        Returns:
+            The response.
         """
 
-        for store in self.stores:
-            store_obj = self.create_store(store['business_id'])
-            store_obj.all_products(save=True)
+        locality = f'{self._address}|{self._country}|{self._language}'
+        return self.executor.get(self._session, url=url, locality=locality, **kwargs)
 
     def _get_stores(self) -> List[dict]:
         """ Get all stores near the given location.
@@ -100,9 +316,9 @@ class Cornershop:
             A list of stores on the location.
         """
 
-        url = CornershopURL + '/api/v3/branch_groups'
+        url = self.base_url + '/api/v3/branch_groups'
         params = {'locality': self._address, 'country': self._country}
-        req = self._session.get(url=url, params=params)
+        req = self._get(url=url, params=params)
         json = req.json()
 
         stores = []
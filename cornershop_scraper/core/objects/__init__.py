@@ -6,6 +6,7 @@ Imports some useful objects.
 """
 
 from .product import Product
+from .product_index import ProductIndex
 from .offer import Offer
 from .aisle import Aisle
 from .department import Department
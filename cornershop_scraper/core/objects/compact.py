@@ -0,0 +1,175 @@
+"""
+cornershop_scraper.core.objects.compact
+---------------------------------------
+
+Provides compact versions of the objects retrieved from the front-end API.
+They keep the same field names but store them in __slots__ instead of a
+per-instance __dict__, which reduces the memory used by large catalogs.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from .product import set_product_fields
+
+
+class CompactObject:
+    """ Base class of the compact objects with explicit field access. """
+
+    __slots__ = ()
+
+    def get(self, field: str,
+            default: Any = None) -> Any:
+        """ Returns the value of a field.
+
+        Arguments:
+            field : The field name.
+            default : The value returned if the field is not set.
+
+        Returns:
+            The field value.
+        """
+
+        return getattr(self, field, default)
+
+    def fields(self) -> List[str]:
+        """ Returns the name of the fields that are set.
+
+        Returns:
+            A list of field names.
+        """
+
+        return [field for field in self.__slots__ if hasattr(self, field)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ Returns a dictionary with the fields that are set.
+
+        Returns:
+            A dictionary of fields and values.
+        """
+
+        return {field: getattr(self, field) for field in self.fields()}
+
+    def to_tuple(self, fields: List[str]) -> Tuple[Any, ...]:
+        """ Returns the values of the given fields.
+
+        Arguments:
+            fields : The field names.
+
+        Returns:
+            A tuple of values.
+        """
+
+        return tuple(getattr(self, field, None) for field in fields)
+
+
+class CompactProduct(CompactObject):
+    """ A compact product object. """
+
+    __slots__ = (
+        'aisle', 'department', 'brand_name', 'brand_id', 'buy_unit', 'currency', 'default_buy_unit',
+        'description', 'img_url', 'nutritional_info', 'regulatory_fees', 'related_to', 'unit_conversion_rate',
+        'id', 'kind', 'name', 'label', 'package', 'original_price', 'price', 'price_per_unit', 'purchasable',
+        'variable_weight', 'availability_status', 'aisles', 'departments'
+    )
+
+    def __init__(self, info: dict,
+                 aisle: str = None,
+                 department: str = None):
+        """ Initialize a CompactProduct instance.
+
+        Arguments:
+            info : The retrieved data.
+            aisle : Product aisle.
+            department : Product department.
+
+        Returns:
+            None
+        """
+
+        set_product_fields(product=self, info=info, aisle=aisle, department=department)
+
+    def __repr__(self):
+        return f'{self.name} at {self.price} {self.currency}'
+
+
+class CompactAisle(CompactObject):
+    """ A compact department aisle object. """
+
+    __slots__ = ('name', 'id', 'img_url', 'department_id')
+
+    def __init__(self, info: dict,
+                 department_id: str):
+        """ Initialize a CompactAisle instance.
+
+        Arguments:
+            info : The retrieved data.
+            department_id : The department ID.
+        """
+
+        self.name = info['name']
+        self.id = info['id']
+        self.img_url = info['img_url']
+        self.department_id = department_id
+
+    def __repr__(self):
+        return f'[{self.id}] {self.name}'
+
+
+class CompactDepartment(CompactObject):
+    """ A compact store department object. """
+
+    __slots__ = ('name', 'id', 'img_url', 'aisles')
+
+    def __init__(self, info: dict):
+        """ Initialize a CompactDepartment instance.
+
+        Arguments:
+            info : The retrieved data.
+
+        Returns:
+            None
+        """
+
+        self.name = info['name']
+        self.id = info['id']
+        self.img_url = info['img_url']
+        self.aisles = [
+            CompactAisle(info=aisle, department_id=self.id)
+            for aisle in info['aisles']
+        ]
+
+    def number_of_aisles(self):
+        """ Returns the number of aisles in the department.
+
+        Returns:
+            The number of aisles.
+        """
+        return len(self.aisles)
+
+    def __repr__(self):
+        return f'[{self.id}] {self.name}'
+
+
+class CompactOffer(CompactObject):
+    """ A compact offer object. """
+
+    __slots__ = ('background_color', 'caption', 'id', 'image', 'is_light', 'priority', 'url', 'valid_until')
+
+    def __init__(self, info: dict):
+        """ Initialize a CompactOffer instance.
+
+        Arguments:
+            info : The retrieved data.
+        """
+
+        self.background_color = info['background_color']
+        self.caption = info['caption']
+        self.id = info['id']
+        self.image = info['imageset']['1x']
+        self.is_light = info['is_light']
+        self.priority = info['priority']
+        self.url = info['url']
+        self.valid_until = info['valid_until']
+
+    def __repr__(self):
+        return self.caption
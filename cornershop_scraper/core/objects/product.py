@@ -6,6 +6,50 @@ Provides a base class to maintain product data retrieved from the
 front-end API of the website.
 """
 
+from typing import Any
+
+
+def set_product_fields(product: Any,
+                       info: dict,
+                       aisle: str = None,
+                       department: str = None) -> None:
+    """ Sets the product fields parsed from the retrieved data, shared by Product and CompactProduct.
+
+    Arguments:
+        product : The product instance.
+        info : The retrieved data.
+        aisle : Product aisle.
+        department : Product department.
+
+    Returns:
+        None
+    """
+
+    product.aisle = aisle
+    product.department = department
+    product.brand_name = info['brand'].get('name') if info['brand'] else ''
+    product.brand_id = info['brand'].get('id') if info['brand'] else ''
+    product.buy_unit = info['buy_unit']
+    product.currency = info['currency']
+    product.default_buy_unit = info['default_buy_unit']
+    product.description = info['description']
+    product.img_url = info['img_url']
+    product.nutritional_info = info['nutritional_info']
+    product.regulatory_fees = info['regulatory_fees']
+    product.related_to = info['related_to']
+    product.unit_conversion_rate = info['unit_conversion_rate']
+    product.id = info['id']
+    product.kind = info['kind']
+    product.name = info['name']
+    product.label = info['label']
+    product.package = info['package']
+    product.original_price = info['original_price']
+    product.price = info['price']
+    product.price_per_unit = info['price_per_unit']
+    product.purchasable = info['purchasable']
+    product.variable_weight = info['variable_weight']
+    product.availability_status = info['availability_status']
+
 
 class Product:
     """ A product object. """
@@ -24,30 +68,7 @@ class Product:
             None
         """
 
-        self.aisle = aisle
-        self.department = department
-        self.brand_name = info['brand'].get('name') if info['brand'] else ''
-        self.brand_id = info['brand'].get('id') if info['brand'] else ''
-        self.buy_unit = info['buy_unit']
-        self.currency = info['currency']
-        self.default_buy_unit = info['default_buy_unit']
-        self.description = info['description']
-        self.img_url = info['img_url']
-        self.nutritional_info = info['nutritional_info']
-        self.regulatory_fees = info['regulatory_fees']
-        self.related_to = info['related_to']
-        self.unit_conversion_rate = info['unit_conversion_rate']
-        self.id = info['id']
-        self.kind = info['kind']
-        self.name = info['name']
-        self.label = info['label']
-        self.package = info['package']
-        self.original_price = info['original_price']
-        self.price = info['price']
-        self.price_per_unit = info['price_per_unit']
-        self.purchasable = info['purchasable']
-        self.variable_weight = info['variable_weight']
-        self.availability_status = info['availability_status']
+        set_product_fields(product=self, info=info, aisle=aisle, department=department)
 
     def __repr__(self):
         return f'{self.name} at {self.price} {self.currency}'
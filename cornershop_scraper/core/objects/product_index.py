@@ -0,0 +1,79 @@
+"""
+cornershop_scraper.core.objects.product_index
+---------------------------------------------
+
+Provides an index to keep each product once while crawling a store, as the
+same product is listed on many aisles.
+"""
+
+from typing import List
+
+from .product import Product
+
+
+class ProductIndex:
+    """ An index of products by ID that removes the duplicated products. """
+
+    def __init__(self):
+        """ Initialize a ProductIndex instance.
+
+        Returns:
+            None
+        """
+
+        self.duplicates = 0
+        self._products = {}
+
+    def add(self, product: Product) -> bool:
+        """ Adds a product to the index.
+
+        The first appearance of a product is kept and receives the aisles and
+        departments lists, where the next appearances are recorded.
+
+        Arguments:
+            product : The product.
+
+        Returns:
+            True if it is the first appearance of the product.
+        """
+
+        indexed = self._products.get(product.id)
+        if indexed is None:
+            product.aisles = [product.aisle]
+            product.departments = [product.department]
+            self._products[product.id] = product
+            return True
+
+        self.duplicates += 1
+        if product.aisle not in indexed.aisles:
+            indexed.aisles.append(product.aisle)
+
+        if product.department not in indexed.departments:
+            indexed.departments.append(product.department)
+
+        return False
+
+    def extend(self, products: List[Product]) -> List[Product]:
+        """ Adds many products to the index.
+
+        Arguments:
+            products : The products.
+
+        Returns:
+            The products that were not on the index yet.
+        """
+
+        return [product for product in products if self.add(product)]
+
+    @property
+    def products(self) -> List[Product]:
+        return list(self._products.values())
+
+    def __contains__(self, product_id):
+        return product_id in self._products
+
+    def __len__(self):
+        return len(self._products)
+
+    def __repr__(self):
+        return f'{len(self)} products, {self.duplicates} duplicates removed'
@@ -0,0 +1,383 @@
+"""
+cornershop_scraper.core.objects.product_table
+---------------------------------------------
+
+Provides a column-oriented table of products built straight from the
+front-end API data. The numeric fields are stored in NumPy arrays and the
+repeated text fields are dictionary encoded, so filters, sorts and
+aggregations over whole catalogs run vectorized.
+
+It requires the optional numpy dependency.
+"""
+
+from typing import Any, Dict, Iterator, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Categories:
+    """ A dictionary encoding of the values of a categorical column. """
+
+    def __init__(self, values: List[Any] = None):
+        """ Initialize a Categories instance.
+
+        Arguments:
+            values : The initial values, in code order.
+
+        Returns:
+            None
+        """
+
+        self.values = list(values or [])
+        self._codes = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value: Any) -> int:
+        """ Returns the code of a value, adding it if it is new.
+
+        Arguments:
+            value : The value.
+
+        Returns:
+            The value code.
+        """
+
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+
+        return code
+
+    def code(self, value: Any) -> int:
+        """ Returns the code of a value or -1 if it is unknown.
+
+        Arguments:
+            value : The value.
+
+        Returns:
+            The value code.
+        """
+
+        return self._codes.get(value, -1)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class ProductTable:
+    """ A column-oriented table of products. """
+
+    NUMERIC_FIELDS = {
+        'id': 'int64',
+        'brand_id': 'int64',
+        'price': 'float64',
+        'original_price': 'float64',
+        'unit_conversion_rate': 'float64',
+        'purchasable': 'bool',
+    }
+    CATEGORICAL_FIELDS = ('brand_name', 'aisle', 'department', 'currency', 'availability_status')
+    TEXT_FIELDS = ('name', 'package', 'img_url')
+    MISSING_VALUES = {'int64': -1, 'float64': float('nan'), 'bool': False}
+
+    def __init__(self, columns: Dict[str, Any] = None,
+                 categories: Dict[str, Categories] = None):
+        """ Initialize a ProductTable instance.
+
+        Arguments:
+            columns : The columns arrays, the categorical ones holding the codes.
+            categories : The encoding of each categorical column.
+
+        Returns:
+            None
+        """
+
+        if np is None:
+            raise ImportError('The ProductTable requires numpy, install it with "pip install numpy".')
+
+        self.categories = categories or {field: Categories() for field in self.CATEGORICAL_FIELDS}
+        self._chunks = [columns] if columns else []
+        self._columns = None
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.NUMERIC_FIELDS) + list(self.CATEGORICAL_FIELDS) + list(self.TEXT_FIELDS)
+
+    @property
+    def columns(self) -> Dict[str, Any]:
+        """ Returns the columns, joining the chunks added since the last access.
+
+        Returns:
+            A dictionary mapping each field to its array.
+        """
+
+        if self._columns is None or len(self._chunks) > 1:
+            if not self._chunks:
+                self._chunks = [self._empty_columns()]
+
+            self._columns = {
+                field: np.concatenate([chunk[field] for chunk in self._chunks])
+                for field in self.fields
+            }
+            self._chunks = [self._columns]
+
+        return self._columns
+
+    def extend(self, json: List[Dict[str, Any]],
+               aisle: str = None,
+               department: str = None) -> int:
+        """ Adds the products of an aisle response to the table.
+
+        Arguments:
+            json : The list of products retrieved from the API.
+            aisle : The aisle name, if not given it is read from each product.
+            department : The department name, if not given it is read from each product.
+
+        Returns:
+            The number of added products.
+        """
+
+        size = len(json)
+        if not size:
+            return 0
+
+        chunk = {}
+        for field, dtype in self.NUMERIC_FIELDS.items():
+            missing = self.MISSING_VALUES[dtype]
+            values = (self._read(info, field) for info in json)
+            values = (missing if value is None or value == '' else value for value in values)
+            chunk[field] = np.fromiter(values, dtype=dtype, count=size)
+
+        constants = dict(aisle=aisle, department=department)
+        for field in self.CATEGORICAL_FIELDS:
+            encode = self.categories[field].encode
+            if constants.get(field) is not None:
+                chunk[field] = np.full(size, encode(constants[field]), dtype='int32')
+
+            else:
+                values = (encode(self._read(info, field)) for info in json)
+                chunk[field] = np.fromiter(values, dtype='int32', count=size)
+
+        for field in self.TEXT_FIELDS:
+            chunk[field] = np.array([info[field] for info in json], dtype=object)
+
+        self._chunks.append(chunk)
+        return size
+
+    @classmethod
+    def from_products(cls, products: List[Any]) -> 'ProductTable':
+        """ Returns a table built from Product objects or its dictionaries.
+
+        Arguments:
+            products : The products.
+
+        Returns:
+            A product table.
+        """
+
+        table = cls()
+        json = [
+            product if isinstance(product, dict) else {field: getattr(product, field, None) for field in table.fields}
+            for product in products
+        ]
+        table.extend(json=json)
+        return table
+
+    def column(self, field: str) -> Any:
+        """ Returns the array of a field. The categorical fields return its codes.
+
+        Arguments:
+            field : The field name.
+
+        Returns:
+            The column array.
+        """
+
+        return self.columns[field]
+
+    def values(self, field: str) -> Any:
+        """ Returns the decoded values of a field.
+
+        Arguments:
+            field : The field name.
+
+        Returns:
+            The column values.
+        """
+
+        column = self.columns[field]
+        if field in self.CATEGORICAL_FIELDS:
+            return np.array(self.categories[field].values, dtype=object)[column]
+
+        return column
+
+    def mask(self, **conditions: Any) -> Any:
+        """ Returns a boolean mask of the rows that are equal to all the conditions.
+
+        Arguments:
+            conditions : The field names and values, the categorical ones compared by its codes.
+
+        Returns:
+            A boolean array.
+        """
+
+        mask = np.ones(len(self), dtype=bool)
+        for field, value in conditions.items():
+            if field in self.CATEGORICAL_FIELDS:
+                value = self.categories[field].code(value)
+
+            mask &= self.columns[field] == value
+
+        return mask
+
+    def filter(self, mask: Any = None,
+               **conditions: Any) -> 'ProductTable':
+        """ Returns a table with the selected rows.
+
+        Arguments:
+            mask : A boolean array or an array of indexes.
+            conditions : The field names and values the rows must be equal to.
+
+        Returns:
+            A product table sharing the categories of this table.
+        """
+
+        if mask is None:
+            mask = self.mask(**conditions)
+
+        elif conditions:
+            mask = mask & self.mask(**conditions)
+
+        columns = {field: column[mask] for field, column in self.columns.items()}
+        return ProductTable(columns=columns, categories=self.categories)
+
+    def sort(self, by: str,
+             descending: bool = False) -> 'ProductTable':
+        """ Returns a table sorted by a field. The categorical fields are sorted by its values.
+
+        Arguments:
+            by : The field name.
+            descending : If true sorts from the greatest value.
+
+        Returns:
+            A product table sharing the categories of this table.
+        """
+
+        keys = self.values(by) if by in self.CATEGORICAL_FIELDS else self.columns[by]
+        order = np.argsort(keys, kind='stable')
+        if descending:
+            order = order[::-1]
+
+        return self.filter(mask=order)
+
+    def aggregate(self, by: str,
+                  field: str = 'price',
+                  func: str = 'mean') -> Dict[Any, float]:
+        """ Returns an aggregation of a numeric field grouped by a categorical field.
+
+        Arguments:
+            by : The categorical field name.
+            field : The numeric field name.
+            func : One of count, sum, mean, min and max. The missing values are ignored.
+
+        Returns:
+            A dictionary mapping each group value to its aggregation.
+        """
+
+        codes = self.columns[by]
+        values = self.columns[field].astype('float64')
+        valid = ~np.isnan(values)
+        codes, values = codes[valid], values[valid]
+        groups = len(self.categories[by])
+
+        counts = np.bincount(codes, minlength=groups)
+        if func == 'count':
+            result = counts.astype('float64')
+
+        elif func in ('sum', 'mean'):
+            result = np.bincount(codes, weights=values, minlength=groups)
+            if func == 'mean':
+                result = np.divide(result, counts, out=np.full(groups, np.nan), where=counts > 0)
+
+        elif func in ('min', 'max'):
+            ufunc = np.minimum if func == 'min' else np.maximum
+            result = np.full(groups, np.inf if func == 'min' else -np.inf)
+            ufunc.at(result, codes, values)
+
+        else:
+            raise Warning(f'The aggregation {func} is not supported.')
+
+        return {
+            self.categories[by].values[code]: float(result[code])
+            for code in range(groups) if counts[code]
+        }
+
+    def to_dicts(self, fields: List[str] = None) -> List[Dict[str, Any]]:
+        """ Returns the rows as dictionaries, which can be saved by any writer.
+
+        Arguments:
+            fields : The fields to export, defaults to all of them.
+
+        Returns:
+            A list of dictionaries.
+        """
+
+        fields = fields or self.fields
+        columns = [self.values(field).tolist() for field in fields]
+        return [dict(zip(fields, row)) for row in zip(*columns)]
+
+    def iter_batches(self, fields: List[str] = None,
+                     batch_size: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+        """ Yields the rows as lists of dictionaries, to be given to Writer.save_batches.
+
+        Arguments:
+            fields : The fields to export, defaults to all of them.
+            batch_size : The number of rows of each batch.
+
+        Returns:
+            An iterator of lists of dictionaries.
+        """
+
+        for start in range(0, len(self), batch_size):
+            yield self.filter(mask=slice(start, start + batch_size)).to_dicts(fields=fields)
+
+    def _empty_columns(self) -> Dict[str, Any]:
+        """ Returns the columns of an empty table.
+
+        Returns:
+            A dictionary mapping each field to an empty array.
+        """
+
+        columns = {field: np.empty(0, dtype=dtype) for field, dtype in self.NUMERIC_FIELDS.items()}
+        columns.update({field: np.empty(0, dtype='int32') for field in self.CATEGORICAL_FIELDS})
+        columns.update({field: np.empty(0, dtype=object) for field in self.TEXT_FIELDS})
+        return columns
+
+    @staticmethod
+    def _read(info: Dict[str, Any], field: str) -> Any:
+        """ Returns a field of the API data, reading the brand fields from its object.
+
+        Arguments:
+            info : The product data.
+            field : The field name.
+
+        Returns:
+            The field value.
+        """
+
+        if field in ('brand_name', 'brand_id') and 'brand' in info:
+            brand = info['brand'] or {}
+            return brand.get(field[len('brand_'):])
+
+        return info.get(field)
+
+    def __len__(self):
+        if not self._chunks:
+            return 0
+
+        return sum(len(chunk['id']) for chunk in self._chunks)
+
+    def __repr__(self):
+        return f'ProductTable with {len(self)} products'
@@ -6,20 +6,35 @@ This module provides a Cornershop Store object to manage and retrieve
 data about the store and its products.
 """
 
-from time import sleep
-from typing import List, Union, Dict, Any
-
-from cornershop_scraper.core.objects import Department, Product, Aisle, Offer
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import local
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from cornershop_scraper.core.objects import Department, Product, ProductIndex, Aisle, Offer
+from cornershop_scraper.core.objects.compact import CompactDepartment, CompactOffer, CompactProduct
+from cornershop_scraper.core.objects.product_table import ProductTable
 from cornershop_scraper.core import CornershopURL
-from cornershop_scraper.utils.writer import parser, ALLOWED_WRITERS
-from cornershop_scraper.utils.token import get_local_session, CloudScraper
+from cornershop_scraper.utils.writer import parser, Writer
+from cornershop_scraper.utils.writer.img import ImageWriter
+from cornershop_scraper.utils.checkpoint import CheckpointJournal
+from cornershop_scraper.utils.crawl_state import CrawlState
+from cornershop_scraper.utils.executor import RequestExecutor
+from cornershop_scraper.utils.image_store import ImageStore
+from cornershop_scraper.utils.limiter import RateLimiter
+from cornershop_scraper.utils.metrics import Metrics
+from cornershop_scraper.utils.response_cache import ResponseCache
+from cornershop_scraper.utils.session_cache import SessionCache
+from cornershop_scraper.utils.token import clone_session, get_local_session, CloudScraper
 
 
 class Store(object):
     """ A store object that scrapes and saves its information and products. """
 
     DEFAULT_DELAY = 1
+    DEFAULT_CONCURRENCY = 8
     DEFAULT_FILE_NAME = 'default_file'
+    INDEXED_KEYS = ('id', 'name')
     DEFAULT_WRITER = 'csv'
     DEFAULT_HEADERS = {
         'id': 'ID',
@@ -35,13 +50,35 @@ class Store(object):
         'purchasable': 'Purchasable',
         'availability_status': 'Availability Status'
     }
+    DEDUP_HEADERS = {
+        **DEFAULT_HEADERS,
+        'aisles': 'Aisles',
+        'departments': 'Departments'
+    }
+
+    DEDUP_MAPPING_HEADERS = {
+        'id': 'ID',
+        'aisles': 'Aisles',
+        'departments': 'Departments'
+    }
 
     def __init__(self, business_id: int,
                  address: str,
                  country: str = 'BR',
                  language: str = 'pt-br',
                  session: CloudScraper = None,
-                 file_path: str = None):
+                 file_path: str = None,
+                 rate_limiter: RateLimiter = None,
+                 session_cache: SessionCache = None,
+                 response_cache: ResponseCache = None,
+                 crawl_state: CrawlState = None,
+                 compact: bool = False,
+                 base_url: str = None,
+                 metrics: Metrics = None,
+                 executor: RequestExecutor = None,
+                 image_workers: int = 1,
+                 image_store: ImageStore = None,
+                 image_rate_limiter: RateLimiter = None):
         """ Initiaze the Store instance.
 
         Arguments:
@@ -50,20 +87,68 @@ class Store(object):
             language : The language.
             session : The cloudscraper session.
             file_path : The file path.
+            rate_limiter : The rate limiter shared by all the requests, defaults to one request each DEFAULT_DELAY.
+            session_cache : The cache used to reuse the local session when no session is given.
+            response_cache : The cache of the API responses, keyed by URL, parameters and locality.
+            crawl_state : The aisles validators used by the incremental crawls.
+            compact : If true uses the compact objects, which store the fields in slots.
+            base_url : The API base URL, defaults to CornershopURL.
+            metrics : The collector of the requests and crawl phases metrics.
+            executor : The executor of the API requests, with retries and circuit breaking. When given its rate
+                limiter, response cache and metrics are used by default.
+            image_workers : The images downloaded at once when saving the products images.
+            image_store : The content-addressed store of the images, shared with other stores.
+            image_rate_limiter : The rate limiter of the image downloads, defaults to one whose rate grows with the
+                image workers, see ImageWriter.make_rate_limiter.
 
         Returns:
             None
         """
 
+        if executor:
+            rate_limiter = rate_limiter or executor.rate_limiter
+            response_cache = response_cache or executor.response_cache
+            metrics = metrics or executor.metrics
+
         self.file_path = file_path
         self.business_id = business_id
+        self.base_url = (base_url or CornershopURL).rstrip('/')
         self.loc_address = address
         self.loc_country = country
         self.language = language
+        self.compact = compact
+        self._product_class = CompactProduct if compact else Product
+        self._department_class = CompactDepartment if compact else Department
+        self._offer_class = CompactOffer if compact else Offer
+        self.response_cache = response_cache
+        self.crawl_state = crawl_state
+        self.metrics = metrics or Metrics()
+        self.image_workers = image_workers
+        self.image_store = image_store
+        self.image_rate_limiter = image_rate_limiter or ImageWriter.make_rate_limiter(workers=image_workers)
+
+        self.rate_limiter = rate_limiter
+        if not rate_limiter:
+            self.rate_limiter = RateLimiter(rate=1 / self.DEFAULT_DELAY)
+
+        self.executor = executor or RequestExecutor(
+            rate_limiter=self.rate_limiter,
+            response_cache=self.response_cache,
+            metrics=self.metrics
+        )
 
+        self._worker = local()
         self.session = session
         if not session:
-            self.session = get_local_session(address=address, country=country)
+            with self.metrics.span('handshake', address=address):
+                self.session = get_local_session(
+                    address=address,
+                    country=country,
+                    language=language,
+                    rate_limiter=self.rate_limiter,
+                    cache=session_cache,
+                    base_url=self.base_url
+                )
 
         self.has_same_prices = None
         self.is_partner = None
@@ -78,8 +163,12 @@ class Store(object):
         self.offers = []
         self.departments = []
         self.aisles = []
+        self._departments_index = {}
+        self._aisles_index = {}
+        self.product_index = None
 
-        self._set_store_data()
+        with self.metrics.span('store', store=business_id):
+            self._set_store_data()
 
     def search(self, query: str,
                only_main_aisle: bool = True) -> List[Product]:
@@ -93,10 +182,10 @@ class Store(object):
             A list of products.
         """
 
-        url = CornershopURL + f'/api/v2/branches/{self.business_id}/search'
+        url = self.base_url + f'/api/v2/branches/{self.business_id}/search'
 
         params = {'query': query}
-        req = self.session.get(url=url, params=params)
+        req = self._get(url=url, params=params)
         json = req.json()
         if not json['aisles']:
             return []
@@ -104,25 +193,19 @@ class Store(object):
         if only_main_aisle:
             index = 1 if json['aisles'][0]['aisle_id'] == 'promotions' else 0
             aisle = json['aisles'][index]
+            department = self.get_department(aisle['department_id'], 'id').name
             products = [
-                Product(
-                    info=j,
-                    aisle=aisle['aisle_name'],
-                    department=self.get_department(aisle['department_id'], 'id').name
-                )
+                self._product_class(info=j, aisle=aisle['aisle_name'], department=department)
                 for j in aisle['products']
             ]
 
         else:
             products = []
             for aisle in json['aisles']:
+                department = self.get_department(aisle['department_id'], 'id').name
                 products.extend(
                     [
-                        Product(
-                            info=prod,
-                            aisle=aisle['aisle_name'],
-                            department=self.get_department(aisle['department_id'], 'id').name
-                        )
+                        self._product_class(info=prod, aisle=aisle['aisle_name'], department=department)
                         for prod in aisle['products']
                     ]
                 )
@@ -156,19 +239,7 @@ class Store(object):
         """
 
         aisle = self.get_aisle(value=value, key=key)
-
-        url = CornershopURL + f'/api/v2/branches/{self.business_id}/aisles/{aisle.id}/products'
-        req = self.session.get(url)
-        json = req.json()
-
-        products = [
-            Product(
-                info=prod,
-                aisle=aisle.name,
-                department=self.get_department(aisle.department_id, 'id').name
-            )
-            for prod in json
-        ]
+        products = self._get_aisle_products(aisle=aisle)
 
         processed_data = self._process_and_save(
             items=products,
@@ -211,10 +282,10 @@ class Store(object):
 
         products = []
         department = self.get_department(value=value, key=key)
-        for aisle in department.aisles:
-            aisle_products = self.products_by_aisle(value=aisle.id)
-            products.extend(aisle_products)
-            sleep(self.DEFAULT_DELAY)
+        with self.metrics.span('department', store=self.business_id, department=department.id):
+            for aisle in department.aisles:
+                aisle_products = self.products_by_aisle(value=aisle.id)
+                products.extend(aisle_products)
 
         processed_data = self._process_and_save(
             items=products,
@@ -235,9 +306,16 @@ class Store(object):
                      img_path: str = '',
                      file_name: str = '',
                      extension: str = 'xlsx',
-                     to_dict: bool = False) -> Union[List[Dict[str, Any]], List[Product]]:
+                     to_dict: bool = False,
+                     dedup: bool = False,
+                     checkpoint: CheckpointJournal = None) -> Union[List[Dict[str, Any]], List[Product]]:
         """ Returns all store products.
 
+        With a checkpoint journal each aisle is appended to the file as soon as it is
+        retrieved and recorded as completed, so a crawl that fails can be resumed by
+        calling it again. Only the products retrieved on this call are returned. An aisle
+        written just before the failure may be repeated, as on save_all_products.
+
         Arguments:
             headers : The headers that will be used to change the name of the fields and which of them will be saved.
             save : If true saves the products on a file.
@@ -246,15 +324,283 @@ class Store(object):
             file_name : The file name.
             extension : The writer extension.
             to_dict : If true returns a list of dictionaries.
+            dedup : If true keeps each product once with the list of its aisles and departments.
+            checkpoint : The journal of the completed aisles, it requires save and an appendable writer.
 
         Returns:
             A list of products.
         """
 
+        if checkpoint:
+            if not save or dedup:
+                raise Warning('The checkpoint requires save and can not be used with dedup.')
+
+            products = []
+            self._save_checkpointed(
+                checkpoint=checkpoint,
+                headers=headers,
+                save_img=save_img,
+                img_path=img_path,
+                file_name=file_name,
+                extension=extension,
+                products=products
+            )
+            return self._process_and_save(items=products, to_dict=to_dict)
+
+        index = ProductIndex() if dedup else None
         products = []
         for department in self.departments:
             department_products = self.products_by_department(value=department.id)
-            products.extend(department_products)
+            products.extend(index.extend(department_products) if dedup else department_products)
+
+        if dedup:
+            self.product_index = index
+            headers = headers or self.DEDUP_HEADERS
+
+        processed_data = self._process_and_save(
+            items=products,
+            headers=headers,
+            save=save,
+            save_img=save_img,
+            img_path=img_path,
+            file_name=file_name,
+            extension=extension,
+            to_dict=to_dict,
+        )
+
+        return processed_data
+
+    def iter_aisle_products(self, value: str,
+                            key: str = 'id') -> Iterator[Product]:
+        """ Yields the aisle products given its ID.
+
+        Arguments:
+            value : The aisle value.
+            key : The aisle key.
+
+        Returns:
+            An iterator of products.
+        """
+
+        aisle = self.get_aisle(value=value, key=key)
+        yield from self._get_aisle_products(aisle=aisle)
+
+    def iter_department_products(self, value: str,
+                                 key: str = 'id',
+                                 batches: bool = False) -> Iterator[Union[Product, List[Product]]]:
+        """ Yields the department products as each aisle is retrieved.
+
+        Arguments:
+            value : The department value.
+            key : The department key.
+            batches : If true yields a list with the products of each aisle.
+
+        Returns:
+            An iterator of products or lists of products.
+        """
+
+        department = self.get_department(value=value, key=key)
+        yield from self._iter_aisles_products(aisles=department.aisles, batches=batches)
+
+    def iter_products(self, batches: bool = False,
+                      dedup: bool = False,
+                      incremental: bool = False) -> Iterator[Union[Product, List[Product]]]:
+        """ Yields all store products as each aisle is retrieved.
+
+        Only the products of the current aisle are kept in memory, unless dedup is set,
+        where the index keeps one object for each distinct product. A product is yielded
+        on its first appearance, so its aisles list only grows after it is yielded.
+
+        On an incremental crawl only the aisles that changed since the last one are
+        yielded, and the crawl state of an aisle is saved once its products are consumed.
+
+        Arguments:
+            batches : If true yields a list with the products of each aisle.
+            dedup : If true yields each product only once.
+            incremental : If true skips the aisles that did not change, it requires the store crawl state.
+
+        Returns:
+            An iterator of products or lists of products.
+        """
+
+        aisles = [aisle for department in self.departments for aisle in department.aisles]
+        index = None
+        if dedup:
+            index = self.product_index = ProductIndex()
+
+        yield from self._iter_aisles_products(aisles=aisles, batches=batches, index=index, incremental=incremental)
+
+    def save_all_products(self, headers: dict = None,
+                          save_img: bool = False,
+                          img_path: str = '',
+                          file_name: str = '',
+                          extension: str = 'csv',
+                          dedup: bool = False,
+                          incremental: bool = False,
+                          checkpoint: CheckpointJournal = None) -> int:
+        """ Saves all store products writing each aisle as soon as it is retrieved.
+
+        Unlike all_products(save=True) the products are never kept together in memory.
+        On an incremental crawl only the products of the changed aisles are saved, so they
+        are appended to the existing file and the writer must be appendable, as sqlite, which
+        updates the saved products, or csv and jsonl, which add the new rows to the end.
+
+        With dedup a product is written on its first appearance, before its aisles list is
+        complete, so the aisles and departments are left out of the streamed rows and saved
+        once the crawl ends on the {file_name}_aisles file, mapping each product ID to them.
+
+        Arguments:
+            headers : The headers that will be used to change the name of the fields and which of them will be saved.
+            save_img : If true saves all the products images.
+            img_path : The image path.
+            file_name : The file name.
+            extension : The writer extension.
+            dedup : If true saves each product only once.
+            incremental : If true skips the aisles that did not change and appends the changed ones to the file,
+                it requires the store crawl state and an appendable writer.
+            checkpoint : The journal of the completed aisles, used to resume a failed crawl.
+
+        Returns:
+            The number of saved products, counting the previous runs when resuming.
+        """
+
+        if checkpoint:
+            if dedup or incremental:
+                raise Warning('The checkpoint can not be used with dedup or incremental.')
+
+            return self._save_checkpointed(
+                checkpoint=checkpoint,
+                headers=headers,
+                save_img=save_img,
+                img_path=img_path,
+                file_name=file_name,
+                extension=extension
+            )
+
+        if not headers:
+            headers = self.DEFAULT_HEADERS
+
+        if not file_name:
+            file_name = self.DEFAULT_FILE_NAME
+
+        if dedup:
+            headers = self._drop_dedup_headers(headers=headers)
+
+        counter = [0]
+        writer = self._get_writer(extension=extension)
+        if incremental and not writer.APPENDABLE:
+            raise Warning(f'The {writer.PARSER_NAME} writer can not save an incremental crawl, use an appendable one.')
+
+        batches = self._tap_batches(
+            batches=self.iter_products(batches=True, dedup=dedup, incremental=incremental),
+            counter=counter,
+            save_img=save_img,
+            img_path=img_path
+        )
+        writer.save_batches(batches=batches, file_name=file_name, headers=headers, append=incremental)
+        if dedup:
+            self._save_dedup_mapping(file_name=file_name, extension=extension)
+
+        return counter[0]
+
+    def product_table(self, table: ProductTable = None) -> ProductTable:
+        """ Returns a column-oriented table of all store products. It requires numpy.
+
+        The table is filled straight from each aisle response, without creating
+        the product objects.
+
+        Arguments:
+            table : A table to add the products to, as one table for many stores.
+
+        Returns:
+            A product table.
+        """
+
+        if table is None:
+            table = ProductTable()
+
+        for department in self.departments:
+            for aisle in department.aisles:
+                table.extend(json=self._get_aisle_json(aisle=aisle), aisle=aisle.name, department=department.name)
+
+        return table
+
+    async def aproducts_by_department(self, value: str,
+                                      key: str = 'id',
+                                      concurrency: int = None,
+                                      headers: dict = None,
+                                      save: bool = False,
+                                      save_img: bool = False,
+                                      img_path: str = '',
+                                      file_name: str = '',
+                                      extension: str = 'xlsx',
+                                      to_dict: bool = False) -> Union[List[Dict[str, Any]], List[Product]]:
+        """ Returns all department products fetching its aisles concurrently.
+
+        Arguments:
+            value : The department value.
+            key : The department key.
+            concurrency : The maximum number of aisle requests in flight.
+            headers : The headers that will be used to change the name of the fields and which of them will be saved.
+            save : If true saves the products on a file.
+            save_img : If true saves all the products images.
+            img_path : The image path.
+            file_name : The file name.
+            extension : The writer extension.
+            to_dict : If true returns a list of dictionaries.
+
+        Returns:
+            A list of products in the same order as products_by_department.
+        """
+
+        department = self.get_department(value=value, key=key)
+        products = await self._aget_aisles_products(aisles=department.aisles, concurrency=concurrency)
+
+        processed_data = self._process_and_save(
+            items=products,
+            headers=headers,
+            save=save,
+            save_img=save_img,
+            img_path=img_path,
+            file_name=file_name,
+            extension=extension,
+            to_dict=to_dict,
+        )
+
+        return processed_data
+
+    async def aall_products(self, concurrency: int = None,
+                            headers: dict = None,
+                            save: bool = False,
+                            save_img: bool = False,
+                            img_path: str = '',
+                            file_name: str = '',
+                            extension: str = 'xlsx',
+                            to_dict: bool = False,
+                            dedup: bool = False) -> Union[List[Dict[str, Any]], List[Product]]:
+        """ Returns all store products fetching the aisles concurrently.
+
+        Arguments:
+            concurrency : The maximum number of aisle requests in flight.
+            headers : The headers that will be used to change the name of the fields and which of them will be saved.
+            save : If true saves the products on a file.
+            save_img : If true saves all the products images.
+            img_path : The image path.
+            file_name : The file name.
+            extension : The writer extension.
+            to_dict : If true returns a list of dictionaries.
+            dedup : If true keeps each product once with the list of its aisles and departments.
+
+        Returns:
+            A list of products in the same order as all_products.
+        """
+
+        aisles = [aisle for department in self.departments for aisle in department.aisles]
+        products = await self._aget_aisles_products(aisles=aisles, concurrency=concurrency)
+        if dedup:
+            self.product_index = ProductIndex()
+            products = self.product_index.extend(products)
+            headers = headers or self.DEDUP_HEADERS
 
         processed_data = self._process_and_save(
             items=products,
@@ -395,9 +741,15 @@ class Store(object):
             The department if exists.
         """
 
-        for department in self.departments:
-            if department.__dict__[key] == value:
-                return department
+        index = self._departments_index.get(key)
+        if index is not None:
+            if value in index:
+                return index[value]
+
+        else:
+            for department in self.departments:
+                if getattr(department, key) == value:
+                    return department
 
         raise Warning('This department not exists.')
 
@@ -413,12 +765,280 @@ class Store(object):
             The aisle if exists.
         """
 
-        for aisle in self.aisles:
-            if aisle.__dict__[key] == value:
-                return aisle
+        index = self._aisles_index.get(key)
+        if index is not None:
+            if value in index:
+                return index[value]
+
+        else:
+            for aisle in self.aisles:
+                if getattr(aisle, key) == value:
+                    return aisle
 
         raise Warning('This aisle does not exists.')
 
+    def _get_aisle_products(self, aisle: Aisle) -> List[Product]:
+        """ Retrieve the products of an aisle.
+
+        Arguments:
+            aisle : The aisle.
+
+        Returns:
+            A list of products.
+        """
+
+        with self.metrics.span('aisle', store=self.business_id, aisle=aisle.id):
+            json = self._get_aisle_json(aisle=aisle)
+            return self._make_products(json=json, aisle=aisle)
+
+    def _make_products(self, json: List[Dict[str, Any]],
+                       aisle: Aisle) -> List[Product]:
+        """ Returns the product objects of an aisle response.
+
+        Arguments:
+            json : The list of products retrieved from the API.
+            aisle : The aisle.
+
+        Returns:
+            A list of products.
+        """
+
+        department = self.get_department(aisle.department_id, 'id').name
+        with self.metrics.span('build', store=self.business_id, aisle=aisle.id):
+            return [self._product_class(info=prod, aisle=aisle.name, department=department) for prod in json]
+
+    def _get_aisle_json(self, aisle: Aisle) -> List[Dict[str, Any]]:
+        """ Retrieve the products data of an aisle.
+
+        Arguments:
+            aisle : The aisle.
+
+        Returns:
+            A list of products data.
+        """
+
+        url = self.base_url + f'/api/v2/branches/{self.business_id}/aisles/{aisle.id}/products'
+        req = self._get(url=url)
+        with self.metrics.span('decode', store=self.business_id, aisle=aisle.id):
+            return req.json()
+
+    def _get_changed_aisle_json(self, aisle: Aisle) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, Any]]:
+        """ Retrieve the products data of an aisle if it changed since the last crawl.
+
+        The request is conditional when the last response had an ETag or Last-Modified
+        header, otherwise the hash of the products is compared with the saved one.
+
+        Arguments:
+            aisle : The aisle.
+
+        Returns:
+            The products data, or None if the aisle did not change, and its new validators.
+        """
+
+        state = self.crawl_state.get(store=self.business_id, aisle=aisle.id) or {}
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
+        url = self.base_url + f'/api/v2/branches/{self.business_id}/aisles/{aisle.id}/products'
+        req = self._get(url=url, headers=headers) if headers else self._get(url=url)
+        if req.status_code == 304:
+            state.pop('updated_at', None)
+            return None, state
+
+        with self.metrics.span('decode', store=self.business_id, aisle=aisle.id):
+            json = req.json()
+        validators = dict(
+            etag=req.headers.get('ETag'),
+            last_modified=req.headers.get('Last-Modified'),
+            content_hash=CrawlState.content_hash(json),
+            products=len(json)
+        )
+
+        if state and validators['content_hash'] == state.get('content_hash'):
+            return None, validators
+
+        return json, validators
+
+    def _iter_aisles_products(self, aisles: List[Aisle],
+                              batches: bool = False,
+                              index: ProductIndex = None,
+                              incremental: bool = False) -> Iterator[Union[Product, List[Product]]]:
+        """ Yields the products of many aisles, one aisle request at a time.
+
+        Arguments:
+            aisles : The aisles.
+            batches : If true yields a list with the products of each aisle.
+            index : The index used to skip the products already yielded.
+            incremental : If true skips the aisles that did not change since the last crawl.
+
+        Returns:
+            An iterator of products or lists of products.
+        """
+
+        if incremental and not self.crawl_state:
+            raise Warning('The incremental crawl requires a crawl state.')
+
+        for aisle in aisles:
+            validators = None
+            if incremental:
+                with self.metrics.span('aisle', store=self.business_id, aisle=aisle.id, incremental=True):
+                    json, validators = self._get_changed_aisle_json(aisle=aisle)
+                    if json is not None:
+                        products = self._make_products(json=json, aisle=aisle)
+
+                if json is None:
+                    self.crawl_state.set(store=self.business_id, aisle=aisle.id, **validators)
+                    continue
+
+            else:
+                products = self._get_aisle_products(aisle=aisle)
+
+            if index is not None:
+                products = index.extend(products)
+
+            if batches:
+                yield products
+
+            else:
+                yield from products
+
+            if validators is not None:
+                self.crawl_state.set(store=self.business_id, aisle=aisle.id, **validators)
+
+    def _tap_batches(self, batches: Iterable[List[Product]],
+                     counter: List[int],
+                     save_img: bool = False,
+                     img_path: str = '') -> Iterator[List[Product]]:
+        """ Yields the batches counting the products and saving its images on the way.
+
+        Arguments:
+            batches : An iterable of lists of products.
+            counter : A single item list where the number of products is added.
+            save_img : If true saves the products images.
+            img_path : The image path.
+
+        Returns:
+            An iterator of lists of products.
+        """
+
+        for batch in batches:
+            counter[0] += len(batch)
+            if save_img and batch:
+                self._save_image(products=batch, img_path=img_path)
+
+            with self.metrics.span('write', store=self.business_id, items=len(batch)):
+                yield batch
+
+    def _save_checkpointed(self, checkpoint: CheckpointJournal,
+                           headers: dict = None,
+                           save_img: bool = False,
+                           img_path: str = '',
+                           file_name: str = '',
+                           extension: str = 'csv',
+                           products: List[Product] = None) -> int:
+        """ Saves the store products aisle by aisle, skipping the aisles completed on the previous runs.
+
+        An aisle is recorded on the journal only after its products are written, and the
+        file is appended when resuming, so it never misses an aisle. An aisle written just
+        before a failure, but not recorded yet, is written again, repeating its rows, except
+        on the sqlite writer, which updates them. A store completed on the previous run is
+        crawled over on a new file.
+
+        Arguments:
+            checkpoint : The journal of the completed aisles.
+            headers : The headers that will be used to change the name of the fields and which of them will be saved.
+            save_img : If true saves the products images.
+            img_path : The image path.
+            file_name : The file name.
+            extension : The writer extension.
+            products : A list where the retrieved products are added.
+
+        Returns:
+            The number of saved products, counting the previous runs.
+        """
+
+        if not headers:
+            headers = self.DEFAULT_HEADERS
+
+        if not file_name:
+            file_name = self.DEFAULT_FILE_NAME
+
+        writer = self._get_writer(extension=extension)
+        if not writer.APPENDABLE:
+            raise Warning(f'The {writer.PARSER_NAME} writer can not resume a crawl, use an appendable writer.')
+
+        if checkpoint.is_store_completed(store=self.business_id, file_name=file_name):
+            checkpoint.clear(store=self.business_id, file_name=file_name)
+
+        completed = checkpoint.completed_aisles(store=self.business_id, file_name=file_name)
+        aisles = [
+            aisle for department in self.departments for aisle in department.aisles
+            if str(aisle.id) not in completed
+        ]
+
+        with writer.open(file_name=file_name, headers=headers, append=bool(completed)):
+            for aisle in aisles:
+                batch = self._get_aisle_products(aisle=aisle)
+                if batch:
+                    with self.metrics.span('write', store=self.business_id, items=len(batch)):
+                        writer.append(items=batch)
+                    if save_img:
+                        self._save_image(products=batch, img_path=img_path)
+
+                    if products is not None:
+                        products.extend(batch)
+
+                checkpoint.complete_aisle(
+                    store=self.business_id,
+                    file_name=file_name,
+                    department=aisle.department_id,
+                    aisle=aisle.id,
+                    products=len(batch)
+                )
+
+        return checkpoint.complete_store(store=self.business_id, file_name=file_name)
+
+    async def _aget_aisles_products(self, aisles: List[Aisle],
+                                    concurrency: int = None) -> List[Product]:
+        """ Retrieve the products of many aisles with a bounded number of requests in flight.
+
+        The blocking session calls run on a thread pool so the event loop only schedules
+        them. Sessions are not thread-safe, so each worker uses its own copy of the store
+        session. The results keep the order of the given aisles.
+
+        Arguments:
+            aisles : The aisles.
+            concurrency : The maximum number of aisle requests in flight.
+
+        Returns:
+            A list of products.
+        """
+
+        if not aisles:
+            return []
+
+        loop = asyncio.get_event_loop()
+        workers = concurrency or self.DEFAULT_CONCURRENCY
+        with ThreadPoolExecutor(max_workers=workers, initializer=self._set_worker_session) as pool:
+            results = await asyncio.gather(
+                *[loop.run_in_executor(pool, self._get_aisle_products, aisle) for aisle in aisles]
+            )
+
+        return [product for aisle_products in results for product in aisle_products]
+
+    def _set_worker_session(self) -> None:
+        """ Gives the current worker thread its own copy of the store session.
+
+        Returns:
+            None
+        """
+
+        self._worker.session = clone_session(self.session)
+
     def _save_image(self, products: List[Product],
                     img_path: str = '',
                     force_new_file: bool = False) -> None:
@@ -434,9 +1054,69 @@ class Store(object):
         if not img_path:
             img_path = self.file_path
 
-        writer = ALLOWED_WRITERS['img'](img_path)
-        writer.DEFAULT_DELAY = self.DEFAULT_DELAY
-        writer.save_items(items=products, force_new_file=force_new_file)
+        writer = self._get_writer(extension='img', file_path=img_path)
+        with self.metrics.span('images', store=self.business_id, items=len(products)):
+            writer.save_items(items=products, force_new_file=force_new_file)
+
+    @staticmethod
+    def _drop_dedup_headers(headers: Union[List[str], Dict[str, str]]) -> Union[List[str], Dict[str, str]]:
+        """ Returns the headers without the aisles and departments lists.
+
+        Arguments:
+            headers : The headers that will be used to change the name of the fields and which of them will be saved.
+
+        Returns:
+            The headers without the dedup fields.
+        """
+
+        fields = ('aisles', 'departments')
+        if isinstance(headers, dict):
+            return {key: value for key, value in headers.items() if key not in fields}
+
+        return [key for key in headers if key not in fields]
+
+    def _save_dedup_mapping(self, file_name: str,
+                            extension: str) -> None:
+        """ Saves the aisles and departments of each deduplicated product on the {file_name}_aisles file.
+        The writers that save one file per item or a fixed schema use the default csv writer.
+
+        Arguments:
+            file_name : The file name of the products.
+            extension : The writer extension of the products.
+
+        Returns:
+            None
+        """
+
+        writer = self._get_writer(extension=extension)
+        if writer.MULTIPLE_FILES or writer.FIXED_SCHEMA:
+            writer = self._get_writer(extension='csv')
+
+        items = [
+            dict(id=product.id, aisles=product.aisles, departments=product.departments)
+            for product in self.product_index.products
+        ]
+        writer.save_items(items=items, file_name=f'{file_name}_aisles', headers=self.DEDUP_MAPPING_HEADERS)
+
+    def _get_writer(self, extension: str,
+                    file_path: str = None) -> Writer:
+        """ Returns the writer of the extension for this store, with the store attributes
+        declared on its STORE_OPTIONS as constructor arguments.
+
+        Arguments:
+            extension : The writer extension.
+            file_path : The directory path, defaults to the store file path.
+
+        Returns:
+            A writer instance.
+        """
+
+        writer_class = parser(extension, self.DEFAULT_WRITER)
+        options = {argument: getattr(self, attribute) for argument, attribute in writer_class.STORE_OPTIONS.items()}
+        writer = writer_class(file_path or self.file_path, **options)
+
+        writer.store_id = self.business_id
+        return writer
 
     def _process_and_save(self, items: list,
                           headers: dict = None,
@@ -469,17 +1149,33 @@ class Store(object):
             if not file_name:
                 file_name = self.DEFAULT_FILE_NAME
 
-            writer = parser(extension, self.DEFAULT_WRITER)(self.file_path)
-            writer.save_items(items=items, file_name=file_name, headers=headers)
+            writer = self._get_writer(extension=extension)
+            with self.metrics.span('write', store=self.business_id, items=len(items)):
+                writer.save_items(items=items, file_name=file_name, headers=headers)
 
         if save_img:
             self._save_image(products=items, img_path=img_path)
 
-        if to_dict and not isinstance(items[0], dict):
-            return [p.__dict__ for p in items]
+        if to_dict and items and not isinstance(items[0], dict):
+            return [p.to_dict() if self.compact else p.__dict__ for p in items]
 
         return items
 
+    def _get(self, url: str, **kwargs) -> Any:
+        """ Makes a GET request through the request executor.
+
+        Arguments:
+            url : The request URL.
+            kwargs : Extra arguments for the session request.
+
+        Returns:
+            The response.
+        """
+
+        locality = f'{self.loc_address}|{self.loc_country}|{self.language}'
+        session = getattr(self._worker, 'session', None) or self.session
+        return self.executor.get(session, url=url, locality=locality, **kwargs)
+
     def _set_store_data(self) -> None:
         """ Retrieve and set store data.
 
@@ -487,10 +1183,10 @@ class Store(object):
             None
         """
 
-        url = CornershopURL + f'/api/v3/branches/{self.business_id}'
+        url = self.base_url + f'/api/v3/branches/{self.business_id}'
         headers = {'accept-language': self.language}
         params = dict(with_suspended_slots='', locality=self.loc_address, country=self.loc_country)
-        req = self.session.get(url=url, headers=headers, params=params)
+        req = self._get(url=url, headers=headers, params=params)
         json = req.json()
 
         info = json['branch']
@@ -507,8 +1203,31 @@ class Store(object):
 
         for offer in info['featured']:
             if '/catalog/' in offer['url']:
-                self.offers.append(Offer(offer))
+                self.offers.append(self._offer_class(offer))
 
-        self.departments = [Department(info=dep) for dep in json['departments']]
+        self.departments = [self._department_class(info=dep) for dep in json['departments']]
         for department in self.departments:
             self.aisles.extend(department.aisles)
+
+        self._departments_index = self._make_index(items=self.departments)
+        self._aisles_index = self._make_index(items=self.aisles)
+
+    @classmethod
+    def _make_index(cls, items: List[Any]) -> Dict[str, Dict[Any, Any]]:
+        """ Returns the lookup indexes of the items by each of the INDEXED_KEYS.
+
+        The first item of a repeated value is kept, as a linear search would return.
+
+        Arguments:
+            items : The departments or aisles.
+
+        Returns:
+            A dictionary mapping each key to a dictionary of values and items.
+        """
+
+        index = {key: {} for key in cls.INDEXED_KEYS}
+        for item in items:
+            for key in cls.INDEXED_KEYS:
+                index[key].setdefault(getattr(item, key), item)
+
+        return index
@@ -0,0 +1,18 @@
+"""
+cornershop_scraper.mock
+-----------------------
+
+This module provides a local mock of the Cornershop site and API, a
+synthetic catalog of stores of any size and a recorder of real responses,
+to run the scraper offline and reproducibly.
+
+Start a server and point the scraper to it with the base_url argument or
+the CORNERSHOP_URL environment variable:
+
+    python -m cornershop_scraper.mock --port 8000 --latency 0.05
+    CORNERSHOP_URL=http://127.0.0.1:8000 python crawl.py
+"""
+
+from .catalog import SyntheticCatalog
+from .fixtures import Fixtures, Recorder, request_key
+from .server import MockServer
@@ -0,0 +1,65 @@
+"""
+cornershop_scraper.mock.__main__
+--------------------------------
+
+Runs the mock server from the command line.
+
+Usage:
+    python -m cornershop_scraper.mock [--port 8000] [--stores 3] [--latency 0.05] [--fixtures responses.json]
+"""
+
+import argparse
+
+from cornershop_scraper.mock.catalog import SyntheticCatalog
+from cornershop_scraper.mock.fixtures import Fixtures
+from cornershop_scraper.mock.server import MockServer
+
+
+def main() -> None:
+    """ Parses the arguments and serves until interrupted.
+
+    Returns:
+        None
+    """
+
+    args = argparse.ArgumentParser(description='Serves a mock of the Cornershop site and API.')
+    args.add_argument('--host', default='127.0.0.1')
+    args.add_argument('--port', type=int, default=8000)
+    args.add_argument('--stores', type=int, default=3)
+    args.add_argument('--departments', type=int, default=8)
+    args.add_argument('--aisles', type=int, default=6)
+    args.add_argument('--products', type=int, default=40, help='products of each aisle')
+    args.add_argument('--duplicates', type=float, default=0.1)
+    args.add_argument('--fixtures', default='', help='recorded responses answered before the catalog')
+    args.add_argument('--latency', type=float, default=0.0)
+    args.add_argument('--jitter', type=float, default=0.0)
+    args.add_argument('--rate-limit', type=float, default=None, help='requests per second')
+    args.add_argument('--error-rate', type=float, default=0.0)
+    args.add_argument('--seed', type=int, default=0)
+    args = args.parse_args()
+
+    catalog = SyntheticCatalog(
+        stores=args.stores,
+        departments=args.departments,
+        aisles=args.aisles,
+        products=args.products,
+        duplicates=args.duplicates,
+        seed=args.seed
+    )
+    server = MockServer(
+        catalog=catalog,
+        fixtures=Fixtures(args.fixtures) if args.fixtures else None,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+    print(f'Serving {catalog.stores} stores of {catalog.products_per_store} products at {server.url}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+cornershop_scraper.mock.catalog
+-------------------------------
+
+Provides a synthetic catalog that generates the front-end API data of
+stores of any size. The data is deterministic for a given seed and each
+aisle is generated on demand, so huge stores do not take memory.
+"""
+
+from random import Random
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SyntheticCatalog:
+    """ A deterministic generator of stores, departments, aisles and products. """
+
+    FIRST_BUSINESS_ID = 1000
+    BRANDS = 500
+
+    def __init__(self, stores: int = 3,
+                 departments: int = 8,
+                 aisles: int = 6,
+                 products: int = 40,
+                 duplicates: float = 0.1,
+                 base_url: str = '',
+                 seed: int = 0):
+        """ Initialize a SyntheticCatalog instance.
+
+        Arguments:
+            stores : The number of stores.
+            departments : The number of departments of each store.
+            aisles : The number of aisles of each department.
+            products : The number of products of each aisle.
+            duplicates : The fraction of each aisle products that also belong to the first aisle of the department.
+            base_url : The URL prefix of the images, usually the mock server URL.
+            seed : The seed of the generated prices and availabilities.
+
+        Returns:
+            None
+        """
+
+        self.stores = stores
+        self.departments = departments
+        self.aisles = aisles
+        self.products = products
+        self.duplicates = duplicates
+        self.base_url = base_url
+        self.seed = seed
+
+    @property
+    def business_ids(self) -> List[int]:
+        return [self.FIRST_BUSINESS_ID + index for index in range(self.stores)]
+
+    @property
+    def products_per_store(self) -> int:
+        return self.departments * self.aisles * self.products
+
+    def countries(self) -> List[Dict[str, Any]]:
+        """ Returns the countries data.
+
+        Returns:
+            A list of countries.
+        """
+
+        return [
+            dict(code='BR', name='Brasil', currency='BRL', language='pt-br'),
+            dict(code='CL', name='Chile', currency='CLP', language='es-cl'),
+        ]
+
+    def branch_groups(self) -> List[Dict[str, Any]]:
+        """ Returns the stores of the location, in a single category.
+
+        Returns:
+            A list of store categories.
+        """
+
+        items = [
+            dict(content=dict(name=f'Store {business_id}', store_id=business_id * 10, id=business_id))
+            for business_id in self.business_ids
+        ]
+        return [dict(name='Supermarkets', items=items)]
+
+    def branch(self, business_id: int) -> Optional[Dict[str, Any]]:
+        """ Returns the data of a store with its departments and aisles.
+
+        Arguments:
+            business_id : The store business ID.
+
+        Returns:
+            The store data or None if the store does not exist.
+        """
+
+        if business_id not in self.business_ids:
+            return None
+
+        offer = dict(
+            background_color='#FFFFFF',
+            caption='Offers',
+            id=1,
+            imageset={'1x': f'{self.base_url}/img/offer.jpg'},
+            is_light=True,
+            priority=1,
+            url=f'/catalog/{business_id}/offers',
+            valid_until=None
+        )
+        branch = dict(
+            has_same_prices=True,
+            is_partner=True,
+            lat=-22.9,
+            lng=-43.2,
+            locale='pt-br',
+            name=f'Store {business_id}',
+            store_name=f'Store {business_id}',
+            address=f'Street {business_id}',
+            country='BR',
+            description='A synthetic store.',
+            featured=[offer]
+        )
+        departments = [
+            dict(
+                name=f'Department {department}',
+                id=f'C_{department}',
+                img_url='',
+                aisles=[
+                    dict(name=f'Aisle {department}.{aisle}', id=self.aisle_id(department, aisle), img_url='')
+                    for aisle in range(self.aisles)
+                ]
+            )
+            for department in range(self.departments)
+        ]
+        return dict(branch=branch, departments=departments)
+
+    def aisle_products(self, business_id: int,
+                       aisle_id: str) -> Optional[List[Dict[str, Any]]]:
+        """ Returns the products data of an aisle.
+
+        Arguments:
+            business_id : The store business ID.
+            aisle_id : The aisle ID.
+
+        Returns:
+            A list of products or None if the aisle does not exist.
+        """
+
+        position = self.parse_aisle_id(aisle_id)
+        if business_id not in self.business_ids or position is None:
+            return None
+
+        department, aisle = position
+        shared = int(self.products * self.duplicates) if aisle else 0
+        products = [self.product(business_id, department, aisle, index) for index in range(self.products - shared)]
+        products.extend(self.product(business_id, department, 0, index) for index in range(shared))
+        return products
+
+    def search(self, business_id: int,
+               query: str) -> Optional[Dict[str, Any]]:
+        """ Returns the products whose name contains the query, grouped by aisle.
+
+        Arguments:
+            business_id : The store business ID.
+            query : The search term.
+
+        Returns:
+            The search result or None if the store does not exist.
+        """
+
+        if business_id not in self.business_ids:
+            return None
+
+        query = query.lower()
+        aisles = []
+        for department in range(self.departments):
+            for aisle in range(self.aisles):
+                aisle_id = self.aisle_id(department, aisle)
+                products = [
+                    product for product in self.aisle_products(business_id, aisle_id)
+                    if query in product['name'].lower()
+                ]
+                if products:
+                    aisles.append(dict(
+                        aisle_id=aisle_id,
+                        aisle_name=f'Aisle {department}.{aisle}',
+                        department_id=f'C_{department}',
+                        products=products
+                    ))
+
+        return dict(aisles=aisles)
+
+    def product(self, business_id: int,
+                department: int,
+                aisle: int,
+                index: int) -> Dict[str, Any]:
+        """ Returns the data of a product, as retrieved from the API.
+
+        Arguments:
+            business_id : The store business ID.
+            department : The department position.
+            aisle : The aisle position.
+            index : The product position on the aisle.
+
+        Returns:
+            A dictionary with the product data.
+        """
+
+        number = (department * self.aisles + aisle) * self.products + index
+        product_id = business_id * 10 ** 9 + number
+        random = Random(f'{self.seed}:{product_id}')
+        price = round(random.uniform(1, 100), 2)
+        discounted = random.random() < 0.1
+        brand = number % self.BRANDS
+        return dict(
+            id=product_id,
+            brand={'id': brand, 'name': f'Brand {brand}'},
+            buy_unit='UN',
+            currency='BRL',
+            default_buy_unit='UN',
+            description=f'Description of the product {number}',
+            img_url=f'{self.base_url}/img/{product_id}.jpg',
+            nutritional_info=None,
+            regulatory_fees=[],
+            related_to=None,
+            unit_conversion_rate=1,
+            kind='PRODUCT',
+            name=f'Product {number}',
+            label='',
+            package='1 un',
+            original_price=round(price * 1.2, 2) if discounted else None,
+            price=price,
+            price_per_unit=None,
+            purchasable=True,
+            variable_weight=False,
+            availability_status='AVAILABLE' if random.random() < 0.95 else 'UNAVAILABLE'
+        )
+
+    @staticmethod
+    def aisle_id(department: int,
+                 aisle: int) -> str:
+        """ Returns the ID of an aisle given its position.
+
+        Arguments:
+            department : The department position.
+            aisle : The aisle position.
+
+        Returns:
+            The aisle ID.
+        """
+
+        return f'A_{department}_{aisle}'
+
+    def parse_aisle_id(self, aisle_id: str) -> Optional[Tuple[int, int]]:
+        """ Returns the department and aisle positions of an aisle ID.
+
+        Arguments:
+            aisle_id : The aisle ID.
+
+        Returns:
+            A (department, aisle) tuple or None if the aisle does not exist.
+        """
+
+        try:
+            _, department, aisle = aisle_id.split('_')
+            department, aisle = int(department), int(aisle)
+
+        except ValueError:
+            return None
+
+        if not (0 <= department < self.departments and 0 <= aisle < self.aisles):
+            return None
+
+        return department, aisle
@@ -0,0 +1,175 @@
+"""
+cornershop_scraper.mock.fixtures
+--------------------------------
+
+Provides the recorded responses replayed by the mock server and a recorder
+that wraps a live session to capture them.
+"""
+
+import json
+from os import makedirs, path, replace
+from threading import Lock
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+
+def request_key(method: str,
+                url: str) -> str:
+    """ Returns the key of a request, which ignores the host and the parameters order.
+
+    Arguments:
+        method : The HTTP method.
+        url : The request URL or path, with its query string.
+
+    Returns:
+        The request key.
+    """
+
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f'{method.upper()} {parts.path}' + (f'?{query}' if query else '')
+
+
+class Fixtures:
+    """ A JSON file of recorded responses keyed by request. """
+
+    EXCLUDED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie')
+
+    def __init__(self, file_path: str = ''):
+        """ Initialize a Fixtures instance, loading the file if it exists.
+
+        Arguments:
+            file_path : The fixtures file path.
+
+        Returns:
+            None
+        """
+
+        self.file_path = file_path
+        self.responses = {}
+        if file_path and path.isfile(file_path):
+            with open(file_path, encoding='utf-8') as fixtures_file:
+                self.responses = json.load(fixtures_file)
+
+    def get(self, method: str,
+            url: str) -> Optional[Dict[str, Any]]:
+        """ Returns the recorded response of a request. A request without match falls
+        back to the response recorded for the same path.
+
+        Arguments:
+            method : The HTTP method.
+            url : The request URL or path.
+
+        Returns:
+            A dictionary with the status, headers and body or None.
+        """
+
+        key = request_key(method=method, url=url)
+        response = self.responses.get(key)
+        if response is None:
+            response = self.responses.get(key.split('?')[0])
+
+        return response
+
+    def add(self, method: str,
+            url: str,
+            status: int,
+            headers: Dict[str, str],
+            body: str) -> None:
+        """ Adds a response, also kept under its path to serve requests with other parameters.
+
+        Arguments:
+            method : The HTTP method.
+            url : The request URL.
+            status : The response status code.
+            headers : The response headers.
+            body : The response body.
+
+        Returns:
+            None
+        """
+
+        headers = {name: value for name, value in headers.items() if name.lower() not in self.EXCLUDED_HEADERS}
+        response = dict(status=status, headers=headers, body=body)
+        key = request_key(method=method, url=url)
+        self.responses[key] = response
+        self.responses.setdefault(key.split('?')[0], response)
+
+    def save(self, file_path: str = '') -> None:
+        """ Saves the responses on the fixtures file.
+
+        Arguments:
+            file_path : The file path, defaults to the loaded one.
+
+        Returns:
+            None
+        """
+
+        file_path = file_path or self.file_path
+        directory = path.dirname(file_path)
+        if directory:
+            makedirs(directory, exist_ok=True)
+
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fixtures_file:
+            json.dump(self.responses, fixtures_file, ensure_ascii=False, indent=1)
+
+        replace(tmp_path, file_path)
+
+    def __len__(self):
+        return len(self.responses)
+
+
+class Recorder:
+    """ A session wrapper that records every response into the fixtures. """
+
+    def __init__(self, session: Any,
+                 fixtures: Fixtures):
+        """ Initialize a Recorder instance.
+
+        Arguments:
+            session : The live session.
+            fixtures : The fixtures that receive the responses.
+
+        Returns:
+            None
+        """
+
+        self.session = session
+        self.fixtures = fixtures
+        self._lock = Lock()
+
+    def get(self, url: str, **kwargs) -> Any:
+        return self.request('GET', url=url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> Any:
+        return self.request('POST', url=url, **kwargs)
+
+    def request(self, method: str,
+                url: str,
+                **kwargs) -> Any:
+        """ Makes a request with the live session and records its response.
+
+        Arguments:
+            method : The HTTP method.
+            url : The request URL.
+            kwargs : Extra arguments for the session request.
+
+        Returns:
+            The response.
+        """
+
+        response = self.session.request(method, url=url, **kwargs)
+        with self._lock:
+            self.fixtures.add(
+                method=method,
+                url=response.request.url,
+                status=response.status_code,
+                headers=dict(response.headers),
+                body=response.text
+            )
+
+        return response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.session, name)
@@ -0,0 +1,367 @@
+"""
+cornershop_scraper.mock.server
+------------------------------
+
+Provides a local stand-in of the Cornershop site and API. It answers the
+session handshake and the endpoints used by the scraper from recorded
+fixtures or a synthetic catalog, and can inject latency, rate limits and
+errors, so the crawls can be developed and benchmarked offline.
+"""
+
+import json
+import re
+from hashlib import sha1
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from math import ceil
+from random import Random
+from socketserver import ThreadingMixIn
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from cornershop_scraper.mock.catalog import SyntheticCatalog
+from cornershop_scraper.mock.fixtures import Fixtures
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MockServer:
+    """ A threaded HTTP server that mimics the Cornershop site and API. """
+
+    CSRF_TOKEN = 'mock-csrf-token'
+    HOME_PAGE = (
+        '<html><body><form method="post" action="/address">'
+        '<input type="hidden" name="csrfmiddlewaretoken" value="{token}">'
+        '</form></body></html>'
+    )
+    ROUTES = (
+        ('GET', re.compile(r'^/api/v1/countries$'), 'countries'),
+        ('GET', re.compile(r'^/api/v3/branch_groups$'), 'branch_groups'),
+        ('GET', re.compile(r'^/api/v3/branches/(?P<business_id>\d+)$'), 'branch'),
+        ('GET', re.compile(r'^/api/v2/branches/(?P<business_id>\d+)/aisles/(?P<aisle_id>[^/]+)/products$'), 'aisle'),
+        ('GET', re.compile(r'^/api/v2/branches/(?P<business_id>\d+)/search$'), 'search'),
+        ('GET', re.compile(r'^/img/(?P<name>[^/]+)$'), 'image'),
+        ('POST', re.compile(r'^/address$'), 'address'),
+        ('GET', re.compile(r'^/(?P<language>[a-z]{2}-[a-z]{2})/?$'), 'home'),
+    )
+    DEFAULT_IMAGE_SIZE = 4096
+
+    def __init__(self, catalog: SyntheticCatalog = None,
+                 fixtures: Fixtures = None,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 rate_limit: float = None,
+                 error_rate: float = 0.0,
+                 error_statuses: Tuple[int, ...] = (500, 502, 503),
+                 image_size: int = DEFAULT_IMAGE_SIZE,
+                 seed: int = None):
+        """ Initialize a MockServer instance.
+
+        The fixtures are answered first and the other requests are generated by the
+        catalog, which defaults to a small synthetic catalog when no fixtures are given.
+
+        Arguments:
+            catalog : The synthetic catalog.
+            fixtures : The recorded responses.
+            host : The host to bind.
+            port : The port to bind, zero picks a free port.
+            latency : The delay in seconds added to each response.
+            jitter : The maximum random delay in seconds added to the latency.
+            rate_limit : The requests per second accepted before answering 429, None disables it.
+            error_rate : The fraction of the API requests answered with an error.
+            error_statuses : The status codes of the injected errors.
+            image_size : The size in bytes of the served images.
+            seed : The seed of the latency jitter and the injected errors.
+
+        Returns:
+            None
+        """
+
+        if catalog is None and fixtures is None:
+            catalog = SyntheticCatalog()
+
+        self.catalog = catalog
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.image_size = image_size
+
+        self._random = Random(seed)
+        self._lock = Lock()
+        self._tokens = rate_limit or 0
+        self._updated_at = monotonic()
+        self._counters = dict(requests=0, bytes=0, rate_limited=0, errors=0, not_modified=0)
+        self._statuses = {}
+        self._thread = None
+
+        self._server = _ThreadingServer((host, port), self._make_handler())
+        if self.catalog is not None and not self.catalog.base_url:
+            self.catalog.base_url = self.url
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockServer':
+        """ Serves the requests on a background thread.
+
+        Returns:
+            The server itself.
+        """
+
+        if self._thread is None:
+            self._thread = Thread(target=self._server.serve_forever, name='cornershop-mock-server', daemon=True)
+            self._thread.start()
+
+        return self
+
+    def serve_forever(self) -> None:
+        """ Serves the requests on the current thread until interrupted.
+
+        Returns:
+            None
+        """
+
+        try:
+            self._server.serve_forever()
+
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        """ Stops the server and waits its thread.
+
+        Returns:
+            None
+        """
+
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+
+        self._server.server_close()
+
+    def stats(self) -> Dict[str, Any]:
+        """ Returns the number of requests, bytes, injected failures and responses by status.
+
+        Returns:
+            A dictionary with the server counters.
+        """
+
+        with self._lock:
+            return dict(self._counters, statuses=dict(self._statuses))
+
+    def handle(self, method: str,
+               url: str,
+               headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """ Returns the response of a request, applying the latency, rate limit and errors.
+
+        Arguments:
+            method : The HTTP method.
+            url : The request path with its query string.
+            headers : The request headers.
+
+        Returns:
+            A (status, headers, body) tuple.
+        """
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            sleep(delay)
+
+        wait = self._take_token()
+        if wait:
+            status, response_headers, body = 429, {'Retry-After': str(ceil(wait))}, b'{"detail": "Too many requests"}'
+            self._count(status, body, 'rate_limited')
+            return status, response_headers, body
+
+        parts = urlsplit(url)
+        if self.error_rate and parts.path.startswith('/api/') and self._random.random() < self.error_rate:
+            status = self._random.choice(self.error_statuses)
+            body = b'{"detail": "Injected error"}'
+            self._count(status, body, 'errors')
+            return status, {}, body
+
+        status, response_headers, body = self._route(method=method, url=url, path=parts.path, query=parts.query)
+        if status == 200 and parts.path.startswith('/api/'):
+            etag = '"' + sha1(body).hexdigest() + '"'
+            response_headers['ETag'] = etag
+            if headers.get('If-None-Match') == etag:
+                self._count(304, b'', 'not_modified')
+                return 304, {'ETag': etag}, b''
+
+        self._count(status, body)
+        return status, response_headers, body
+
+    def _route(self, method: str,
+               url: str,
+               path: str,
+               query: str) -> Tuple[int, Dict[str, str], bytes]:
+        """ Returns the recorded or generated response of a request.
+
+        Arguments:
+            method : The HTTP method.
+            url : The request path with its query string.
+            path : The request path.
+            query : The request query string.
+
+        Returns:
+            A (status, headers, body) tuple.
+        """
+
+        if self.fixtures is not None:
+            recorded = self.fixtures.get(method=method, url=url)
+            if recorded is not None:
+                return recorded['status'], dict(recorded['headers']), recorded['body'].encode('utf-8')
+
+        for route_method, pattern, name in self.ROUTES:
+            match = pattern.match(path)
+            if route_method == method and match and self.catalog is not None:
+                params = {key: values[0] for key, values in parse_qs(query, keep_blank_values=True).items()}
+                return getattr(self, f'_{name}')(params=params, **match.groupdict())
+
+        return self._json(None)
+
+    def _home(self, params: Dict[str, str], language: str) -> Tuple[int, Dict[str, str], bytes]:
+        headers = {
+            'Content-Type': 'text/html; charset=utf-8',
+            'Set-Cookie': f'csrftoken={self.CSRF_TOKEN}; Path=/',
+        }
+        return 200, headers, self.HOME_PAGE.format(token=self.CSRF_TOKEN).encode('utf-8')
+
+    def _address(self, params: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        status, headers, body = self._json({'ok': True})
+        headers['Set-Cookie'] = 'sessionid=mock-session; Path=/'
+        return status, headers, body
+
+    def _countries(self, params: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        return self._json(self.catalog.countries())
+
+    def _branch_groups(self, params: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        return self._json(self.catalog.branch_groups())
+
+    def _branch(self, params: Dict[str, str], business_id: str) -> Tuple[int, Dict[str, str], bytes]:
+        return self._json(self.catalog.branch(int(business_id)))
+
+    def _aisle(self, params: Dict[str, str], business_id: str, aisle_id: str) -> Tuple[int, Dict[str, str], bytes]:
+        return self._json(self.catalog.aisle_products(int(business_id), aisle_id))
+
+    def _search(self, params: Dict[str, str], business_id: str) -> Tuple[int, Dict[str, str], bytes]:
+        return self._json(self.catalog.search(int(business_id), params.get('query', '')))
+
+    def _image(self, params: Dict[str, str], name: str) -> Tuple[int, Dict[str, str], bytes]:
+        seed = sha1(name.encode('utf-8')).digest()
+        body = (seed * (self.image_size // len(seed) + 1))[:self.image_size]
+        return 200, {'Content-Type': 'image/jpeg'}, body
+
+    @staticmethod
+    def _json(data: Optional[Any]) -> Tuple[int, Dict[str, str], bytes]:
+        """ Returns a JSON response, or a not found response if there is no data.
+
+        Arguments:
+            data : The response data.
+
+        Returns:
+            A (status, headers, body) tuple.
+        """
+
+        if data is None:
+            return 404, {'Content-Type': 'application/json'}, b'{"detail": "Not found."}'
+
+        return 200, {'Content-Type': 'application/json'}, json.dumps(data).encode('utf-8')
+
+    def _take_token(self) -> float:
+        """ Takes a token of the rate limit bucket.
+
+        Returns:
+            Zero if the request is accepted, otherwise the seconds until a token is available.
+        """
+
+        if not self.rate_limit:
+            return 0.0
+
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._updated_at) * self.rate_limit)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+
+            return (1 - self._tokens) / self.rate_limit
+
+    def _count(self, status: int,
+               body: bytes,
+               counter: str = None) -> None:
+        """ Updates the server counters with a response.
+
+        Arguments:
+            status : The response status code.
+            body : The response body.
+            counter : An extra counter to increment.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._counters['requests'] += 1
+            self._counters['bytes'] += len(body)
+            self._statuses[status] = self._statuses.get(status, 0) + 1
+            if counter:
+                self._counters[counter] += 1
+
+    def _make_handler(self) -> type:
+        """ Returns the request handler class bound to this server.
+
+        Returns:
+            A BaseHTTPRequestHandler subclass.
+        """
+
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+
+                self._respond('POST')
+
+            def _respond(self, method: str):
+                status, headers, body = mock.handle(method=method, url=self.path, headers=self.headers)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
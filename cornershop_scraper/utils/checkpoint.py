@@ -0,0 +1,203 @@
+"""
+cornershop_scraper.utils.checkpoint
+-----------------------------------
+
+This module provides a checkpoint journal of the crawls. It records on disk
+each aisle whose products were persisted and each finished store, so a crawl
+that dies halfway can be resumed from the last completed unit instead of
+starting over.
+"""
+
+import sqlite3
+from os import makedirs, path
+from threading import Lock
+from time import time
+from typing import Any, Set
+
+
+class CheckpointJournal:
+    """ A thread-safe disk journal of the completed crawl units. """
+
+    DEFAULT_PATH = path.join(path.expanduser('~'), '.cornershop_scraper', 'checkpoint.sqlite')
+    SCHEMA = (
+        '''
+        CREATE TABLE IF NOT EXISTS aisles (
+            store TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            department TEXT NOT NULL,
+            aisle TEXT NOT NULL,
+            products INTEGER NOT NULL,
+            completed_at REAL NOT NULL,
+            PRIMARY KEY (store, file_name, aisle)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS stores (
+            store TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            products INTEGER NOT NULL,
+            completed_at REAL NOT NULL,
+            PRIMARY KEY (store, file_name)
+        ) WITHOUT ROWID
+        ''',
+    )
+
+    def __init__(self, file_path: str = ''):
+        """ Initialize a CheckpointJournal instance.
+
+        Arguments:
+            file_path : The path of the journal database.
+
+        Returns:
+            None
+        """
+
+        self.file_path = file_path or self.DEFAULT_PATH
+
+        directory = path.dirname(self.file_path)
+        if directory:
+            makedirs(directory, exist_ok=True)
+
+        self._lock = Lock()
+        self._connection = sqlite3.connect(self.file_path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        with self._connection:
+            for statement in self.SCHEMA:
+                self._connection.execute(statement)
+
+    def completed_aisles(self, store: Any,
+                         file_name: str) -> Set[str]:
+        """ Returns the aisles of a store already saved on an output file.
+
+        Arguments:
+            store : The store business ID.
+            file_name : The output file name.
+
+        Returns:
+            A set of aisle IDs.
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT aisle FROM aisles WHERE store = ? AND file_name = ?', (str(store), file_name)
+            ).fetchall()
+
+        return {row[0] for row in rows}
+
+    def complete_aisle(self, store: Any,
+                       file_name: str,
+                       department: Any,
+                       aisle: Any,
+                       products: int) -> None:
+        """ Records an aisle whose products were saved on the output file.
+
+        Arguments:
+            store : The store business ID.
+            file_name : The output file name.
+            department : The department ID.
+            aisle : The aisle ID.
+            products : The number of saved products.
+
+        Returns:
+            None
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO aisles VALUES (?, ?, ?, ?, ?, ?)',
+                (str(store), file_name, str(department), str(aisle), products, time())
+            )
+
+    def is_store_completed(self, store: Any,
+                           file_name: str) -> bool:
+        """ Returns if all the products of a store were saved on the output file.
+
+        Arguments:
+            store : The store business ID.
+            file_name : The output file name.
+
+        Returns:
+            True if the store is completed.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT 1 FROM stores WHERE store = ? AND file_name = ?', (str(store), file_name)
+            ).fetchone()
+
+        return row is not None
+
+    def complete_store(self, store: Any,
+                       file_name: str) -> int:
+        """ Records a store whose aisles were all saved on the output file.
+
+        Arguments:
+            store : The store business ID.
+            file_name : The output file name.
+
+        Returns:
+            The number of products saved across all the runs.
+        """
+
+        products = self.products(store=store, file_name=file_name)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO stores VALUES (?, ?, ?, ?)', (str(store), file_name, products, time())
+            )
+
+        return products
+
+    def products(self, store: Any,
+                 file_name: str) -> int:
+        """ Returns the number of products of a store saved on the output file across all the runs.
+
+        Arguments:
+            store : The store business ID.
+            file_name : The output file name.
+
+        Returns:
+            The number of products.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT COALESCE(SUM(products), 0) FROM aisles WHERE store = ? AND file_name = ?',
+                (str(store), file_name)
+            ).fetchone()
+
+        return row[0]
+
+    def clear(self, store: Any = None,
+              file_name: str = None) -> None:
+        """ Removes the recorded units, so the next crawl starts over.
+
+        Arguments:
+            store : The store business ID, if not given removes the units of all the stores.
+            file_name : The output file name, if not given removes the units of all the store files.
+
+        Returns:
+            None
+        """
+
+        with self._lock, self._connection:
+            for table in ('aisles', 'stores'):
+                if store is None:
+                    self._connection.execute(f'DELETE FROM {table}')
+
+                elif file_name is None:
+                    self._connection.execute(f'DELETE FROM {table} WHERE store = ?', (str(store),))
+
+                else:
+                    self._connection.execute(
+                        f'DELETE FROM {table} WHERE store = ? AND file_name = ?', (str(store), file_name)
+                    )
+
+    def close(self) -> None:
+        """ Closes the journal database.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._connection.close()
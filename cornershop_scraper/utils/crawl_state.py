@@ -0,0 +1,151 @@
+"""
+cornershop_scraper.utils.crawl_state
+------------------------------------
+
+This module keeps on disk the validators of each crawled aisle, the ETag and
+Last-Modified headers when the API returns them and a hash of its products
+otherwise, so an incremental crawl can skip the aisles that did not change
+since the last run.
+"""
+
+import sqlite3
+from hashlib import sha1
+from os import makedirs, path
+from threading import Lock
+from time import time
+from typing import Any, Dict, List, Optional
+
+
+class CrawlState:
+    """ A thread-safe disk store of the aisles validators. """
+
+    DEFAULT_PATH = path.join(path.expanduser('~'), '.cornershop_scraper', 'crawl_state.sqlite')
+    HASH_FIELDS = ('id', 'price', 'availability_status')
+
+    def __init__(self, file_path: str = ''):
+        """ Initialize a CrawlState instance.
+
+        Arguments:
+            file_path : The path of the state database.
+
+        Returns:
+            None
+        """
+
+        self.file_path = file_path or self.DEFAULT_PATH
+
+        directory = path.dirname(self.file_path)
+        if directory:
+            makedirs(directory, exist_ok=True)
+
+        self._lock = Lock()
+        self._connection = sqlite3.connect(self.file_path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        with self._connection:
+            self._connection.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS aisles (
+                    store TEXT NOT NULL,
+                    aisle TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    products INTEGER,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (store, aisle)
+                ) WITHOUT ROWID
+                '''
+            )
+
+    def get(self, store: Any,
+            aisle: Any) -> Optional[Dict[str, Any]]:
+        """ Returns the validators saved for an aisle.
+
+        Arguments:
+            store : The store business ID.
+            aisle : The aisle ID.
+
+        Returns:
+            A dictionary with the etag, last_modified, content_hash, products and updated_at keys or None.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                '''
+                SELECT etag, last_modified, content_hash, products, updated_at
+                FROM aisles WHERE store = ? AND aisle = ?
+                ''',
+                (str(store), str(aisle))
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return dict(zip(('etag', 'last_modified', 'content_hash', 'products', 'updated_at'), row))
+
+    def set(self, store: Any,
+            aisle: Any,
+            etag: str = None,
+            last_modified: str = None,
+            content_hash: str = None,
+            products: int = None) -> None:
+        """ Saves the validators of an aisle.
+
+        Arguments:
+            store : The store business ID.
+            aisle : The aisle ID.
+            etag : The ETag header of the aisle response.
+            last_modified : The Last-Modified header of the aisle response.
+            content_hash : The hash of the aisle products.
+            products : The number of products of the aisle.
+
+        Returns:
+            None
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO aisles VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (str(store), str(aisle), etag, last_modified, content_hash, products, time())
+            )
+
+    def clear(self, store: Any = None) -> None:
+        """ Removes the saved validators, so the next incremental crawl retrieves every aisle.
+
+        Arguments:
+            store : The store business ID, if not given removes the validators of all the stores.
+
+        Returns:
+            None
+        """
+
+        with self._lock, self._connection:
+            if store is None:
+                self._connection.execute('DELETE FROM aisles')
+
+            else:
+                self._connection.execute('DELETE FROM aisles WHERE store = ?', (str(store),))
+
+    def close(self) -> None:
+        """ Closes the state database.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._connection.close()
+
+    @classmethod
+    def content_hash(cls, json: List[Dict[str, Any]]) -> str:
+        """ Returns a hash of the aisle products that does not depend on its order.
+
+        Arguments:
+            json : The list of products retrieved from the API.
+
+        Returns:
+            The hexadecimal hash.
+        """
+
+        lines = sorted('\t'.join(str(info.get(field)) for field in cls.HASH_FIELDS) for info in json)
+        return sha1('\n'.join(lines).encode('utf-8')).hexdigest()
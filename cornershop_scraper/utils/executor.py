@@ -0,0 +1,525 @@
+"""
+cornershop_scraper.utils.executor
+---------------------------------
+
+This module provides the request executor used by Cornershop and Store. It
+puts every API request through the response cache, the rate limiter, a per
+host circuit breaker and an adaptive concurrency limit, and retries the
+throttled and failed requests with a jittered exponential backoff that
+honours the Retry-After header.
+
+The concurrency limit and the rate of each host follow an additive increase,
+multiplicative decrease policy: they grow after the successful requests and
+are halved when the server throttles, so a crawl holds the fastest pace the
+server tolerates, even a sequential one.
+"""
+
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from random import uniform
+from threading import Condition, Lock
+from time import monotonic, perf_counter, sleep, time
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from cloudscraper.exceptions import CloudflareException
+from requests.exceptions import RequestException
+
+from cornershop_scraper.utils.limiter import RateLimiter
+from cornershop_scraper.utils.metrics import Metrics
+from cornershop_scraper.utils.response_cache import ResponseCache
+
+
+class RequestError(Warning):
+    """ A request that failed after all its retries. """
+
+    def __init__(self, message: str,
+                 url: str,
+                 status: int = 0):
+        super(RequestError, self).__init__(message)
+        self.url = url
+        self.status = status
+
+
+class CircuitOpenError(RequestError):
+    """ A request refused because the circuit of its host is open. """
+
+
+class CircuitBreaker:
+    """ Stops the requests to a host after consecutive failures, until it recovers. """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        """ Initialize a CircuitBreaker instance.
+
+        Arguments:
+            failure_threshold : The consecutive failures that open the circuit.
+            reset_timeout : The seconds the circuit stays open before a trial request.
+
+        Returns:
+            None
+        """
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = Lock()
+
+    def allow(self) -> bool:
+        """ Returns if a request can be made. After the timeout only one trial request is let through.
+
+        Returns:
+            True if the request is allowed.
+        """
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial = False
+
+            if self.state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+
+            return False
+
+    def release(self) -> None:
+        """ Ends the trial request, so a trial interrupted before it succeeded or failed lets the next one through.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial = False
+
+    def success(self) -> None:
+        """ Records a successful request, closing the circuit.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def failure(self) -> None:
+        """ Records a failed request, opening the circuit on the threshold or a failed trial.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = monotonic()
+
+
+class AdaptiveConcurrency:
+    """ A limit of requests in flight and a rate factor adjusted by additive increase and multiplicative decrease. """
+
+    def __init__(self, initial: int = 8,
+                 minimum: int = 1,
+                 maximum: int = 64,
+                 decrease_factor: float = 0.5,
+                 cooldown: float = 1.0,
+                 minimum_rate: float = 0.05,
+                 rate_increase: float = 0.02):
+        """ Initialize an AdaptiveConcurrency instance.
+
+        Arguments:
+            initial : The initial limit.
+            minimum : The lowest limit.
+            maximum : The highest limit.
+            decrease_factor : The factor applied to the limit and the rate when the server throttles.
+            cooldown : The seconds after a decrease in which the throttled requests already in flight are ignored.
+            minimum_rate : The lowest fraction of the rate limiter rate.
+            rate_increase : The fraction of the rate limiter rate recovered after each successful request.
+
+        Returns:
+            None
+        """
+
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.minimum_rate = minimum_rate
+        self.rate_increase = rate_increase
+        self.rate_factor = 1.0
+        self.in_flight = 0
+        self._decreased_at = -cooldown
+        self._condition = Condition()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """ Waits until the number of requests in flight is below the limit and holds a slot.
+
+        Returns:
+            A context manager holding the slot.
+        """
+
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+
+            self.in_flight += 1
+
+        try:
+            yield
+
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify()
+
+    def success(self) -> float:
+        """ Grows the limit by one after a window of successful requests and recovers part of the rate.
+
+        Returns:
+            The rate factor.
+        """
+
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.rate_factor = min(1.0, self.rate_factor + self.rate_increase)
+            self._condition.notify()
+            return self.rate_factor
+
+    def throttled(self) -> float:
+        """ Shrinks the limit and the rate, once per cooldown.
+
+        Returns:
+            The rate factor.
+        """
+
+        with self._condition:
+            now = monotonic()
+            if now - self._decreased_at >= self.cooldown:
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                self.rate_factor = max(self.minimum_rate, self.rate_factor * self.decrease_factor)
+                self._decreased_at = now
+
+            return self.rate_factor
+
+
+class RequestExecutor:
+    """ Makes the API requests with caching, throttling, retries and circuit breaking. """
+
+    DEFAULT_MAX_RETRIES = 4
+    DEFAULT_BACKOFF = 0.5
+    DEFAULT_MAX_BACKOFF = 30.0
+    DEFAULT_MAX_RETRY_AFTER = 120.0
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    THROTTLE_STATUSES = (429, 503)
+    CONDITIONAL_HEADERS = ('if-none-match', 'if-modified-since')
+
+    def __init__(self, rate_limiter: RateLimiter = None,
+                 response_cache: ResponseCache = None,
+                 metrics: Metrics = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF,
+                 max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0,
+                 concurrency: Dict[str, Any] = None):
+        """ Initialize a RequestExecutor instance.
+
+        Arguments:
+            rate_limiter : The rate limiter of the requests, defaults to RateLimiter().
+            response_cache : The cache of the responses.
+            metrics : The collector of the requests metrics.
+            max_retries : The retries of a throttled or failed request.
+            backoff : The base delay in seconds of the exponential backoff.
+            max_backoff : The highest backoff delay in seconds.
+            max_retry_after : The highest Retry-After delay in seconds that is honoured.
+            failure_threshold : The consecutive failures that open the circuit of a host.
+            reset_timeout : The seconds the circuit of a host stays open.
+            concurrency : The AdaptiveConcurrency arguments of each host.
+
+        Returns:
+            None
+        """
+
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.response_cache = response_cache
+        self.metrics = metrics or Metrics()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.concurrency = concurrency or {}
+
+        self._hosts = {}
+        self._lock = Lock()
+
+    def get(self, session: Any,
+            url: str,
+            locality: str = '',
+            **kwargs) -> Any:
+        """ Makes a GET request.
+
+        Arguments:
+            session : The session that makes the request.
+            url : The request URL.
+            locality : The location of the session, part of the response cache key.
+            kwargs : Extra arguments for the session request.
+
+        Returns:
+            The response.
+        """
+
+        return self.request(session, 'GET', url=url, locality=locality, **kwargs)
+
+    def request(self, session: Any,
+                method: str,
+                url: str,
+                locality: str = '',
+                **kwargs) -> Any:
+        """ Makes a request, returning a cached response when possible and retrying
+        the throttled and failed attempts. The conditional requests skip the cache,
+        since their answer depends on the validators sent.
+
+        Arguments:
+            session : The session that makes the request.
+            method : The HTTP method.
+            url : The request URL.
+            locality : The location of the session, part of the response cache key.
+            kwargs : Extra arguments for the session request.
+
+        Returns:
+            The response. The responses with other error statuses, as 404, are returned as they are.
+
+        Raises:
+            CircuitOpenError : If the host circuit is open.
+            RequestError : If the request still fails after the retries.
+        """
+
+        params = kwargs.get('params')
+        conditional = any(header.lower() in self.CONDITIONAL_HEADERS for header in kwargs.get('headers') or {})
+        cacheable = method == 'GET' and self.response_cache is not None and not conditional
+        started_at = perf_counter()
+        if cacheable:
+            response = self.response_cache.get(url=url, params=params, locality=locality)
+            if response is not None:
+                elapsed = perf_counter() - started_at
+                self.metrics.record_request(method, url, response.status_code, elapsed, len(response.content), 0, True)
+                return response
+
+        breaker, controller = self._host(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f'The circuit of {urlsplit(url).netloc} is open.', url=url)
+
+        try:
+            return self._send(session, method, url, breaker, controller, locality, cacheable, **kwargs)
+
+        finally:
+            breaker.release()
+
+    def _send(self, session: Any,
+              method: str,
+              url: str,
+              breaker: CircuitBreaker,
+              controller: AdaptiveConcurrency,
+              locality: str = '',
+              cacheable: bool = False,
+              **kwargs) -> Any:
+        """ Makes the attempts of a request allowed by the circuit breaker.
+
+        Arguments:
+            session : The session that makes the request.
+            method : The HTTP method.
+            url : The request URL.
+            breaker : The circuit breaker of the URL host.
+            controller : The concurrency controller of the URL host.
+            locality : The location of the session, part of the response cache key.
+            cacheable : If true saves the response on the cache.
+            kwargs : Extra arguments for the session request.
+
+        Returns:
+            The response.
+        """
+
+        params = kwargs.get('params')
+        send = getattr(session, method.lower())
+        response, status, error, elapsed = None, 0, None, 0.0
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(url)
+            with controller.slot():
+                started_at = perf_counter()
+                try:
+                    response, error = send(url=url, **kwargs), None
+                    status = response.status_code
+
+                except (RequestException, CloudflareException) as exception:
+                    response, status, error = None, 0, exception
+
+                elapsed += perf_counter() - started_at
+
+            throttled = status in self.THROTTLE_STATUSES or self.is_challenge(response, url)
+            throttled = throttled or isinstance(error, CloudflareException)
+            if response is not None and status not in self.RETRY_STATUSES and not throttled:
+                breaker.success()
+                self._scale_rate(url=url, factor=controller.success())
+                self.metrics.record_request(method, url, status, elapsed, len(response.content), attempt)
+                if cacheable:
+                    self.response_cache.set(response, url=url, params=params, locality=locality)
+
+                return response
+
+            if throttled:
+                self._scale_rate(url=url, factor=controller.throttled())
+
+            if attempt < self.max_retries:
+                sleep(self.retry_delay(attempt=attempt, response=response))
+
+        breaker.failure()
+        size = len(response.content) if response is not None else 0
+        self.metrics.record_request(method, url, status, elapsed, size, self.max_retries)
+        reason = f'status {status}' if response is not None else repr(error)
+        raise RequestError(f'The request to {url} failed after {self.max_retries} retries with {reason}.', url, status)
+
+    def retry_delay(self, attempt: int,
+                    response: Any = None) -> float:
+        """ Returns the delay before a retry, the Retry-After header if given or a jittered backoff.
+
+        Arguments:
+            attempt : The failed attempt, from zero.
+            response : The failed response.
+
+        Returns:
+            The delay in seconds.
+        """
+
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+
+        return uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(response: Any) -> Optional[float]:
+        """ Returns the seconds asked by the Retry-After header, given in seconds or as a date.
+
+        Arguments:
+            response : The response.
+
+        Returns:
+            The delay in seconds or None.
+        """
+
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+
+        except ValueError:
+            pass
+
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def is_challenge(response: Any,
+                     url: str) -> bool:
+        """ Returns if the response is a Cloudflare challenge or an HTML page given to an API request,
+        only for the 403, 429 and 503 statuses, so an HTML error page of a proxy is not taken as throttling.
+
+        Arguments:
+            response : The response.
+            url : The request URL.
+
+        Returns:
+            True if the response is a challenge.
+        """
+
+        if response is None:
+            return False
+
+        headers = response.headers
+        if response.status_code not in (403, 429, 503):
+            return False
+
+        if 'cloudflare' in headers.get('Server', '').lower():
+            return True
+
+        return '/api/' in url and 'text/html' in headers.get('Content-Type', '')
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """ Returns the circuit state and the concurrency limit of each host.
+
+        Returns:
+            A dictionary mapping each host to its state.
+        """
+
+        with self._lock:
+            hosts = dict(self._hosts)
+
+        return {
+            host: dict(
+                circuit=breaker.state,
+                failures=breaker.failures,
+                concurrency=int(controller.limit),
+                in_flight=controller.in_flight,
+                rate_factor=controller.rate_factor
+            )
+            for host, (breaker, controller) in hosts.items()
+        }
+
+    def _scale_rate(self, url: str,
+                    factor: float) -> None:
+        """ Applies the rate factor of the concurrency controller to the rate limiter, when it changed.
+
+        Arguments:
+            url : The request URL.
+            factor : The rate factor.
+
+        Returns:
+            None
+        """
+
+        if self.rate_limiter.factor(url) != factor:
+            self.rate_limiter.scale(url, factor)
+
+    def _host(self, url: str) -> Tuple[CircuitBreaker, AdaptiveConcurrency]:
+        """ Returns the circuit breaker and concurrency controller of the URL host.
+
+        Arguments:
+            url : The request URL.
+
+        Returns:
+            A (breaker, controller) tuple.
+        """
+
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (
+                    CircuitBreaker(failure_threshold=self.failure_threshold, reset_timeout=self.reset_timeout),
+                    AdaptiveConcurrency(**self.concurrency)
+                )
+
+            return self._hosts[host]
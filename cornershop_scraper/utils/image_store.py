@@ -0,0 +1,399 @@
+"""
+cornershop_scraper.utils.image_store
+------------------------------------
+
+This module provides a content-addressed store of the product images shared
+by every store and output directory. The image URLs are mapped to the hash
+of their content, each distinct image is kept once and the output files are
+linked to it, so an export of many stores downloads each image once and
+takes disk proportional to the distinct images. The least recently used
+images are evicted when the store is full.
+"""
+
+import errno
+import shutil
+import sqlite3
+from hashlib import sha256
+from os import link, makedirs, path, remove, replace, symlink
+from threading import Lock
+from time import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+
+class ImageStore:
+    """ A thread-safe content-addressed image store with LRU eviction by size. """
+
+    DEFAULT_PATH = path.join(path.expanduser('~'), '.cornershop_scraper', 'images')
+    DEFAULT_MAX_SIZE = 4 * 1024 * 1024 * 1024
+    LINK_MODES = ('hardlink', 'symlink', 'copy')
+    FALLBACK_ERRORS = (errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EMLINK)
+    CHUNK_SIZE = 64 * 1024
+    EVICT_BATCH = 64
+
+    def __init__(self, file_path: str = '',
+                 max_size: int = DEFAULT_MAX_SIZE,
+                 link_mode: str = 'hardlink'):
+        """ Initialize an ImageStore instance.
+
+        Arguments:
+            file_path : The directory of the store.
+            max_size : The maximum size in bytes of the stored images.
+            link_mode : How the output files point to the stored images, one of hardlink, symlink and copy.
+                The hardlinks fall back to symlinks and the symlinks to copies when the file system does not
+                support them, as across devices.
+                The hardlinked and copied outputs outlive the evicted images, the symlinked ones do not.
+
+        Returns:
+            None
+        """
+
+        if link_mode not in self.LINK_MODES:
+            raise Warning(f'The link mode must be one of {", ".join(self.LINK_MODES)}.')
+
+        self.file_path = file_path or self.DEFAULT_PATH
+        self.max_size = max_size
+        self.link_mode = link_mode
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        makedirs(path.join(self.file_path, 'tmp'), exist_ok=True)
+        self._lock = Lock()
+        self._pinned = {}
+        self._connection = sqlite3.connect(path.join(self.file_path, 'index.sqlite'), check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        with self._connection:
+            self._connection.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS blobs (
+                    hash TEXT PRIMARY KEY,
+                    extension TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                '''
+            )
+            self._connection.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS urls (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    hash TEXT NOT NULL
+                )
+                '''
+            )
+            self._connection.execute('CREATE INDEX IF NOT EXISTS blobs_accessed ON blobs (accessed_at)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS urls_hash ON urls (hash)')
+
+        self._size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+
+    def get(self, url: str) -> Optional[str]:
+        """ Returns the path of the stored image of an URL. The image is pinned, so it is
+        not evicted, until it is linked.
+
+        Arguments:
+            url : The image URL.
+
+        Returns:
+            The image path or None if the URL was not stored.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT blobs.hash, blobs.extension FROM urls JOIN blobs ON blobs.hash = urls.hash WHERE urls.key = ?',
+                (self.make_key(url=url),)
+            ).fetchone()
+
+            blob_path = self.blob_path(*row) if row else None
+            if blob_path is None or not path.isfile(blob_path):
+                self.misses += 1
+                return None
+
+            with self._connection:
+                self._connection.execute('UPDATE blobs SET accessed_at = ? WHERE hash = ?', (time(), row[0]))
+
+            self._pin(blob_path=blob_path)
+            self.hits += 1
+
+        return blob_path
+
+    def put(self, url: str,
+            file_path: str) -> str:
+        """ Moves a downloaded image into the store, keeping a single copy of each content.
+        The image is pinned, so it is not evicted, until it is linked.
+
+        Arguments:
+            url : The image URL.
+            file_path : The downloaded image, on the same file system as the store, as given by temp_path.
+
+        Returns:
+            The path of the stored image.
+        """
+
+        content_hash = self.content_hash(file_path=file_path)
+        extension = path.splitext(url.split('?')[0].split('#')[0])[1].lstrip('.').lower()[:8] or 'img'
+        size = path.getsize(file_path)
+        with self._lock:
+            row = self._connection.execute('SELECT extension FROM blobs WHERE hash = ?', (content_hash,)).fetchone()
+            if row:
+                extension = row[0]
+
+            blob_path = self.blob_path(content_hash, extension)
+            if path.isfile(blob_path):
+                remove(file_path)
+
+            else:
+                makedirs(path.dirname(blob_path), exist_ok=True)
+                replace(file_path, blob_path)
+
+            store_size, evictions = self._size, self.evictions
+            try:
+                with self._connection:
+                    self._connection.execute(
+                        'INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?)', (content_hash, extension, size, time())
+                    )
+                    self._connection.execute(
+                        'INSERT OR REPLACE INTO urls VALUES (?, ?, ?)', (self.make_key(url=url), url, content_hash)
+                    )
+                    if not row:
+                        self._size += size
+
+                    evicted = self._evict(keep=blob_path)
+
+            except sqlite3.Error:
+                self._size, self.evictions = store_size, evictions
+                raise
+
+            self._pin(blob_path=blob_path)
+            for evicted_path in evicted:
+                if path.isfile(evicted_path):
+                    remove(evicted_path)
+
+        return blob_path
+
+    def link(self, blob_path: str,
+             full_path: str) -> str:
+        """ Points an output file to a stored image, replacing the existing file, and unpins the image.
+
+        Arguments:
+            blob_path : The stored image path, as returned by get or put.
+            full_path : The output file path.
+
+        Returns:
+            The link mode used.
+
+        Raises:
+            OSError : If the image can not be linked, as when it is missing, without falling back to other modes.
+        """
+
+        try:
+            return self._link(blob_path=blob_path, full_path=full_path)
+
+        finally:
+            with self._lock:
+                self._unpin(blob_path=blob_path)
+
+    def _link(self, blob_path: str,
+              full_path: str) -> str:
+        """ Points an output file to a stored image, falling back to the next link mode only when
+        the file system does not support the current one.
+
+        Arguments:
+            blob_path : The stored image path.
+            full_path : The output file path.
+
+        Returns:
+            The link mode used.
+        """
+
+        tmp_path = f'{full_path}.{uuid4().hex}.link'
+        modes = self.LINK_MODES[self.LINK_MODES.index(self.link_mode):]
+        for mode in modes:
+            try:
+                if mode == 'hardlink':
+                    link(blob_path, tmp_path)
+
+                elif mode == 'symlink':
+                    symlink(path.abspath(blob_path), tmp_path)
+
+                else:
+                    shutil.copyfile(blob_path, tmp_path)
+
+                replace(tmp_path, full_path)
+                return mode
+
+            except OSError as error:
+                if path.lexists(tmp_path):
+                    remove(tmp_path)
+
+                if mode == modes[-1] or error.errno not in self.FALLBACK_ERRORS:
+                    raise
+
+    def temp_path(self) -> str:
+        """ Returns a new path to download an image before putting it on the store.
+
+        Returns:
+            The temporary path.
+        """
+
+        return path.join(self.file_path, 'tmp', uuid4().hex)
+
+    def blob_path(self, content_hash: str,
+                  extension: str) -> str:
+        """ Returns the path of a stored image.
+
+        Arguments:
+            content_hash : The image content hash.
+            extension : The image extension.
+
+        Returns:
+            The image path.
+        """
+
+        return path.join(self.file_path, 'objects', content_hash[:2], f'{content_hash}.{extension}')
+
+    def stats(self) -> Dict[str, Any]:
+        """ Returns the hit and miss counters and the store size.
+
+        Returns:
+            A dictionary with the store statistics.
+        """
+
+        with self._lock:
+            images, size = self._connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+            urls = self._connection.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+
+        requests = self.hits + self.misses
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / requests if requests else 0.0,
+            evictions=self.evictions,
+            images=images,
+            urls=urls,
+            size=size
+        )
+
+    def clear(self) -> None:
+        """ Removes all the stored images.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            with self._connection:
+                self._connection.execute('DELETE FROM urls')
+                self._connection.execute('DELETE FROM blobs')
+
+            self._size = 0
+            shutil.rmtree(path.join(self.file_path, 'objects'), ignore_errors=True)
+
+    def close(self) -> None:
+        """ Closes the store index.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def make_key(url: str) -> str:
+        """ Returns the key of an image URL.
+
+        Arguments:
+            url : The image URL.
+
+        Returns:
+            The key.
+        """
+
+        return sha256(url.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def content_hash(cls, file_path: str) -> str:
+        """ Returns the hash of a file content.
+
+        Arguments:
+            file_path : The file path.
+
+        Returns:
+            The hexadecimal SHA-256 of the content.
+        """
+
+        content_hash = sha256()
+        with open(file_path, 'rb') as image_file:
+            for chunk in iter(lambda: image_file.read(cls.CHUNK_SIZE), b''):
+                content_hash.update(chunk)
+
+        return content_hash.hexdigest()
+
+    def _pin(self, blob_path: str) -> None:
+        """ Protects a stored image from the eviction until it is unpinned. Must be called holding the lock.
+
+        Arguments:
+            blob_path : The stored image path.
+
+        Returns:
+            None
+        """
+
+        self._pinned[blob_path] = self._pinned.get(blob_path, 0) + 1
+
+    def _unpin(self, blob_path: str) -> None:
+        """ Releases a pin of a stored image. Must be called holding the lock.
+
+        Arguments:
+            blob_path : The stored image path.
+
+        Returns:
+            None
+        """
+
+        pins = self._pinned.pop(blob_path, 0) - 1
+        if pins > 0:
+            self._pinned[blob_path] = pins
+
+    def _evict(self, keep: str = None) -> List[str]:
+        """ Removes from the index the least recently used images over the maximum size, except the
+        pinned ones, which are being linked. Must be called holding the lock, inside the transaction,
+        and the returned files removed once it commits, so a failed commit never loses an indexed image.
+
+        The size of the store is kept as a running total, and the images are read in batches
+        from the oldest, so a put only reads the images it evicts.
+
+        Arguments:
+            keep : The path of an image that is never evicted, the one being stored.
+
+        Returns:
+            The paths of the evicted images.
+        """
+
+        evicted = []
+        skipped = 0
+        while self._size > self.max_size:
+            blobs = self._connection.execute(
+                'SELECT hash, extension, size FROM blobs ORDER BY accessed_at LIMIT ? OFFSET ?',
+                (self.EVICT_BATCH, skipped)
+            ).fetchall()
+            if not blobs:
+                break
+
+            for content_hash, extension, blob_size in blobs:
+                blob_path = self.blob_path(content_hash, extension)
+                if blob_path == keep or blob_path in self._pinned:
+                    skipped += 1
+                    continue
+
+                self._connection.execute('DELETE FROM urls WHERE hash = ?', (content_hash,))
+                self._connection.execute('DELETE FROM blobs WHERE hash = ?', (content_hash,))
+                evicted.append(blob_path)
+                self.evictions += 1
+                self._size -= blob_size
+                if self._size <= self.max_size:
+                    break
+
+        return evicted
@@ -0,0 +1,105 @@
+"""
+cornershop_scraper.utils.limiter
+--------------------------------
+
+This module provides a token bucket rate limiter shared by the objects that
+make HTTP requests, so several stores, threads and image downloads can run
+together inside the same request budget of each host.
+"""
+
+from threading import Lock
+from time import monotonic, sleep
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+
+class RateLimiter:
+    """ A thread-safe token bucket rate limiter with one bucket per host. """
+
+    def __init__(self, rate: float = 1.0,
+                 burst: int = 1,
+                 limits: Dict[str, Tuple[float, int]] = None):
+        """ Initialize a RateLimiter instance.
+
+        Arguments:
+            rate : The allowed requests per second of each host.
+            burst : The maximum number of requests that can be made at once.
+            limits : A dictionary mapping a host to its own (rate, burst) pair.
+
+        Returns:
+            None
+        """
+
+        if rate <= 0 or burst < 1:
+            raise ValueError('The rate must be positive and the burst at least 1.')
+
+        self.rate = rate
+        self.burst = burst
+        self.limits = limits or {}
+        self._factors = {}
+        self._buckets = {}
+        self._lock = Lock()
+
+    def acquire(self, url: str) -> float:
+        """ Blocks until a request to the URL host fits in the budget.
+
+        The token is reserved while holding the lock and the wait happens outside
+        of it, so concurrent callers are served in arrival order without busy waiting.
+
+        Arguments:
+            url : The request URL.
+
+        Returns:
+            The time waited in seconds.
+        """
+
+        host = urlparse(url).netloc
+        rate, burst = self.limits.get(host, (self.rate, self.burst))
+
+        with self._lock:
+            rate *= self._factors.get(host, 1.0)
+            now = monotonic()
+            tokens, last = self._buckets.get(host, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate) - 1
+            self._buckets[host] = (tokens, now)
+
+        wait = -tokens / rate if tokens < 0 else 0.0
+        if wait:
+            sleep(wait)
+
+        return wait
+
+    def factor(self, url: str) -> float:
+        """ Returns the fraction of the rate allowed to the URL host.
+
+        Arguments:
+            url : The request URL.
+
+        Returns:
+            The rate factor.
+        """
+
+        return self._factors.get(urlparse(url).netloc, 1.0)
+
+    def scale(self, url: str,
+              factor: float) -> None:
+        """ Scales the rate of the URL host, as when the server throttles the requests.
+
+        Arguments:
+            url : The request URL.
+            factor : The fraction of the host rate that is allowed, one restores the full rate.
+
+        Returns:
+            None
+        """
+
+        if factor <= 0:
+            raise ValueError('The rate factor must be positive.')
+
+        host = urlparse(url).netloc
+        with self._lock:
+            if factor >= 1:
+                self._factors.pop(host, None)
+
+            else:
+                self._factors[host] = factor
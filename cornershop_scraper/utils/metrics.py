@@ -0,0 +1,281 @@
+"""
+cornershop_scraper.utils.metrics
+--------------------------------
+
+This module provides the instrumentation of the crawls. Every API request
+is recorded with its latency, status, size and retries, and the crawl
+phases are measured as spans. The events are handed to the registered hooks
+as they happen and aggregated by endpoint and span, which can be exported
+in the Prometheus text format.
+"""
+
+import re
+from bisect import bisect_left
+from contextlib import contextmanager
+from os import makedirs, path, replace
+from threading import Lock
+from time import perf_counter, time
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from urllib.parse import urlsplit
+
+
+class Metrics:
+    """ A thread-safe collector of request metrics and phase spans. """
+
+    LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    ID_SEGMENT = re.compile(r'/(?!v\d+(?:/|$))(?=[^/]*\d)[^/]+')
+    PREFIX = 'cornershop'
+
+    def __init__(self, hooks: List[Callable[[Dict[str, Any]], None]] = None):
+        """ Initialize a Metrics instance.
+
+        Arguments:
+            hooks : The callables that receive each event dictionary.
+
+        Returns:
+            None
+        """
+
+        self.hooks = list(hooks or [])
+        self._lock = Lock()
+        self._requests = {}
+        self._spans = {}
+
+    def add_hook(self, hook: Callable[[Dict[str, Any]], None]) -> None:
+        """ Registers a callable that receives each event.
+
+        The request events have the type, method, url, endpoint, status, elapsed, bytes,
+        retries and from_cache keys. The span events have the type, name, labels, start
+        and elapsed keys. The hooks run on the thread that made the request.
+
+        Arguments:
+            hook : The callable.
+
+        Returns:
+            None
+        """
+
+        self.hooks.append(hook)
+
+    def record_request(self, method: str,
+                       url: str,
+                       status: int,
+                       elapsed: float,
+                       size: int = 0,
+                       retries: int = 0,
+                       from_cache: bool = False) -> None:
+        """ Records a finished request.
+
+        Arguments:
+            method : The HTTP method.
+            url : The request URL.
+            status : The response status code, zero if no response was received.
+            elapsed : The seconds taken, including the retries.
+            size : The response body size in bytes.
+            retries : The number of retries made.
+            from_cache : If true the response came from the response cache.
+
+        Returns:
+            None
+        """
+
+        endpoint = self.endpoint(url)
+        with self._lock:
+            stats = self._requests.get(endpoint)
+            if stats is None:
+                stats = self._requests[endpoint] = dict(
+                    statuses={},
+                    buckets=[0] * (len(self.LATENCY_BUCKETS) + 1),
+                    count=0,
+                    seconds=0.0,
+                    bytes=0,
+                    retries=0,
+                    cache_hits=0
+                )
+
+            stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+            stats['buckets'][bisect_left(self.LATENCY_BUCKETS, elapsed)] += 1
+            stats['count'] += 1
+            stats['seconds'] += elapsed
+            stats['bytes'] += size
+            stats['retries'] += retries
+            stats['cache_hits'] += int(from_cache)
+
+        self._emit(dict(
+            type='request',
+            method=method,
+            url=url,
+            endpoint=endpoint,
+            status=status,
+            elapsed=elapsed,
+            bytes=size,
+            retries=retries,
+            from_cache=from_cache
+        ))
+
+    @contextmanager
+    def span(self, name: str, **labels: Any) -> Iterator[Dict[str, Any]]:
+        """ Measures a crawl phase, as the store data, an aisle or a write.
+
+        Arguments:
+            name : The span name.
+            labels : Values that identify the span, as the store or aisle ID.
+
+        Returns:
+            A context manager yielding the labels, which can be completed inside the span.
+        """
+
+        start = time()
+        counter = perf_counter()
+        try:
+            yield labels
+
+        finally:
+            elapsed = perf_counter() - counter
+            with self._lock:
+                stats = self._spans.setdefault(name, dict(count=0, seconds=0.0, max=0.0))
+                stats['count'] += 1
+                stats['seconds'] += elapsed
+                stats['max'] = max(stats['max'], elapsed)
+
+            self._emit(dict(type='span', name=name, labels=labels, start=start, elapsed=elapsed))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """ Returns a copy of the aggregated metrics.
+
+        Returns:
+            A dictionary with the requests by endpoint and the spans by name.
+        """
+
+        with self._lock:
+            requests = {
+                endpoint: dict(stats, statuses=dict(stats['statuses']), buckets=list(stats['buckets']))
+                for endpoint, stats in self._requests.items()
+            }
+            spans = {name: dict(stats) for name, stats in self._spans.items()}
+
+        return dict(requests=requests, spans=spans)
+
+    def reset(self) -> None:
+        """ Removes the aggregated metrics.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._requests = {}
+            self._spans = {}
+
+    def to_prometheus(self) -> str:
+        """ Returns the aggregated metrics in the Prometheus text format.
+
+        Returns:
+            The metrics text.
+        """
+
+        snapshot = self.snapshot()
+        prefix = self.PREFIX
+        lines = []
+
+        def family(name: str, kind: str, description: str, samples: List[Tuple[str, Dict[str, Any], Any]]):
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            for suffix, labels, value in samples:
+                text = ','.join(f'{key}="{self._escape(value)}"' for key, value in labels.items())
+                lines.append(f'{prefix}_{name}{suffix}' + (f'{{{text}}}' if text else '') + f' {value}')
+
+        requests = sorted(snapshot['requests'].items())
+        family('requests_total', 'counter', 'API requests by endpoint and status.', [
+            ('', dict(endpoint=endpoint, status=status), count)
+            for endpoint, stats in requests for status, count in sorted(stats['statuses'].items())
+        ])
+
+        latency = []
+        for endpoint, stats in requests:
+            cumulative = 0
+            for bound, count in zip(self.LATENCY_BUCKETS + ('+Inf',), stats['buckets']):
+                cumulative += count
+                latency.append(('_bucket', dict(endpoint=endpoint, le=bound), cumulative))
+
+            latency.append(('_sum', dict(endpoint=endpoint), stats['seconds']))
+            latency.append(('_count', dict(endpoint=endpoint), stats['count']))
+
+        family('request_duration_seconds', 'histogram', 'API request latency by endpoint.', latency)
+        family('response_bytes_total', 'counter', 'Response body bytes by endpoint.', [
+            ('', dict(endpoint=endpoint), stats['bytes']) for endpoint, stats in requests
+        ])
+        family('request_retries_total', 'counter', 'Retried requests by endpoint.', [
+            ('', dict(endpoint=endpoint), stats['retries']) for endpoint, stats in requests
+        ])
+        family('cache_hits_total', 'counter', 'Responses served by the response cache by endpoint.', [
+            ('', dict(endpoint=endpoint), stats['cache_hits']) for endpoint, stats in requests
+        ])
+
+        spans = sorted(snapshot['spans'].items())
+        family('span_duration_seconds', 'summary', 'Time spent on each crawl phase.', [
+            sample for name, stats in spans for sample in (
+                ('_sum', dict(span=name), stats['seconds']),
+                ('_count', dict(span=name), stats['count']),
+            )
+        ])
+        family('span_max_duration_seconds', 'gauge', 'Longest time spent on a crawl phase.', [
+            ('', dict(span=name), stats['max']) for name, stats in spans
+        ])
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, file_path: str) -> None:
+        """ Writes the metrics on a file read by the Prometheus node exporter textfile collector.
+        The file is replaced at once, so it is never read half written.
+
+        Arguments:
+            file_path : The file path, usually ending with .prom.
+
+        Returns:
+            None
+        """
+
+        directory = path.dirname(file_path)
+        if directory:
+            makedirs(directory, exist_ok=True)
+
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'w') as metrics_file:
+            metrics_file.write(self.to_prometheus())
+
+        replace(tmp_path, file_path)
+
+    @classmethod
+    def endpoint(cls, url: str) -> str:
+        """ Returns the endpoint of an URL, its path with the ID segments replaced.
+
+        Arguments:
+            url : The request URL.
+
+        Returns:
+            The endpoint, as /api/v2/branches/{id}/aisles/{id}/products.
+        """
+
+        return cls.ID_SEGMENT.sub('/{id}', urlsplit(url).path) or '/'
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        """ Hands an event to the hooks. A failing hook does not stop the crawl.
+
+        Arguments:
+            event : The event dictionary.
+
+        Returns:
+            None
+        """
+
+        for hook in self.hooks:
+            try:
+                hook(event)
+
+            except Exception:
+                pass
+
+    @staticmethod
+    def _escape(value: Any) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
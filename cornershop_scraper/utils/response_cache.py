@@ -0,0 +1,252 @@
+"""
+cornershop_scraper.utils.response_cache
+---------------------------------------
+
+This module provides a disk cache of the API responses, so repeated and
+retried crawls do not request again what was retrieved a moment ago. The
+entries expire by endpoint and the least recently used ones are evicted when
+the cache is full.
+"""
+
+import json
+import re
+import sqlite3
+from hashlib import sha256
+from os import makedirs, path
+from threading import Lock
+from time import time
+from typing import Any, Dict, Optional
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+
+class ResponseCache:
+    """ A thread-safe disk cache of responses with TTL by endpoint and LRU eviction. """
+
+    DEFAULT_PATH = path.join(path.expanduser('~'), '.cornershop_scraper', 'responses.sqlite')
+    DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+    DEFAULT_TTL = 10 * 60
+    DEFAULT_TTLS = {
+        r'/api/v1/countries': 7 * 24 * 60 * 60,
+        r'/api/v3/branch_groups': 24 * 60 * 60,
+        r'/api/v3/branches/[^/]+$': 60 * 60,
+        r'/aisles/[^/]+/products': 15 * 60,
+        r'/search$': 15 * 60,
+    }
+
+    def __init__(self, file_path: str = '',
+                 max_size: int = DEFAULT_MAX_SIZE,
+                 ttls: Dict[str, float] = None,
+                 default_ttl: float = DEFAULT_TTL):
+        """ Initialize a ResponseCache instance.
+
+        Arguments:
+            file_path : The path of the cache database.
+            max_size : The maximum size in bytes of the cached bodies.
+            ttls : A dictionary mapping URL path patterns to its TTL in seconds, zero disables the cache.
+            default_ttl : The TTL of the URLs that match no pattern.
+
+        Returns:
+            None
+        """
+
+        self.file_path = file_path or self.DEFAULT_PATH
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls or self.DEFAULT_TTLS).items()]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = path.dirname(self.file_path)
+        if directory:
+            makedirs(directory, exist_ok=True)
+
+        self._lock = Lock()
+        self._connection = sqlite3.connect(self.file_path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        with self._connection:
+            self._connection.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                '''
+            )
+            self._connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)')
+
+    def get(self, url: str,
+            params: Dict[str, Any] = None,
+            locality: str = '') -> Optional[Response]:
+        """ Returns the cached response of a request if it is not expired.
+
+        Arguments:
+            url : The request URL.
+            params : The request parameters.
+            locality : The location of the session that made the request.
+
+        Returns:
+            A response with from_cache set to True or None.
+        """
+
+        key = self.make_key(url=url, params=params, locality=locality)
+        now = time()
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT status, headers, body, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None or row[3] <= now:
+                self.misses += 1
+                return None
+
+            with self._connection:
+                self._connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+
+            self.hits += 1
+
+        response = Response()
+        response.status_code = row[0]
+        response.headers = CaseInsensitiveDict(json.loads(row[1]))
+        response._content = row[2]
+        response.url = url
+        response.encoding = 'utf-8'
+        response.from_cache = True
+        return response
+
+    def set(self, response: Response,
+            url: str,
+            params: Dict[str, Any] = None,
+            locality: str = '') -> None:
+        """ Saves a successful response and evicts the least recently used ones if the cache is full.
+
+        Arguments:
+            response : The response.
+            url : The request URL.
+            params : The request parameters.
+            locality : The location of the session that made the request.
+
+        Returns:
+            None
+        """
+
+        ttl = self.ttl(url=url)
+        if not ttl or response.status_code != 200:
+            return
+
+        key = self.make_key(url=url, params=params, locality=locality)
+        body = response.content
+        now = time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, response.status_code, json.dumps(dict(response.headers)), body, len(body), now + ttl, now)
+            )
+            self._evict()
+
+    def ttl(self, url: str) -> float:
+        """ Returns the TTL of an URL.
+
+        Arguments:
+            url : The request URL.
+
+        Returns:
+            The TTL in seconds.
+        """
+
+        url_path = url.split('?')[0]
+        for pattern, ttl in self.ttls:
+            if pattern.search(url_path):
+                return ttl
+
+        return self.default_ttl
+
+    def stats(self) -> Dict[str, Any]:
+        """ Returns the hit and miss counters and the cache size.
+
+        Returns:
+            A dictionary with the cache statistics.
+        """
+
+        with self._lock:
+            query = 'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+            entries, size = self._connection.execute(query).fetchone()
+
+        requests = self.hits + self.misses
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / requests if requests else 0.0,
+            evictions=self.evictions,
+            entries=entries,
+            size=size
+        )
+
+    def clear(self) -> None:
+        """ Removes all the cached responses.
+
+        Returns:
+            None
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses')
+
+    def close(self) -> None:
+        """ Closes the cache database.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def make_key(url: str,
+                 params: Dict[str, Any] = None,
+                 locality: str = '') -> str:
+        """ Returns the cache key of a request.
+
+        Arguments:
+            url : The request URL.
+            params : The request parameters.
+            locality : The location of the session that made the request.
+
+        Returns:
+            The key.
+        """
+
+        params = sorted((str(key), str(value)) for key, value in (params or {}).items())
+        return sha256(json.dumps([url, params, locality]).encode('utf-8')).hexdigest()
+
+    def _evict(self) -> None:
+        """ Removes the expired entries and the least recently used ones over the maximum size.
+        Must be called holding the lock.
+
+        Returns:
+            None
+        """
+
+        cursor = self._connection.execute('DELETE FROM responses WHERE expires_at <= ?', (time(),))
+        self.evictions += cursor.rowcount
+
+        size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if size <= self.max_size:
+            return
+
+        entries = self._connection.execute('SELECT key, size FROM responses ORDER BY accessed_at').fetchall()
+        for key, entry_size in entries:
+            self._connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self.evictions += 1
+            size -= entry_size
+            if size <= self.max_size:
+                break
@@ -0,0 +1,172 @@
+"""
+cornershop_scraper.utils.session_cache
+--------------------------------------
+
+This module provides a disk cache for the local sessions, so new processes can
+reuse the cookies and CSRF token of a previous handshake with the same location
+instead of repeating it.
+"""
+
+import json
+from hashlib import sha1
+from os import makedirs, path, remove, replace
+from time import time
+from typing import Any, Callable, Dict, Optional
+
+
+class SessionCache:
+    """ A disk cache of local sessions keyed by address, country and language. """
+
+    DEFAULT_TTL = 6 * 60 * 60
+    DEFAULT_PATH = path.join(path.expanduser('~'), '.cornershop_scraper', 'sessions')
+    REQUIRED_COOKIES = ('csrftoken',)
+
+    def __init__(self, file_path: str = '',
+                 ttl: float = DEFAULT_TTL,
+                 validator: Callable[[Any], bool] = None):
+        """ Initialize a SessionCache instance.
+
+        Arguments:
+            file_path : The directory path where the sessions are saved.
+            ttl : The time in seconds a saved session is considered valid.
+            validator : An optional function that receives a restored session and returns if it still works.
+
+        Returns:
+            None
+        """
+
+        self.file_path = file_path or self.DEFAULT_PATH
+        self.ttl = ttl
+        self.validator = validator
+
+    def load(self, address: str,
+             country: str = 'BR',
+             language: str = 'pt-br') -> Optional[Dict[str, Any]]:
+        """ Returns the saved session data of the location if it is still valid.
+
+        Arguments:
+            address : The local address.
+            country : The country.
+            language : The language.
+
+        Returns:
+            A dictionary with the cookies and CSRF token or None.
+        """
+
+        full_path = self.make_full_path(address=address, country=country, language=language)
+        if not path.isfile(full_path):
+            return None
+
+        try:
+            with open(full_path, 'r', encoding='utf-8') as input_file:
+                entry = json.load(input_file)
+
+        except (OSError, ValueError):
+            return None
+
+        if not self.is_valid(entry):
+            self.clear(address=address, country=country, language=language)
+            return None
+
+        return entry
+
+    def save(self, session: Any,
+             csrf_token: str,
+             address: str,
+             country: str = 'BR',
+             language: str = 'pt-br') -> None:
+        """ Saves the cookies and CSRF token of a session.
+
+        The file is written to a temporary path and renamed, so concurrent processes
+        never read a partial entry.
+
+        Arguments:
+            session : The authenticated session.
+            csrf_token : The CSRF token.
+            address : The local address.
+            country : The country.
+            language : The language.
+
+        Returns:
+            None
+        """
+
+        entry = dict(
+            created_at=time(),
+            csrf_token=csrf_token,
+            headers=dict(session.headers),
+            cookies=[
+                dict(
+                    name=cookie.name,
+                    value=cookie.value,
+                    domain=cookie.domain,
+                    path=cookie.path,
+                    expires=cookie.expires,
+                    secure=cookie.secure
+                ) for cookie in session.cookies
+            ]
+        )
+
+        makedirs(self.file_path, exist_ok=True)
+        full_path = self.make_full_path(address=address, country=country, language=language)
+        tmp_path = full_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as output_file:
+            json.dump(entry, output_file)
+
+        replace(tmp_path, full_path)
+
+    def clear(self, address: str,
+              country: str = 'BR',
+              language: str = 'pt-br') -> None:
+        """ Removes the saved session of the location.
+
+        Arguments:
+            address : The local address.
+            country : The country.
+            language : The language.
+
+        Returns:
+            None
+        """
+
+        full_path = self.make_full_path(address=address, country=country, language=language)
+        if path.isfile(full_path):
+            remove(full_path)
+
+    def is_valid(self, entry: Dict[str, Any]) -> bool:
+        """ Check if a saved session is not expired and has the required cookies.
+
+        Arguments:
+            entry : The saved session data.
+
+        Returns:
+            True if the session can be reused.
+        """
+
+        now = time()
+        if now - entry.get('created_at', 0) > self.ttl:
+            return False
+
+        cookies = entry.get('cookies', [])
+        names = {cookie['name'] for cookie in cookies}
+        if any(name not in names for name in self.REQUIRED_COOKIES):
+            return False
+
+        return all(not cookie['expires'] or cookie['expires'] > now for cookie in cookies)
+
+    def make_full_path(self, address: str,
+                       country: str = 'BR',
+                       language: str = 'pt-br') -> str:
+        """ Returns the file path of the location session.
+
+        Arguments:
+            address : The local address.
+            country : The country.
+            language : The language.
+
+        Returns:
+            The full path.
+        """
+
+        key = '\n'.join([address.strip().lower(), country.upper(), language.lower()])
+        return path.join(self.file_path, sha1(key.encode('utf-8')).hexdigest() + '.json')
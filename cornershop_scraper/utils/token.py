@@ -5,10 +5,19 @@ cornershop_scraper.utils.token
 This module provides a implementation to authenticate and create a local session
 to retrieve data anywhere on Cornershop countries.
 """
-from typing import Tuple
+from collections import deque
+from contextlib import contextmanager
+from threading import Condition, Event, Thread
+from time import monotonic
+from typing import Any, Dict, Iterator, List, Tuple
 
 from bs4 import BeautifulSoup
 from cloudscraper import CloudScraper
+from requests import Session
+
+from cornershop_scraper.core import CornershopURL
+from cornershop_scraper.utils.limiter import RateLimiter
+from cornershop_scraper.utils.session_cache import SessionCache
 
 
 DEFAULT_HEADERS = {
@@ -17,7 +26,9 @@ DEFAULT_HEADERS = {
 }
 
 
-def get_csrf_middleware_token(language: str = 'pt-br') -> Tuple[CloudScraper, str]:
+def get_csrf_middleware_token(language: str = 'pt-br',
+                              rate_limiter: RateLimiter = None,
+                              base_url: str = CornershopURL) -> Tuple[CloudScraper, str]:
     """ Cornershop uses a CSRF token to protect from MITM Attack and to generate a session id
     to be used as a passport to the local products from a store.
 
@@ -26,6 +37,8 @@ def get_csrf_middleware_token(language: str = 'pt-br') -> Tuple[CloudScraper, st
 
     Arguments:
         language : The language.
+        rate_limiter : The rate limiter used to throttle the request.
+        base_url : The site base URL.
 
     Returns:
         Returns the created session with the CSRF Token.
@@ -33,7 +46,11 @@ def get_csrf_middleware_token(language: str = 'pt-br') -> Tuple[CloudScraper, st
 
     sess = CloudScraper()
     sess.headers = DEFAULT_HEADERS
-    req = sess.get(f'https://cornershopapp.com/{language}')
+    url = f'{base_url}/{language}'
+    if rate_limiter:
+        rate_limiter.acquire(url)
+
+    req = sess.get(url)
     soup = BeautifulSoup(req.text, 'html.parser')
     token = soup.find('input', {'name': 'csrfmiddlewaretoken'})['value']
     return sess, token
@@ -41,24 +58,496 @@ def get_csrf_middleware_token(language: str = 'pt-br') -> Tuple[CloudScraper, st
 
 def get_local_session(address: str,
                       country: str = 'BR',
-                      language: str = 'pt-br') -> CloudScraper:
+                      language: str = 'pt-br',
+                      rate_limiter: RateLimiter = None,
+                      cache: SessionCache = None,
+                      base_url: str = CornershopURL) -> CloudScraper:
     """ Returns a fully interactive session with the given Cornershop location.
 
+    When a cache is given a valid saved session of the location is reused, otherwise
+    the handshake is made and its result saved.
+
     Arguments:
         address : The local address.
         country : The country.
         language: The language.
+        rate_limiter : The rate limiter used to throttle the requests.
+        cache : The session cache.
+        base_url : The site base URL.
 
     Returns:
         A cloudscraper session.
     """
 
-    sess, csrfmiddlewaretoken = get_csrf_middleware_token(language=language)
+    if cache:
+        entry = cache.load(address=address, country=country, language=language)
+        if entry:
+            sess = restore_session(entry=entry)
+            if not cache.validator or cache.validator(sess):
+                return sess
+
+            cache.clear(address=address, country=country, language=language)
+
+    sess, csrfmiddlewaretoken = get_csrf_middleware_token(
+        language=language,
+        rate_limiter=rate_limiter,
+        base_url=base_url
+    )
 
     payload = dict(csrfmiddlewaretoken=csrfmiddlewaretoken, address=address, country=country)
-    headers = dict(referer=f'https://cornershopapp.com/{language}/')
+    headers = dict(referer=f'{base_url}/{language}/')
+
+    url = f'{base_url}/address'
+    if rate_limiter:
+        rate_limiter.acquire(url)
+
+    sess.post(url=url, headers=headers, data=payload)
+    if cache:
+        cache.save(sess, csrfmiddlewaretoken, address=address, country=country, language=language)
 
-    sess.post(url='https://cornershopapp.com/address', headers=headers, data=payload)
     return sess
 
 
+def restore_session(entry: Dict[str, Any]) -> CloudScraper:
+    """ Returns a session created from the data saved by a SessionCache.
+
+    Arguments:
+        entry : The saved session data.
+
+    Returns:
+        A cloudscraper session.
+    """
+
+    sess = CloudScraper()
+    sess.headers = entry.get('headers') or DEFAULT_HEADERS
+    for cookie in entry['cookies']:
+        sess.cookies.set(
+            cookie['name'],
+            cookie['value'],
+            domain=cookie['domain'],
+            path=cookie['path'],
+            expires=cookie['expires'],
+            secure=cookie['secure']
+        )
+
+    return sess
+
+
+def clone_session(session: CloudScraper) -> CloudScraper:
+    """ Returns a new session with the headers and cookies of a session, so each thread can use
+    its own connections with the same location and Cloudflare clearance.
+
+    Arguments:
+        session : The session.
+
+    Returns:
+        A cloudscraper session, or the given object if it is not a requests session.
+    """
+
+    if not isinstance(session, Session):
+        return session
+
+    sess = CloudScraper()
+    sess.headers = dict(session.headers)
+    sess.cookies.update(session.cookies)
+    return sess
+
+
+class PooledSession:
+    """ A session handed out by a SessionPool with its usage statistics. """
+
+    def __init__(self, session: CloudScraper,
+                 key: Tuple[str, str, str]):
+        """ Initialize a PooledSession instance.
+
+        Arguments:
+            session : The cloudscraper session.
+            key : The (address, country, language) of the session.
+
+        Returns:
+            None
+        """
+
+        self.session = session
+        self.key = key
+        self.created_at = monotonic()
+        self.uses = 0
+        self.errors = 0
+        self.in_use = False
+        self.replacement = None
+
+    @property
+    def age(self) -> float:
+        return monotonic() - self.created_at
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.uses if self.uses else 0.0
+
+    def __repr__(self):
+        return f'{self.key[0]} session aged {self.age:.0f}s with {self.errors}/{self.uses} errors'
+
+
+class SessionPool:
+    """ A thread-safe pool that keeps authenticated sessions of each location warm.
+
+    Each session is used by one worker at a time. A background thread creates a new
+    session for each one that is close to expire or fails too often, and swaps it in
+    as soon as the old one is idle, so the workers never wait for a new handshake. The
+    first request of a location only waits for its first session, the others are
+    created in the background.
+    """
+
+    DEFAULT_SIZE = 4
+    DEFAULT_MAX_AGE = 30 * 60
+    DEFAULT_REFRESH_BEFORE = 5 * 60
+    DEFAULT_MAX_ERROR_RATE = 0.5
+    DEFAULT_MIN_USES = 10
+    DEFAULT_CHECK_INTERVAL = 10
+
+    def __init__(self, size: int = DEFAULT_SIZE,
+                 max_age: float = DEFAULT_MAX_AGE,
+                 refresh_before: float = DEFAULT_REFRESH_BEFORE,
+                 max_error_rate: float = DEFAULT_MAX_ERROR_RATE,
+                 min_uses: int = DEFAULT_MIN_USES,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL,
+                 rate_limiter: RateLimiter = None,
+                 base_url: str = CornershopURL):
+        """ Initialize a SessionPool instance.
+
+        Arguments:
+            size : The number of sessions kept for each location.
+            max_age : The time in seconds a session is expected to stay valid.
+            refresh_before : How many seconds before max_age a session is refreshed.
+            max_error_rate : The error rate that makes a session be refreshed.
+            min_uses : The number of uses before the error rate is considered.
+            check_interval : The time in seconds between the background checks.
+            rate_limiter : The rate limiter used by the handshakes.
+            base_url : The site base URL of the sessions.
+
+        Returns:
+            None
+        """
+
+        self.size = size
+        self.max_age = max_age
+        self.refresh_before = refresh_before
+        self.max_error_rate = max_error_rate
+        self.min_uses = min_uses
+        self.check_interval = check_interval
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url
+
+        self._sessions = {}
+        self._idle = {}
+        self._condition = Condition()
+        self._stop = Event()
+        self._thread = None
+
+    def warm(self, address: str,
+             country: str = 'BR',
+             language: str = 'pt-br') -> None:
+        """ Creates the sessions of a location if it is not on the pool yet. Returns as soon as
+        the first session is ready and creates the others on a background thread.
+
+        Arguments:
+            address : The local address.
+            country : The country.
+            language : The language.
+
+        Returns:
+            None
+        """
+
+        key = (address, country, language)
+        with self._condition:
+            if key in self._sessions:
+                return
+
+            self._sessions[key] = []
+            self._idle[key] = deque()
+
+        try:
+            self._add(pooled=self._create(key=key))
+
+        except Exception:
+            with self._condition:
+                del self._sessions[key]
+                del self._idle[key]
+                self._condition.notify_all()
+
+            raise
+
+        if self.size > 1:
+            Thread(target=self._fill, args=(key,), name='SessionPoolWarm', daemon=True).start()
+
+    def acquire(self, address: str,
+                country: str = 'BR',
+                language: str = 'pt-br',
+                timeout: float = None) -> PooledSession:
+        """ Returns an idle session of the location, waiting for one if all are in use.
+
+        Arguments:
+            address : The local address.
+            country : The country.
+            language : The language.
+            timeout : The maximum time in seconds to wait for a session.
+
+        Returns:
+            A pooled session that must be given back with release.
+        """
+
+        key = (address, country, language)
+        self.warm(address=address, country=country, language=language)
+        with self._condition:
+            if not self._condition.wait_for(lambda: key not in self._idle or self._idle[key], timeout=timeout):
+                raise TimeoutError('There is no idle session for this location.')
+
+            if key not in self._idle:
+                raise Warning('The handshake of this location failed.')
+
+            pooled = self._idle[key].popleft()
+            pooled.in_use = True
+            pooled.uses += 1
+
+        return pooled
+
+    def release(self, pooled: PooledSession,
+                error: bool = False) -> None:
+        """ Gives a session back to the pool, or its replacement if it was refreshed.
+
+        Arguments:
+            pooled : The pooled session.
+            error : If true counts an error for the session.
+
+        Returns:
+            None
+        """
+
+        with self._condition:
+            if error:
+                pooled.errors += 1
+
+            pooled.in_use = False
+            if pooled.replacement:
+                self._swap(pooled)
+
+            else:
+                self._idle[pooled.key].append(pooled)
+                self._condition.notify()
+
+    @contextmanager
+    def session(self, address: str,
+                country: str = 'BR',
+                language: str = 'pt-br',
+                timeout: float = None) -> Iterator[CloudScraper]:
+        """ Lends a session of the location while inside the context.
+
+        Arguments:
+            address : The local address.
+            country : The country.
+            language : The language.
+            timeout : The maximum time in seconds to wait for a session.
+
+        Returns:
+            A cloudscraper session.
+        """
+
+        pooled = self.acquire(address=address, country=country, language=language, timeout=timeout)
+        error = False
+        try:
+            yield pooled.session
+
+        except Exception:
+            error = True
+            raise
+
+        finally:
+            self.release(pooled, error=error)
+
+    def needs_refresh(self, pooled: PooledSession) -> bool:
+        """ Check if a session is close to expire or failing too often.
+
+        Arguments:
+            pooled : The pooled session.
+
+        Returns:
+            True if the session must be replaced.
+        """
+
+        if pooled.age >= self.max_age - self.refresh_before:
+            return True
+
+        return pooled.uses >= self.min_uses and pooled.error_rate > self.max_error_rate
+
+    def refresh(self) -> int:
+        """ Creates a replacement for each session that needs to be refreshed.
+
+        The handshakes are made outside the lock while the old sessions keep working.
+        An idle session is swapped at once and a session in use when it is released.
+
+        Returns:
+            The number of refreshed sessions.
+        """
+
+        with self._condition:
+            stale = [
+                pooled for sessions in self._sessions.values() for pooled in sessions
+                if not pooled.replacement and self.needs_refresh(pooled)
+            ]
+
+        refreshed = 0
+        for pooled in stale:
+            if self._stop.is_set():
+                break
+
+            try:
+                replacement = self._create(key=pooled.key)
+
+            except Exception:
+                continue
+
+            with self._condition:
+                pooled.replacement = replacement
+                if not pooled.in_use:
+                    self._idle[pooled.key].remove(pooled)
+                    self._swap(pooled)
+
+            refreshed += 1
+
+        return refreshed
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """ Returns the age, uses and errors of the sessions.
+
+        Returns:
+            A list of dictionaries, one for each session.
+        """
+
+        with self._condition:
+            return [
+                dict(
+                    address=p.key[0],
+                    country=p.key[1],
+                    language=p.key[2],
+                    age=p.age,
+                    uses=p.uses,
+                    errors=p.errors,
+                    in_use=p.in_use
+                ) for sessions in self._sessions.values() for p in sessions
+            ]
+
+    def start(self) -> None:
+        """ Starts the background refresh thread.
+
+        Returns:
+            None
+        """
+
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name='SessionPoolRefresh', daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """ Stops the background refresh thread.
+
+        Returns:
+            None
+        """
+
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        """ Refresh the sessions until the pool is closed.
+
+        Returns:
+            None
+        """
+
+        while not self._stop.wait(self.check_interval):
+            self.refresh()
+
+    def _fill(self, key: Tuple[str, str, str]) -> None:
+        """ Creates the remaining sessions of a location, stopping at the first failed handshake.
+
+        Arguments:
+            key : The (address, country, language) of the location.
+
+        Returns:
+            None
+        """
+
+        for _ in range(self.size - 1):
+            if self._stop.is_set():
+                break
+
+            try:
+                pooled = self._create(key=key)
+
+            except Exception:
+                break
+
+            self._add(pooled=pooled)
+
+    def _add(self, pooled: PooledSession) -> None:
+        """ Puts a new session on the pool as idle.
+
+        Arguments:
+            pooled : The pooled session.
+
+        Returns:
+            None
+        """
+
+        with self._condition:
+            self._sessions[pooled.key].append(pooled)
+            self._idle[pooled.key].append(pooled)
+            self._condition.notify()
+
+    def _swap(self, pooled: PooledSession) -> None:
+        """ Puts the replacement of a session in its place. Must be called holding the lock.
+
+        Arguments:
+            pooled : The refreshed session.
+
+        Returns:
+            None
+        """
+
+        sessions = self._sessions[pooled.key]
+        sessions[sessions.index(pooled)] = pooled.replacement
+        self._idle[pooled.key].append(pooled.replacement)
+        self._condition.notify()
+
+    def _create(self, key: Tuple[str, str, str]) -> PooledSession:
+        """ Returns a new pooled session of the location.
+
+        Arguments:
+            key : The (address, country, language) of the session.
+
+        Returns:
+            A pooled session.
+        """
+
+        address, country, language = key
+        session = get_local_session(
+            address=address,
+            country=country,
+            language=language,
+            rate_limiter=self.rate_limiter,
+            base_url=self.base_url
+        )
+        return PooledSession(session=session, key=key)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -13,6 +13,10 @@ from .csv import CsvWriter
 from .xlsx import XlsxWriter
 from .xml import XmlWriter
 from .img import ImageWriter
+from .parquet import ParquetWriter
+from .jsonl import JsonlWriter
+from .sqlite import SqliteWriter
+from .archive import ImageArchiveWriter
 
 
 ALLOWED_WRITERS = {
@@ -0,0 +1,406 @@
+"""
+cornershop_scraper.utils.writer.archive
+---------------------------------------
+
+This module provides a implementation of the Image Archive Writer using the
+base class Writer defined at cornershop_scraper.utils.writer.base. Instead of
+a file per image, the images are appended to tar or zip shards of a bounded
+size, and an index file maps each item to its shard, offset and size.
+
+The images are stored uncompressed, so an image is read back with a single
+slice of the memory-mapped shard. Each writer session starts a new shard and
+the tar shards are padded to the 10 KB tar record size when closed, so many
+small appends leave many small shards.
+"""
+
+import mmap
+import tarfile
+import zipfile
+from os import listdir, path, remove
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .base import Writer
+from .img import ImageWriter
+from ..image_store import ImageStore
+from ..limiter import RateLimiter
+
+
+class ImageArchiveWriter(Writer):
+    """ Implementation of Image Archive Writer extension. """
+
+    PARSER_NAME = 'img_archive'
+    APPENDABLE = True
+    FIXED_SCHEMA = True
+    MAIN_PROPERTY = ImageWriter.MAIN_PROPERTY
+    LINK_PROPERTY = ImageWriter.LINK_PROPERTY
+    STORE_OPTIONS = ImageWriter.STORE_OPTIONS
+    ARCHIVE_FORMATS = ('tar', 'zip')
+    DEFAULT_SHARD_SIZE = 1024 * 1024 * 1024
+    INDEX_HEADER = ['id', 'shard', 'offset', 'size', 'name']
+
+    def __init__(self, file_path: str = '',
+                 rate_limiter: RateLimiter = None,
+                 workers: int = ImageWriter.DEFAULT_WORKERS,
+                 archive_format: str = 'tar',
+                 shard_size: int = DEFAULT_SHARD_SIZE,
+                 image_store: ImageStore = None):
+        """ Initialize ImageArchiveWriter.
+
+        Arguments:
+            file_path : The directory path.
+            rate_limiter : The rate limiter of the downloads, defaults to ImageWriter.make_rate_limiter(workers).
+            workers : The images downloaded at once.
+            archive_format : The shards format, tar or zip.
+            shard_size : The maximum size in bytes of a shard, unless a single image is bigger. A tar shard also
+                takes its end blocks and is padded to the tar record size, 10 KB, when closed.
+            image_store : The content-addressed store of the images, so each distinct image is downloaded once.
+
+        Returns:
+            None
+        """
+
+        if archive_format not in self.ARCHIVE_FORMATS:
+            raise Warning(f'The archive format {archive_format} is not supported.')
+
+        super(ImageArchiveWriter, self).__init__(extension='index', file_path=file_path)
+        self.archive_format = archive_format
+        self.shard_size = shard_size
+        self.downloader = ImageWriter(
+            file_path=file_path,
+            rate_limiter=rate_limiter,
+            workers=workers,
+            image_store=image_store
+        )
+        self._index_file = None
+        self._archive = None
+        self._shard = -1
+        self._shard_prefix = ''
+        self._ids = set()
+        self._indexes = {}
+        self._shards = {}
+
+    @property
+    def failures(self) -> Dict[str, str]:
+        return self.downloader.failures
+
+    def save_items(self, items: List[object],
+                   file_name: str,
+                   headers: Union[List[str], Dict[str, str]] = None,
+                   force_new_file: bool = True) -> None:
+        """ Saves the items images on the archive shards.
+
+        Arguments:
+            items : The items to save.
+            file_name : The archive name.
+            headers : NO USE
+            force_new_file : If true saves a new archive even if its already exists, otherwise adds the missing images.
+
+        Returns:
+            None
+        """
+
+        with self.open(file_name=file_name, force_new_file=force_new_file, append=not force_new_file):
+            self.append(items=items)
+
+    def open_file(self, full_path: str,
+                  append: bool = False) -> None:
+        """ Opens the index of the writer session. The appended images go to new shards, numbered
+        after the highest existing one, so a gap in the numbers never overwrites a shard.
+
+        Arguments:
+            full_path : The index full path.
+            append : If true keeps the existing images.
+
+        Returns:
+            None
+        """
+
+        self._shard_prefix = full_path[:-len('.' + self.extension)]
+        shards = self.shard_paths(full_path=full_path)
+        for shard_path in shards:
+            self._close_reader(shard_path=shard_path)
+
+        self._ids = set()
+        if append:
+            self._ids = set(self.load_index(full_path=full_path))
+
+        else:
+            for shard_path in shards:
+                remove(shard_path)
+
+        self._shard = int(shards[-1].rsplit('.', 2)[-2]) if append and shards else -1
+        self._index_file = open(full_path, 'a' if append else 'w', encoding='utf-8')
+        if not append:
+            self._index_file.write('\t'.join(self.INDEX_HEADER) + '\n')
+
+        self._indexes.pop(full_path, None)
+
+    def write_header(self, vals: List[str]) -> None:
+        """ The index has a fixed header.
+
+        Arguments:
+            vals : NO USE
+
+        Returns:
+            None
+        """
+
+    def append(self, items: List[object]) -> None:
+        """ Downloads the images of the items and appends them to the open session.
+
+        Arguments:
+            items : The items to save.
+
+        Returns:
+            None
+        """
+
+        if not self.is_open:
+            raise Warning('The writer session is not open.')
+
+        if self._skip or not items:
+            return
+
+        self.write_rows(rows=self.apply_headers(items=items, keys=[self.LINK_PROPERTY, self.MAIN_PROPERTY]))
+
+    def write_rows(self, rows: List[List[str]]) -> None:
+        """ Downloads the images to a temporary directory and appends them to the shards in order.
+
+        Arguments:
+            rows : The (image URL, item ID) pairs.
+
+        Returns:
+            None
+        """
+
+        images = {}
+        for url, item_id in rows:
+            item_id = str(item_id)
+            if url and item_id not in self._ids and item_id not in images:
+                images[item_id] = url
+
+        if not images:
+            return
+
+        with TemporaryDirectory(dir=self.file_path or None) as tmp_path:
+            downloads = []
+            for item_id, url in images.items():
+                extension = ImageWriter.get_file_name(url=url).split('.')[-1]
+                downloads.append((item_id, f'{item_id}.{extension}', path.join(tmp_path, item_id)))
+
+            self.downloader.download_all(downloads=[(images[item_id], tmp) for item_id, _, tmp in downloads])
+            lines = []
+            index = self._indexes.get(self._index_file.name)
+            for item_id, name, tmp in downloads:
+                if path.isfile(tmp):
+                    shard, offset, size = self.add_image(name=name, image_path=tmp)
+                    lines.append(f'{item_id}\t{shard}\t{offset}\t{size}\t{name}\n')
+                    self._ids.add(item_id)
+                    if index is not None:
+                        index[item_id] = (shard, offset, size, name)
+
+        if self._archive is not None:
+            (self._archive.fp if self.archive_format == 'zip' else self._archive.fileobj).flush()
+
+        self._index_file.write(''.join(lines))
+        self._index_file.flush()
+
+    def add_image(self, name: str,
+                  image_path: str) -> Tuple[int, int, int]:
+        """ Appends an image to the current shard, starting a new one when it is full.
+
+        Arguments:
+            name : The image name inside the archive.
+            image_path : The downloaded image.
+
+        Returns:
+            A (shard, offset, size) tuple, where the offset is the start of the image bytes.
+        """
+
+        size = path.getsize(image_path)
+        shard_size = self._archive_size() if self._archive is not None else None
+        if shard_size is None or (shard_size and shard_size + size > self.shard_size):
+            self._open_shard()
+
+        if self.archive_format == 'tar':
+            info = tarfile.TarInfo(name=name)
+            info.size = size
+            with open(image_path, 'rb') as image_file:
+                self._archive.addfile(info, image_file)
+
+            blocks, remainder = divmod(size, tarfile.BLOCKSIZE)
+            return self._shard, self._archive.offset - (blocks + bool(remainder)) * tarfile.BLOCKSIZE, size
+
+        self._archive.write(image_path, arcname=name, compress_type=zipfile.ZIP_STORED)
+        return self._shard, self._archive.fp.tell() - size, size
+
+    def close_file(self) -> None:
+        """ Closes the index and the current shard.
+
+        Returns:
+            None
+        """
+
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+        self._index_file.close()
+        self._index_file = None
+
+    def read_image(self, file_name: str,
+                   item_id: Any) -> Optional[bytes]:
+        """ Returns the image of an item, read at its offset on the memory-mapped shard. A shard
+        that grew after it was mapped, while still being written, is mapped again.
+
+        Arguments:
+            file_name : The archive name.
+            item_id : The item ID.
+
+        Returns:
+            The image bytes or None if the item has no image.
+        """
+
+        full_path = self.make_full_path(file_name=file_name)
+        if full_path not in self._indexes:
+            self._indexes[full_path] = self.load_index(full_path=full_path)
+
+        entry = self._indexes[full_path].get(str(item_id))
+        if entry is None:
+            return None
+
+        shard, offset, size, _ = entry
+        shard_path = self.shard_path(prefix=full_path[:-len('.' + self.extension)], shard=shard)
+        shard_map = self._shards.get(shard_path)
+        if shard_map is not None and offset + size > len(shard_map):
+            self._close_reader(shard_path=shard_path)
+
+        if shard_path not in self._shards:
+            with open(shard_path, 'rb') as shard_file:
+                try:
+                    self._shards[shard_path] = mmap.mmap(shard_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+                except (OSError, ValueError):
+                    self._shards[shard_path] = None
+
+        shard_map = self._shards[shard_path]
+        if shard_map is not None:
+            return shard_map[offset:offset + size]
+
+        with open(shard_path, 'rb') as shard_file:
+            shard_file.seek(offset)
+            return shard_file.read(size)
+
+    def close_readers(self) -> None:
+        """ Releases the memory maps and indexes opened by read_image.
+
+        Returns:
+            None
+        """
+
+        for shard_path in list(self._shards):
+            self._close_reader(shard_path=shard_path)
+
+        self._indexes = {}
+
+    def _close_reader(self, shard_path: str) -> None:
+        """ Releases the memory map of a shard, before it is removed, written or read past its mapped end.
+
+        Arguments:
+            shard_path : The shard path.
+
+        Returns:
+            None
+        """
+
+        shard_map = self._shards.pop(shard_path, None)
+        if shard_map is not None:
+            shard_map.close()
+
+    @staticmethod
+    def load_index(full_path: str) -> Dict[str, Tuple[int, int, int, str]]:
+        """ Returns the index entries, the last one of each item wins.
+
+        Arguments:
+            full_path : The index full path.
+
+        Returns:
+            A dictionary mapping each item ID to its (shard, offset, size, name) tuple.
+        """
+
+        index = {}
+        if not path.isfile(full_path):
+            return index
+
+        with open(full_path, encoding='utf-8') as index_file:
+            next(index_file, None)
+            for line in index_file:
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) == 5:
+                    index[fields[0]] = (int(fields[1]), int(fields[2]), int(fields[3]), fields[4])
+
+        return index
+
+    def shard_path(self, prefix: str,
+                   shard: int) -> str:
+        """ Returns the path of a shard.
+
+        Arguments:
+            prefix : The index full path without its extension.
+            shard : The shard number.
+
+        Returns:
+            The shard path.
+        """
+
+        return f'{prefix}.{shard:05d}.{self.archive_format}'
+
+    def shard_paths(self, full_path: str) -> List[str]:
+        """ Returns the existing shards of an index, in order.
+
+        Arguments:
+            full_path : The index full path.
+
+        Returns:
+            A list of shard paths.
+        """
+
+        prefix = full_path[:-len('.' + self.extension)]
+        directory, base_name = path.split(prefix)
+        suffix = '.' + self.archive_format
+        shards = []
+        for name in listdir(directory or '.'):
+            number = name[len(base_name) + 1:-len(suffix)]
+            if name.startswith(base_name + '.') and name.endswith(suffix) and number.isdigit():
+                shards.append((int(number), path.join(directory, name)))
+
+        return [shard_path for _, shard_path in sorted(shards)]
+
+    def _open_shard(self) -> None:
+        """ Closes the current shard and opens the next one.
+
+        Returns:
+            None
+        """
+
+        if self._archive is not None:
+            self._archive.close()
+
+        self._shard += 1
+        shard_path = self.shard_path(prefix=self._shard_prefix, shard=self._shard)
+        self._close_reader(shard_path=shard_path)
+        if self.archive_format == 'tar':
+            self._archive = tarfile.open(shard_path, 'w', format=tarfile.GNU_FORMAT)
+
+        else:
+            self._archive = zipfile.ZipFile(shard_path, 'w', compression=zipfile.ZIP_STORED)
+
+    def _archive_size(self) -> int:
+        """ Returns the bytes written on the current shard.
+
+        Returns:
+            The shard size.
+        """
+
+        return self._archive.fp.tell() if self.archive_format == 'zip' else self._archive.offset
@@ -7,7 +7,8 @@ can be added easily to export the retrieved data.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Tuple, Union
+from os import path
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
 
 
 class Writer(ABC):
@@ -15,6 +16,11 @@ class Writer(ABC):
 
     PARSER_NAME = None
     MULTIPLE_FILES = False
+    APPENDABLE = False
+    NESTED_VALUES = False
+    FIXED_SCHEMA = False
+    LIST_SEPARATOR = '|'
+    STORE_OPTIONS = {}
 
     def __init__(self, extension: str,
                  file_path: str = ''):
@@ -30,6 +36,13 @@ class Writer(ABC):
 
         self.file_path = file_path
         self.extension = extension
+        self.store_id = None
+        self.is_open = False
+        self._headers = None
+        self._keys = None
+        self._force_new_file = True
+        self._new_file = True
+        self._skip = False
 
     def set_extension(self, file_name: str) -> str:
         """ Returns the verified file name.
@@ -88,6 +101,179 @@ class Writer(ABC):
 
         raise NotImplementedError
 
+    def save_batches(self, batches: Iterable[List[object]],
+                     file_name: str,
+                     headers: Union[List[str], Dict[str, str]] = None,
+                     force_new_file: bool = True,
+                     append: bool = False) -> None:
+        """ Save the batches of items as they are produced.
+
+        Arguments:
+            batches : An iterable of lists of items.
+            file_name : The file name.
+            headers : The headers that will be used to change the name of the fields and which of them will be saved.
+            force_new_file : If true saves a new file even if its already exists.
+            append : If true adds the items to the end of the existing file.
+
+        Returns:
+            None
+        """
+
+        with self.open(file_name=file_name, headers=headers, force_new_file=force_new_file, append=append):
+            for batch in batches:
+                self.append(items=batch)
+
+    def open(self, file_name: str = '',
+             headers: Union[List[str], Dict[str, str]] = None,
+             force_new_file: bool = True,
+             append: bool = False) -> 'Writer':
+        """ Opens a writer session where the items can be appended until it is closed.
+
+        The writers that create one file per item save each appended item at once. The
+        single file writers keep the file open and write the rows of each append.
+
+        Arguments:
+            file_name : The file name.
+            headers : The headers that will be used to change the name of the fields and which of them will be saved.
+            force_new_file : If true saves a new file even if its already exists.
+            append : If true adds the items to the end of the existing file.
+
+        Returns:
+            The writer itself, to be used as a context manager.
+        """
+
+        if self.is_open:
+            raise Warning('The writer session is already open.')
+
+        self._headers = headers
+        self._keys = None
+        self._force_new_file = force_new_file
+        self._new_file = True
+        self._skip = False
+
+        if not self.MULTIPLE_FILES:
+            full_path = self.make_full_path(file_name=file_name)
+            exists = path.isfile(full_path)
+            if append and exists and not self.APPENDABLE:
+                raise Warning(f'The {self.PARSER_NAME} writer can not append to an existing file.')
+
+            self._new_file = not (append and exists)
+            self._skip = exists and not append and not force_new_file
+            if not self._skip:
+                self.open_file(full_path=full_path, append=not self._new_file)
+                if headers:
+                    self._keys, vals = self.get_headers_items(items=[], headers=headers)
+                    self.set_names(vals=vals)
+                    if self._new_file:
+                        self.write_header(vals=vals)
+
+        self.is_open = True
+        return self
+
+    def append(self, items: List[object]) -> None:
+        """ Writes the items on the open session.
+
+        Arguments:
+            items : The items to save.
+
+        Returns:
+            None
+        """
+
+        if not self.is_open:
+            raise Warning('The writer session is not open.')
+
+        if self._skip or not items:
+            return
+
+        if self.MULTIPLE_FILES:
+            self.save_items(items=items, headers=self._headers, force_new_file=self._force_new_file)
+            return
+
+        if self._keys is None:
+            self._keys, vals = self.get_headers_items(items=items, headers=self._headers)
+            self.set_names(vals=vals)
+            if self._new_file:
+                self.write_header(vals=vals)
+
+        self.write_rows(rows=self.join_lists(rows=self.apply_headers(items=items, keys=self._keys)))
+
+    def close(self) -> None:
+        """ Closes the writer session.
+
+        Returns:
+            None
+        """
+
+        if self.is_open and not self._skip and not self.MULTIPLE_FILES:
+            self.close_file()
+
+        self.is_open = False
+
+    def open_file(self, full_path: str,
+                  append: bool = False) -> None:
+        """ Opens the output file of a single file writer session.
+
+        Arguments:
+            full_path : The full path.
+            append : If true keeps the existing content.
+
+        Returns:
+            None
+        """
+
+        raise NotImplementedError
+
+    def set_names(self, vals: List[str]) -> None:
+        """ Receives the header names of a single file writer session, on new and appended files alike,
+        for the writers that name the values of each row instead of writing a header row.
+
+        Arguments:
+            vals : The header names.
+
+        Returns:
+            None
+        """
+
+    def write_header(self, vals: List[str]) -> None:
+        """ Writes the header row of a single file writer session.
+
+        Arguments:
+            vals : The header names.
+
+        Returns:
+            None
+        """
+
+        raise NotImplementedError
+
+    def write_rows(self, rows: List[List[str]]) -> None:
+        """ Writes the rows of a single file writer session.
+
+        Arguments:
+            rows : The item properties that will be saved.
+
+        Returns:
+            None
+        """
+
+        raise NotImplementedError
+
+    def close_file(self) -> None:
+        """ Closes the output file of a single file writer session.
+
+        Returns:
+            None
+        """
+
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     @staticmethod
     def apply_headers(items: List[object],
                       keys: List[str]) -> List[List[str]]:
@@ -103,9 +289,70 @@ class Writer(ABC):
 
         values = []
         for item in items:
-            values.append(list(map(lambda field: item.__dict__.get(field), keys)))
+            getter = Writer.item_getter(item=item)
+            values.append([getter(field) for field in keys])
         return values
 
+    def join_lists(self, rows: List[List[Any]]) -> List[List[Any]]:
+        """ Joins the list values, as the aisles of a deduplicated product, with LIST_SEPARATOR
+        for the writers that can not save nested values. The list columns are found on the first row.
+
+        Arguments:
+            rows : The item properties that will be saved.
+
+        Returns:
+            The same rows.
+        """
+
+        if self.NESTED_VALUES or not rows:
+            return rows
+
+        columns = [index for index, value in enumerate(rows[0]) if isinstance(value, (list, tuple))]
+        separator = self.LIST_SEPARATOR
+        for row in rows:
+            for index in columns:
+                if isinstance(row[index], (list, tuple)):
+                    row[index] = separator.join(str(value) for value in row[index])
+
+        return rows
+
+    @staticmethod
+    def item_getter(item: Any) -> Callable[[str], Any]:
+        """ Returns a function that reads the fields of an item.
+
+        The items can be regular objects, compact objects with a get method or dictionaries.
+
+        Arguments:
+            item : The item.
+
+        Returns:
+            A function that receives a field name and returns its value or None.
+        """
+
+        if hasattr(item, '__dict__'):
+            return item.__dict__.get
+
+        return item.get
+
+    @staticmethod
+    def item_fields(item: Any) -> List[str]:
+        """ Returns the field names of an item.
+
+        Arguments:
+            item : The item.
+
+        Returns:
+            A list of field names.
+        """
+
+        if isinstance(item, dict):
+            return list(item.keys())
+
+        if hasattr(item, '__dict__'):
+            return list(item.__dict__.keys())
+
+        return item.fields()
+
     @staticmethod
     def get_headers_items(items: List[object],
                           headers: Union[List[str], Dict[str, str]] = None) -> Tuple[List[str], List[str]]:
@@ -125,6 +372,6 @@ class Writer(ABC):
 
             return list(headers.keys()), list(headers.values())
 
-        keys = list(items[0].__dict__.keys())
+        keys = Writer.item_fields(item=items[0])
         return keys, keys
 
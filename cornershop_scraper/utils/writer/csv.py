@@ -6,7 +6,6 @@ This module provides a implementation of the CSV Writer using the base
 class Writer defined at cornershop_scraper.utils.writer.base.
 """
 
-from os import path
 from typing import Dict, List, Union
 from csv import writer
 
@@ -17,6 +16,7 @@ class CsvWriter(Writer):
     """ Implementation of CSV Writer extension. """
 
     PARSER_NAME = 'csv'
+    APPENDABLE = True
 
     def __init__(self, file_path: str = ''):
         """ Initialize CsvWriter
@@ -29,6 +29,8 @@ class CsvWriter(Writer):
         """
 
         super(CsvWriter, self).__init__(file_path=file_path, extension='csv')
+        self._output_file = None
+        self._csv_writer = None
 
     def save_items(self, items: List[object],
                    file_name: str,
@@ -46,14 +48,55 @@ class CsvWriter(Writer):
             None
         """
 
-        keys, vals = self.get_headers_items(items=items, headers=headers)
-        full_path = self.make_full_path(file_name=file_name)
-        if not force_new_file:
-            if path.isfile(full_path):
-                return
-
-        rows = self.apply_headers(items=items, keys=keys)
-        with open(full_path, 'w', encoding='utf-8', newline='') as output_file:
-            csv_writer = writer(output_file)
-            csv_writer.writerow(vals)
-            csv_writer.writerows(rows)
+        self.save_batches(batches=[items], file_name=file_name, headers=headers, force_new_file=force_new_file)
+
+    def open_file(self, full_path: str,
+                  append: bool = False) -> None:
+        """ Opens the CSV file of the writer session.
+
+        Arguments:
+            full_path : The full path.
+            append : If true keeps the existing rows.
+
+        Returns:
+            None
+        """
+
+        self._output_file = open(full_path, 'a' if append else 'w', encoding='utf-8', newline='')
+        self._csv_writer = writer(self._output_file)
+
+    def write_header(self, vals: List[str]) -> None:
+        """ Writes the CSV header row.
+
+        Arguments:
+            vals : The header names.
+
+        Returns:
+            None
+        """
+
+        self._csv_writer.writerow(vals)
+
+    def write_rows(self, rows: List[List[str]]) -> None:
+        """ Writes the CSV rows and flushes them to the file.
+
+        Arguments:
+            rows : The item properties that will be saved.
+
+        Returns:
+            None
+        """
+
+        self._csv_writer.writerows(rows)
+        self._output_file.flush()
+
+    def close_file(self) -> None:
+        """ Closes the CSV file.
+
+        Returns:
+            None
+        """
+
+        self._output_file.close()
+        self._output_file = None
+        self._csv_writer = None
@@ -9,41 +9,82 @@ Thanks P i for this tip from Stackoverflow question.
 https://stackoverflow.com/a/51726087
 """
 
-from os import path
+from concurrent.futures import ThreadPoolExecutor
+from os import getpid, path, remove, replace
+from random import uniform
+from threading import get_ident
 from time import sleep
-from typing import List, Union, Dict
-from requests import get
-from shutil import copyfileobj
+from typing import Dict, List, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError, RequestException
 
 from .base import Writer
+from ..executor import RequestExecutor
+from ..image_store import ImageStore
+from ..limiter import RateLimiter
 
 
 class ImageWriter(Writer):
     """  Implementation of CSV Writer extension. """
 
-    DEFAULT_DELAY = 1
+    DEFAULT_RATE_PER_WORKER = 4
+    DEFAULT_WORKERS = 1
+    DEFAULT_MAX_RETRIES = 3
+    DEFAULT_BACKOFF = 0.5
+    DEFAULT_TIMEOUT = 30
+    CHUNK_SIZE = 64 * 1024
     PARSER_NAME = 'img'
     MULTIPLE_FILES = True
+    FIXED_SCHEMA = True
     MAIN_PROPERTY = 'id'
     LINK_PROPERTY = 'img_url'
-
-    def __init__(self, file_path: str = ''):
+    STORE_OPTIONS = {
+        'rate_limiter': 'image_rate_limiter',
+        'workers': 'image_workers',
+        'image_store': 'image_store',
+    }
+
+    def __init__(self, file_path: str = '',
+                 rate_limiter: RateLimiter = None,
+                 workers: int = DEFAULT_WORKERS,
+                 session: requests.Session = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF,
+                 image_store: ImageStore = None):
         """ Initialize ImageWriter
 
         Arguments:
             file_path: The directory path.
+            rate_limiter : The rate limiter of the downloads, apart from the API one since the images come from
+                their own host, defaults to DEFAULT_RATE_PER_WORKER images per second for each worker.
+            workers : The images downloaded at once.
+            session : The session of the downloads, defaults to a keep-alive session pooling a connection per worker.
+            max_retries : The retries of a failed download.
+            backoff : The base delay in seconds of the exponential backoff between the retries.
+            image_store : The content-addressed store shared by the outputs, which are linked to its images, so
+                each distinct image is downloaded once.
 
         Returns:
             None
         """
 
         super(ImageWriter, self).__init__(extension='png', file_path=file_path)
+        self.workers = max(1, workers)
+        self.rate_limiter = rate_limiter or self.make_rate_limiter(workers=self.workers)
+        self.session = session or self.make_session(pool_size=self.workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.image_store = image_store
+        self.failures = {}
 
     def save_items(self, items: List[object],
                    file_name: str = None,
                    headers: Union[List[str], Dict[str, str]] = None,
                    force_new_file: bool = False) -> None:
-        """ Saves a image file for each item.
+        """ Saves a image file for each item. The images that still fail after the retries are
+        left out and listed on the failures attribute, so a new run only downloads them.
 
         Arguments:
             items : The items to save.
@@ -55,6 +96,40 @@ class ImageWriter(Writer):
             None
         """
 
+        self.download_all(downloads=self.get_downloads(items=items, force_new_file=force_new_file))
+
+    def download_all(self, downloads: List[Tuple[str, str]]) -> None:
+        """ Downloads the images, several at once when there are many workers.
+
+        Arguments:
+            downloads : A list of (url, full_path) tuples.
+
+        Returns:
+            None
+        """
+
+        self.failures = {}
+        if self.workers > 1 and len(downloads) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                list(pool.map(lambda download: self.download(*download), downloads))
+
+        else:
+            for url, full_path in downloads:
+                self.download(url=url, full_path=full_path)
+
+    def get_downloads(self, items: List[object],
+                      force_new_file: bool = False) -> List[Tuple[str, str]]:
+        """ Returns the images to download with their paths, skipping the existing files.
+
+        Arguments:
+            items : The items to save.
+            force_new_file : If true keeps the images whose files already exist.
+
+        Returns:
+            A list of (url, full_path) tuples.
+        """
+
+        downloads = []
         images = self.apply_headers(items=items, keys=[self.LINK_PROPERTY, self.MAIN_PROPERTY])
         for image in images:
             url = image[0]
@@ -85,27 +160,123 @@ class ImageWriter(Writer):
                 if path.isfile(full_path):
                     continue
 
-            self.save_image(url=url, full_path=full_path)
-            sleep(self.DEFAULT_DELAY)
+            downloads.append((url, full_path))
 
-    @staticmethod
-    def save_image(url: str,
-                   full_path: str) -> None:
-        """ Saves a image file of a item.
+        return downloads
+
+    def download(self, url: str,
+                 full_path: str) -> bool:
+        """ Downloads an image, retrying the connection errors and the throttled or failed responses.
+        With an image store the images already stored are linked instead. The file errors, as a
+        full disk, are not retried and, as the failed downloads, are listed on the failures attribute.
 
         Arguments:
             url : The image URL.
             full_path : The image full path.
 
+        Returns:
+            True if the image was saved.
+        """
+
+        image_store = self.image_store
+        if image_store:
+            blob_path = image_store.get(url=url)
+            if blob_path:
+                try:
+                    image_store.link(blob_path=blob_path, full_path=full_path)
+                    return True
+
+                except OSError as error:
+                    self.failures[url] = repr(error)
+                    return False
+
+        target_path = image_store.temp_path() if image_store else full_path
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(url)
+            try:
+                self.save_image(url=url, full_path=target_path, session=self.session)
+                if image_store:
+                    image_store.link(blob_path=image_store.put(url=url, file_path=target_path), full_path=full_path)
+
+                self.failures.pop(url, None)
+                return True
+
+            except RequestException as error:
+                self.failures[url] = repr(error)
+                response = error.response if isinstance(error, HTTPError) else None
+                if response is not None and response.status_code not in RequestExecutor.RETRY_STATUSES:
+                    return False
+
+                if attempt < self.max_retries:
+                    retry_after = RequestExecutor.retry_after(response)
+                    sleep(retry_after if retry_after is not None else uniform(0, self.backoff * 2 ** attempt))
+
+            except OSError as error:
+                self.failures[url] = repr(error)
+                return False
+
+        return False
+
+    @classmethod
+    def save_image(cls, url: str,
+                   full_path: str,
+                   session: requests.Session = None) -> None:
+        """ Saves a image file of a item. The image is streamed to a temporary file that is renamed
+        when complete, so an interrupted download never leaves a partial image.
+
+        Arguments:
+            url : The image URL.
+            full_path : The image full path.
+            session : The session of the download.
+
         Returns:
             None
         """
 
-        req = get(url=url, stream=True)
-        with open(full_path, 'wb') as out_file:
-            copyfileobj(req.raw, out_file)
+        tmp_path = f'{full_path}.{getpid()}.{get_ident()}.part'
+        try:
+            with (session or requests).get(url=url, stream=True, timeout=cls.DEFAULT_TIMEOUT) as req:
+                req.raise_for_status()
+                with open(tmp_path, 'wb') as out_file:
+                    for chunk in req.iter_content(chunk_size=cls.CHUNK_SIZE):
+                        out_file.write(chunk)
+
+            replace(tmp_path, full_path)
+
+        finally:
+            if path.exists(tmp_path):
+                remove(tmp_path)
+
+    @classmethod
+    def make_rate_limiter(cls, workers: int = DEFAULT_WORKERS) -> RateLimiter:
+        """ Returns the default rate limiter of the downloads, whose rate of each host grows with the workers.
+
+        Arguments:
+            workers : The images downloaded at once.
+
+        Returns:
+            The rate limiter.
+        """
+
+        workers = max(1, workers)
+        return RateLimiter(rate=cls.DEFAULT_RATE_PER_WORKER * workers, burst=workers)
+
+    @staticmethod
+    def make_session(pool_size: int = DEFAULT_WORKERS) -> requests.Session:
+        """ Returns a keep-alive session with a connection pool for each worker.
+
+        Arguments:
+            pool_size : The connections kept to each host.
+
+        Returns:
+            The session.
+        """
 
-        del req
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
 
     @staticmethod
     def get_file_name(url: str) -> str:
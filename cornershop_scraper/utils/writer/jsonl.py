@@ -0,0 +1,241 @@
+"""
+cornershop_scraper.utils.writer.jsonl
+-------------------------------------
+
+This module provides a implementation of the JSON Lines Writer using the base
+class Writer defined at cornershop_scraper.utils.writer.base. Each item is a
+line with its nested fields preserved, and the file can be compressed on the fly.
+
+The fastest available serializer is used: orjson, msgspec or the standard json.
+The zstd compression requires the optional zstandard dependency.
+"""
+
+import gzip
+import json
+from typing import Any, Dict, Iterator, List, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .base import Writer
+
+
+def _get_serializer() -> Dict[str, Any]:
+    """ Returns the functions of the fastest available JSON serializer.
+
+    Returns:
+        A dictionary with the serializer name, dumps and loads functions.
+    """
+
+    if orjson is not None:
+        return dict(
+            name='orjson',
+            dumps=lambda obj: orjson.dumps(obj, default=str),
+            loads=orjson.loads
+        )
+
+    if msgspec is not None:
+        encoder = msgspec.json.Encoder(enc_hook=str)
+        return dict(name='msgspec', dumps=encoder.encode, loads=msgspec.json.decode)
+
+    return dict(
+        name='json',
+        dumps=lambda obj: json.dumps(obj, ensure_ascii=False, default=str).encode('utf-8'),
+        loads=json.loads
+    )
+
+
+SERIALIZER = _get_serializer()
+
+
+class JsonlWriter(Writer):
+    """ Implementation of JSON Lines Writer extension. """
+
+    PARSER_NAME = 'jsonl'
+    APPENDABLE = True
+    NESTED_VALUES = True
+    COMPRESSION_SUFFIXES = {'gzip': 'gz', 'zstd': 'zst'}
+    DEFAULT_COMPRESSION_LEVEL = {'gzip': 6, 'zstd': 3}
+
+    def __init__(self, file_path: str = '',
+                 compression: str = None,
+                 compression_level: int = None):
+        """ Initialize JsonlWriter.
+
+        Arguments:
+            file_path : The directory path.
+            compression : None, gzip or zstd.
+            compression_level : The compression level, defaults to DEFAULT_COMPRESSION_LEVEL.
+
+        Returns:
+            None
+        """
+
+        if compression and compression not in self.COMPRESSION_SUFFIXES:
+            raise Warning(f'The compression {compression} is not supported.')
+
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError('The zstd compression requires zstandard, install it with "pip install zstandard".')
+
+        super(JsonlWriter, self).__init__(extension='jsonl', file_path=file_path)
+        self.compression = compression
+        self.compression_level = compression_level or self.DEFAULT_COMPRESSION_LEVEL.get(compression)
+        self._output_file = None
+        self._names = []
+        self._dumps = SERIALIZER['dumps']
+
+    def make_full_path(self, file_name: str) -> str:
+        """ Returns the full path, ending with the compression suffix.
+
+        Arguments:
+             file_name : The file name.
+
+        Returns:
+            The full path.
+        """
+
+        suffix = '.' + self.COMPRESSION_SUFFIXES[self.compression] if self.compression else ''
+        if suffix and file_name.endswith(suffix):
+            file_name = file_name[:-len(suffix)]
+
+        return super(JsonlWriter, self).make_full_path(file_name=file_name) + suffix
+
+    def save_items(self, items: List[object],
+                   file_name: str,
+                   headers: Union[List[str], Dict[str, str]] = None,
+                   force_new_file: bool = True) -> None:
+        """ Saves the items on a JSON Lines file.
+
+        Arguments:
+            items : The items to save.
+            file_name : The file name.
+            headers : The headers that will be used to change the name of the fields and which of them will be saved.
+            force_new_file : If true saves a new file even if its already exists.
+
+        Returns:
+            None
+        """
+
+        self.save_batches(batches=[items], file_name=file_name, headers=headers, force_new_file=force_new_file)
+
+    def open_file(self, full_path: str,
+                  append: bool = False) -> None:
+        """ Opens the JSON Lines file of the writer session.
+
+        The compressed files are appended as new gzip members or zstd frames, which
+        are read back as a single stream.
+
+        Arguments:
+            full_path : The full path.
+            append : If true keeps the existing lines.
+
+        Returns:
+            None
+        """
+
+        mode = 'ab' if append else 'wb'
+        if self.compression == 'gzip':
+            self._output_file = gzip.open(full_path, mode, compresslevel=self.compression_level)
+
+        elif self.compression == 'zstd':
+            compressor = zstandard.ZstdCompressor(level=self.compression_level)
+            self._output_file = compressor.stream_writer(open(full_path, mode))
+
+        else:
+            self._output_file = open(full_path, mode)
+
+    def set_names(self, vals: List[str]) -> None:
+        """ Sets the record keys.
+
+        Arguments:
+            vals : The header names.
+
+        Returns:
+            None
+        """
+
+        self._names = list(vals)
+
+    def write_header(self, vals: List[str]) -> None:
+        """ The records are named by set_names, there is no header row.
+
+        Arguments:
+            vals : NO USE
+
+        Returns:
+            None
+        """
+
+    def write_rows(self, rows: List[List[str]]) -> None:
+        """ Writes one JSON record per row.
+
+        Arguments:
+            rows : The item properties that will be saved.
+
+        Returns:
+            None
+        """
+
+        names, dumps = self._names, self._dumps
+        if rows and len(names) != len(rows[0]):
+            raise Warning('The JSON Lines records do not match the header names of the session.')
+
+        self._output_file.write(b''.join(dumps(dict(zip(names, row))) + b'\n' for row in rows))
+        if not self.compression:
+            self._output_file.flush()
+
+    def close_file(self) -> None:
+        """ Closes the JSON Lines file.
+
+        Returns:
+            None
+        """
+
+        self._output_file.close()
+        self._output_file = None
+
+    def read_items(self, file_name: str) -> Iterator[Dict[str, Any]]:
+        """ Yields the records of a JSON Lines file, one line at a time.
+
+        Arguments:
+            file_name : The file name.
+
+        Returns:
+            An iterator of dictionaries.
+        """
+
+        full_path = self.make_full_path(file_name=file_name)
+        loads = SERIALIZER['loads']
+        if self.compression == 'gzip':
+            input_file = gzip.open(full_path, 'rb')
+
+        elif self.compression == 'zstd':
+            decompressor = zstandard.ZstdDecompressor()
+            input_file = decompressor.stream_reader(open(full_path, 'rb'), read_across_frames=True)
+
+        else:
+            input_file = open(full_path, 'rb')
+
+        with input_file:
+            buffer = b''
+            for chunk in iter(lambda: input_file.read(1 << 16), b''):
+                buffer += chunk
+                *lines, buffer = buffer.split(b'\n')
+                for line in lines:
+                    if line:
+                        yield loads(line)
+
+            if buffer.strip():
+                yield loads(buffer)
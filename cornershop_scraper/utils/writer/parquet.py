@@ -0,0 +1,282 @@
+"""
+cornershop_scraper.utils.writer.parquet
+---------------------------------------
+
+This module provides a implementation of the Parquet Writer using the base
+class Writer defined at cornershop_scraper.utils.writer.base. The columns keep
+their types and the rows are written in row groups as they are appended.
+
+It requires the optional pyarrow dependency.
+"""
+
+import json
+from typing import Any, Dict, List, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from .base import Writer
+
+
+class ParquetWriter(Writer):
+    """ Implementation of Parquet Writer extension. """
+
+    PARSER_NAME = 'parquet'
+    NESTED_VALUES = True
+    DEFAULT_ROW_GROUP_SIZE = 10000
+    DEFAULT_COMPRESSION = 'snappy'
+    FIELD_TYPES = {
+        'aisle': 'string',
+        'department': 'string',
+        'aisles': 'string',
+        'departments': 'string',
+        'brand_name': 'string',
+        'brand_id': 'int64',
+        'buy_unit': 'string',
+        'currency': 'string',
+        'default_buy_unit': 'string',
+        'description': 'string',
+        'img_url': 'string',
+        'nutritional_info': 'string',
+        'regulatory_fees': 'string',
+        'related_to': 'string',
+        'kind': 'string',
+        'name': 'string',
+        'label': 'string',
+        'package': 'string',
+        'availability_status': 'string',
+        'price': 'float64',
+        'original_price': 'float64',
+        'price_per_unit': 'float64',
+        'unit_conversion_rate': 'float64',
+        'purchasable': 'bool',
+        'variable_weight': 'bool',
+        'priority': 'int64',
+        'is_light': 'bool',
+        'background_color': 'string',
+        'caption': 'string',
+        'image': 'string',
+        'url': 'string',
+        'valid_until': 'string',
+    }
+
+    def __init__(self, file_path: str = '',
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 compression: str = DEFAULT_COMPRESSION):
+        """ Initialize ParquetWriter.
+
+        Arguments:
+            file_path : The directory path.
+            row_group_size : The number of rows buffered before a row group is written.
+            compression : The column compression codec.
+
+        Returns:
+            None
+        """
+
+        if pa is None:
+            raise ImportError('The ParquetWriter requires pyarrow, install it with "pip install pyarrow".')
+
+        super(ParquetWriter, self).__init__(extension='parquet', file_path=file_path)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._full_path = None
+        self._parquet_writer = None
+        self._schema = None
+        self._names = []
+        self._rows = []
+
+    def save_items(self, items: List[object],
+                   file_name: str,
+                   headers: Union[List[str], Dict[str, str]] = None,
+                   force_new_file: bool = True) -> None:
+        """ Saves the items on a Parquet file.
+
+        Arguments:
+            items : The items to save.
+            file_name : The file name.
+            headers : The headers that will be used to change the name of the fields and which of them will be saved.
+            force_new_file : If true saves a new file even if its already exists.
+
+        Returns:
+            None
+        """
+
+        self.save_batches(batches=[items], file_name=file_name, headers=headers, force_new_file=force_new_file)
+
+    def open_file(self, full_path: str,
+                  append: bool = False) -> None:
+        """ Prepares the Parquet file of the writer session. The file is created with the first row group.
+
+        Arguments:
+            full_path : The full path.
+            append : NO USE, a Parquet file can not be appended.
+
+        Returns:
+            None
+        """
+
+        self._full_path = full_path
+        self._parquet_writer = None
+        self._schema = None
+        self._rows = []
+
+    def set_names(self, vals: List[str]) -> None:
+        """ Sets the column names, the header of the schema.
+
+        Arguments:
+            vals : The header names.
+
+        Returns:
+            None
+        """
+
+        self._names = list(vals)
+
+    def write_header(self, vals: List[str]) -> None:
+        """ The columns are named by set_names, there is no header row.
+
+        Arguments:
+            vals : NO USE
+
+        Returns:
+            None
+        """
+
+    def write_rows(self, rows: List[List[str]]) -> None:
+        """ Buffers the rows and writes a row group when it is full.
+
+        Arguments:
+            rows : The item properties that will be saved.
+
+        Returns:
+            None
+        """
+
+        self._rows.extend(rows)
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Writes the buffered rows as a row group.
+
+        Returns:
+            None
+        """
+
+        if not self._rows:
+            return
+
+        columns = list(zip(*self._rows))
+        self._rows = []
+        if self._schema is None:
+            arrays = [self._infer_array(key=key, values=column) for key, column in zip(self._keys, columns)]
+            self._schema = pa.schema([pa.field(name, array.type) for name, array in zip(self._names, arrays)])
+            self._parquet_writer = pq.ParquetWriter(self._full_path, self._schema, compression=self.compression)
+
+        else:
+            arrays = [
+                self._cast_array(values=column, field=field)
+                for column, field in zip(columns, self._schema)
+            ]
+
+        self._parquet_writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close_file(self) -> None:
+        """ Writes the last row group and closes the Parquet file.
+
+        Returns:
+            None
+        """
+
+        self.flush()
+        if self._parquet_writer is None:
+            self._schema = pa.schema([pa.field(name, pa.string()) for name in self._names])
+            self._parquet_writer = pq.ParquetWriter(self._full_path, self._schema, compression=self.compression)
+
+        self._parquet_writer.close()
+        self._parquet_writer = None
+
+    def _infer_array(self, key: str,
+                     values: List[Any]) -> Any:
+        """ Returns the array of a column on the first row group, fixing its type.
+
+        The known fields get its declared type, the others are inferred and nested
+        or empty columns are saved as strings. The next row groups are cast to it. The
+        id is inferred, since the products ids are numbers and the departments and aisles
+        ids are text.
+
+        Arguments:
+            key : The item property.
+            values : The column values.
+
+        Returns:
+            A pyarrow array.
+        """
+
+        if key in self.FIELD_TYPES:
+            return self._cast_array(values=values, field=pa.field(key, pa.type_for_alias(self.FIELD_TYPES[key])))
+
+        try:
+            array = pa.array(values)
+
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            array = None
+
+        if array is None or pa.types.is_null(array.type) or pa.types.is_nested(array.type):
+            return self._to_array(values=values, arrow_type=pa.string())
+
+        return array
+
+    def _cast_array(self, values: List[Any],
+                    field: Any) -> Any:
+        """ Returns the array of a column with the type declared or fixed by the first row group.
+
+        The values that do not fit the type, as a number sent as text, are cast from their text.
+
+        Arguments:
+            values : The column values.
+            field : The pyarrow field of the column.
+
+        Returns:
+            A pyarrow array.
+        """
+
+        try:
+            return self._to_array(values=values, arrow_type=field.type)
+
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            pass
+
+        try:
+            return self._to_array(values=values, arrow_type=pa.string()).cast(field.type)
+
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as error:
+            raise Warning(f'The column {field.name} does not match its {field.type} type on the file: {error}')
+
+    @staticmethod
+    def _to_array(values: List[Any],
+                  arrow_type: Any) -> Any:
+        """ Returns the array of a column with the given type.
+
+        Arguments:
+            values : The column values.
+            arrow_type : The pyarrow type.
+
+        Returns:
+            A pyarrow array.
+        """
+
+        if pa.types.is_string(arrow_type):
+            values = [
+                value if value is None or isinstance(value, str) else json.dumps(value, default=str)
+                for value in values
+            ]
+
+        else:
+            values = [None if value == '' else value for value in values]
+
+        return pa.array(values, type=arrow_type)
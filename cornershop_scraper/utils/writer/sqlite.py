@@ -0,0 +1,257 @@
+"""
+cornershop_scraper.utils.writer.sqlite
+--------------------------------------
+
+This module provides a implementation of the SQLite Writer using the base
+class Writer defined at cornershop_scraper.utils.writer.base. The products of
+each store are upserted into a dimension table and each crawl appends a snapshot
+of their prices to a history table, so the database keeps growing across the
+runs and several stores can share it.
+"""
+
+import sqlite3
+from time import time
+from typing import Any, Dict, List, Tuple, Union
+
+from .base import Writer
+
+
+class SqliteWriter(Writer):
+    """ Implementation of SQLite Writer extension. """
+
+    PARSER_NAME = 'sqlite'
+    APPENDABLE = True
+    FIXED_SCHEMA = True
+    PRODUCT_FIELDS = ('id', 'name', 'package', 'brand_id', 'brand_name', 'currency', 'aisle', 'department', 'img_url')
+    HISTORY_FIELDS = ('price', 'original_price', 'availability_status', 'purchasable')
+    SCHEMA = (
+        '''
+        CREATE TABLE IF NOT EXISTS products (
+            product_id INTEGER NOT NULL,
+            store TEXT NOT NULL,
+            name TEXT,
+            package TEXT,
+            brand_id INTEGER,
+            brand_name TEXT,
+            currency TEXT,
+            aisle TEXT,
+            department TEXT,
+            img_url TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (product_id, store)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS price_history (
+            product_id INTEGER NOT NULL,
+            store TEXT NOT NULL,
+            snapshot_ts REAL NOT NULL,
+            price REAL,
+            original_price REAL,
+            availability TEXT,
+            purchasable INTEGER,
+            PRIMARY KEY (product_id, store, snapshot_ts)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS price_history_store_snapshot ON price_history (store, snapshot_ts)
+        ''',
+    )
+    UPSERT_PRODUCT = '''
+        INSERT INTO products (product_id, name, package, brand_id, brand_name, currency, aisle, department, img_url,
+                              updated_at, store)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (product_id, store) DO UPDATE SET
+            name = excluded.name,
+            package = excluded.package,
+            brand_id = excluded.brand_id,
+            brand_name = excluded.brand_name,
+            currency = excluded.currency,
+            aisle = excluded.aisle,
+            department = excluded.department,
+            img_url = excluded.img_url,
+            updated_at = excluded.updated_at
+    '''
+    INSERT_HISTORY = '''
+        INSERT OR IGNORE INTO price_history (product_id, store, snapshot_ts, price, original_price, availability,
+                                             purchasable)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+    MIGRATE_PRODUCTS = (
+        'ALTER TABLE products RENAME TO products_without_store',
+        SCHEMA[0],
+        '''
+        INSERT INTO products (product_id, store, name, package, brand_id, brand_name, currency, aisle, department,
+                              img_url, updated_at)
+        SELECT product_id, '', name, package, brand_id, brand_name, currency, aisle, department, img_url, updated_at
+        FROM products_without_store
+        ''',
+        'DROP TABLE products_without_store',
+    )
+
+    def __init__(self, file_path: str = ''):
+        """ Initialize SqliteWriter.
+
+        Arguments:
+            file_path : The directory path.
+
+        Returns:
+            None
+        """
+
+        super(SqliteWriter, self).__init__(extension='sqlite', file_path=file_path)
+        self.snapshot_ts = None
+        self._connection = None
+
+    def save_items(self, items: List[object],
+                   file_name: str,
+                   headers: Union[List[str], Dict[str, str]] = None,
+                   force_new_file: bool = True) -> None:
+        """ Saves the items on the SQLite database as one snapshot.
+
+        Arguments:
+            items : The items to save.
+            file_name : The file name.
+            headers : NO USE, the tables have a fixed schema.
+            force_new_file : NO USE, the database is always kept.
+
+        Returns:
+            None
+        """
+
+        self.save_batches(batches=[items], file_name=file_name)
+
+    def open(self, file_name: str = '',
+             headers: Union[List[str], Dict[str, str]] = None,
+             force_new_file: bool = True,
+             append: bool = True) -> 'Writer':
+        """ Opens a writer session, which is a new snapshot on the database.
+
+        Arguments:
+            file_name : The file name.
+            headers : NO USE, the tables have a fixed schema.
+            force_new_file : NO USE, the database is always kept.
+            append : NO USE, the database is always kept.
+
+        Returns:
+            The writer itself, to be used as a context manager.
+        """
+
+        fields = list(self.PRODUCT_FIELDS + self.HISTORY_FIELDS)
+        return super(SqliteWriter, self).open(file_name=file_name, headers=fields, append=True)
+
+    def open_file(self, full_path: str,
+                  append: bool = True) -> None:
+        """ Connects to the database in WAL mode and creates the tables. The products table of
+        the databases created before it was keyed by store is migrated, with an empty store.
+
+        Arguments:
+            full_path : The full path.
+            append : NO USE, the database is always kept.
+
+        Returns:
+            None
+        """
+
+        self._connection = sqlite3.connect(full_path)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.execute('PRAGMA synchronous = NORMAL')
+        with self._connection:
+            columns = [row[1] for row in self._connection.execute('PRAGMA table_info(products)')]
+            if columns and 'store' not in columns:
+                for statement in self.MIGRATE_PRODUCTS:
+                    self._connection.execute(statement)
+
+            for statement in self.SCHEMA:
+                self._connection.execute(statement)
+
+        self.snapshot_ts = time()
+
+    def write_header(self, vals: List[str]) -> None:
+        """ NO USE, the tables have a fixed schema.
+
+        Arguments:
+            vals : The header names.
+
+        Returns:
+            None
+        """
+
+    def write_rows(self, rows: List[List[Any]]) -> None:
+        """ Upserts the products of the store and appends its prices in a single transaction.
+        A product listed on many aisles keeps the first price of the snapshot.
+
+        Arguments:
+            rows : The item properties, in PRODUCT_FIELDS and HISTORY_FIELDS order.
+
+        Returns:
+            None
+        """
+
+        size = len(self.PRODUCT_FIELDS)
+        store = str(self.store_id) if self.store_id is not None else ''
+        products = [tuple(self._scalar(value) for value in row[:size]) + (self.snapshot_ts, store) for row in rows]
+        history = [
+            (row[0], store, self.snapshot_ts, row[size], row[size + 1], row[size + 2], row[size + 3])
+            for row in rows
+        ]
+
+        with self._connection:
+            self._connection.executemany(self.UPSERT_PRODUCT, products)
+            self._connection.executemany(self.INSERT_HISTORY, history)
+
+    def close_file(self) -> None:
+        """ Closes the database connection.
+
+        Returns:
+            None
+        """
+
+        self._connection.close()
+        self._connection = None
+
+    def price_history(self, file_name: str,
+                      product_id: int,
+                      store: Any = None) -> List[Tuple[Any, ...]]:
+        """ Returns the price history of a product.
+
+        Arguments:
+            file_name : The file name.
+            product_id : The product ID.
+            store : The store, if not given returns the history on every store.
+
+        Returns:
+            A list of (store, snapshot_ts, price, original_price, availability, purchasable) tuples.
+        """
+
+        query = '''
+            SELECT store, snapshot_ts, price, original_price, availability, purchasable
+            FROM price_history WHERE product_id = ?
+        '''
+        params = [product_id]
+        if store is not None:
+            query += ' AND store = ?'
+            params.append(str(store))
+
+        connection = sqlite3.connect(self.make_full_path(file_name=file_name))
+        try:
+            return connection.execute(query + ' ORDER BY snapshot_ts, store', params).fetchall()
+
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _scalar(value: Any) -> Any:
+        """ Returns the value converted to a type accepted by SQLite.
+
+        Arguments:
+            value : The value.
+
+        Returns:
+            The value or its string.
+        """
+
+        if value is None or isinstance(value, (int, float, str, bytes)):
+            return value
+
+        return str(value)
@@ -9,7 +9,6 @@ Thanks Jossef Harush for this tip from Stackoverflow question.
 https://stackoverflow.com/a/61393519
 """
 
-from os import path
 from typing import List, Dict, Union
 from xlsxwriter import Workbook
 
@@ -32,6 +31,10 @@ class XlsxWriter(Writer):
             None
         """
         super(XlsxWriter, self).__init__(extension='xlsx', file_path=file_path)
+        self._workbook = None
+        self._worksheet = None
+        self._column_width = []
+        self._row_index = 0
 
     def save_items(self, items: List[object],
                    file_name: str,
@@ -49,20 +52,95 @@ class XlsxWriter(Writer):
             None
         """
 
-        keys, vals = self.get_headers_items(items=items, headers=headers)
-        full_path = self.make_full_path(file_name=file_name)
-        if not force_new_file:
-            if path.isfile(full_path):
-                return
+        self.save_batches(batches=[items], file_name=file_name, headers=headers, force_new_file=force_new_file)
 
-        with Workbook(full_path) as workbook:
-            worksheet = workbook.add_worksheet(name='')
-            worksheet.write_row(row=0, col=0, data=vals)
+    def open_file(self, full_path: str,
+                  append: bool = False) -> None:
+        """ Opens the workbook of the writer session.
 
-            rows = self.apply_headers(items=items, keys=keys)
-            self.set_required_column_width(items=rows, worksheet=worksheet, keys=keys)
-            for index, row in enumerate(rows):
-                worksheet.write_row(row=index+1, col=0, data=row)
+        The workbook is written in constant memory mode, so each row is flushed to
+        the temporary file as soon as it is written.
+
+        Arguments:
+            full_path : The full path.
+            append : NO USE, a XLSX file can not be appended.
+
+        Returns:
+            None
+        """
+
+        self._workbook = Workbook(full_path, {'constant_memory': True})
+        self._worksheet = self._workbook.add_worksheet(name='')
+        self._column_width = []
+        self._row_index = 0
+
+    def write_header(self, vals: List[str]) -> None:
+        """ Writes the header row of the worksheet.
+
+        Arguments:
+            vals : The header names.
+
+        Returns:
+            None
+        """
+
+        self._worksheet.write_row(row=0, col=0, data=vals)
+        self._column_width = self.get_column_width(items=[], keys=vals)
+        self._row_index = 1
+
+    def write_rows(self, rows: List[List[str]]) -> None:
+        """ Writes the rows on the worksheet and updates the required column width.
+
+        Arguments:
+            rows : The item properties that will be saved.
+
+        Returns:
+            None
+        """
+
+        self._column_width = self.get_column_width(items=rows, keys=self._keys, column_width=self._column_width)
+        for row in rows:
+            self._worksheet.write_row(row=self._row_index, col=0, data=row)
+            self._row_index += 1
+
+    def close_file(self) -> None:
+        """ Sets the column width and closes the workbook.
+
+        Returns:
+            None
+        """
+
+        for i, width in enumerate(self._column_width):
+            self._worksheet.set_column(i, i, width)
+
+        self._workbook.close()
+        self._workbook = None
+        self._worksheet = None
+
+    def get_column_width(self, items: List[List[str]],
+                         keys: List[str],
+                         column_width: List[int] = None) -> List[int]:
+        """ Returns the required column width of the given rows.
+
+        Arguments:
+            items : The rows.
+            keys : The properties of the object that will be saved.
+            column_width : The current width of the columns.
+
+        Returns:
+            The width of each column.
+        """
+
+        if not column_width:
+            column_width = [len(str(column)) + self.DEFAULT_OFFSET for column in keys]
+
+        for item in items:
+            for i, column in enumerate(keys):
+                width = len(str(item[i])) + self.DEFAULT_OFFSET
+                if width > column_width[i]:
+                    column_width[i] = width
+
+        return column_width
 
     def set_required_column_width(self, items: List[List[str]],
                                   worksheet: Workbook.worksheet_class,
@@ -78,12 +156,6 @@ class XlsxWriter(Writer):
             None
         """
 
-        column_width = [len(str(column)) + self.DEFAULT_OFFSET for column in keys]
-        for item in items:
-            for i, column in enumerate(keys):
-                width = len(str(item[i])) + self.DEFAULT_OFFSET
-                if width > column_width[i]:
-                    column_width[i] = width
-
+        column_width = self.get_column_width(items=items, keys=keys)
         for i, width in enumerate(column_width):
             worksheet.set_column(i, i, width)
@@ -72,7 +72,7 @@ class XmlWriter(Writer):
 
         elements = []
         keys, vals = self.get_headers_items(items=items, headers=headers)
-        rows = self.apply_headers(items=items, keys=keys)
+        rows = self.join_lists(rows=self.apply_headers(items=items, keys=keys))
         for row_index, row in enumerate(rows):
             root = Element(root_name)
             for column_index, header in enumerate(vals):
@@ -82,8 +82,9 @@ class XmlWriter(Writer):
             tree = ElementTree(root)
             elements.append(tostring(root, encoding='utf-8', method='xml'))
             if save:
-                if self.MAIN_PROPERTY in items[row_index].__dict__:
-                    file_name = str(items[row_index].__dict__['id']) + '.xml'
+                main_value = self.item_getter(item=items[row_index])(self.MAIN_PROPERTY)
+                if main_value is not None:
+                    file_name = str(main_value) + '.xml'
                 else:
                     file_name = str(row_index) + '.xml'
 
@@ -92,6 +93,6 @@ class XmlWriter(Writer):
                     if path.isfile(full_path):
                         continue
 
-                tree.write(file_name)
+                tree.write(full_path)
 
         return elements
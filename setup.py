@@ -4,6 +4,11 @@ from setuptools import setup, find_packages
 HERE = Path(__file__).parent
 README = (HERE / 'README.md').read_text()
 REQUIRES = (HERE / 'requirements.txt').read_text().splitlines()
+EXTRAS = {
+    'table': ['numpy'],
+    'parquet': ['pyarrow'],
+    'jsonl': ['orjson', 'zstandard'],
+}
 
 NAME = 'cornershop_scraper'
 VERSION = '0.2.3'
@@ -31,8 +36,9 @@ setup(
         'Intended Audience :: Science/Research',
         'License :: OSI Approved :: MIT License',
     ],
-    packages=find_packages(),
+    packages=find_packages(exclude=('benchmarks', 'benchmarks.*')),
     install_requires=REQUIRES,
+    extras_require=EXTRAS,
     python_requires=PYTHON_VER,
     keywords=['cornershop', 'scraper', 'products', 'stores', 'market', 'delivery']
 )